@@ -0,0 +1,210 @@
+import hashlib
+import weakref
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from monopoly_engine import DECKS, RENT_LEVELS, CardEffect, Deck, MonopolyBoard, SquareKind
+
+# Long-run board statistics computed from the rules instead of by simulation.
+#
+# A turn is a 2d6 roll (the engine has no doubles re-roll), then the landing square is
+# resolved: 'Go to Jail' sends the player to jail, Chance and Millionaire Lifestyle draw a
+# card whose movement effect (if any) is applied. The chain has one state per square plus
+# an extra "in jail" state, so players sent to jail are told apart from those just visiting.
+
+DICE_PROBABILITIES = {total: (6 - abs(total - 7)) / 36 for total in range(2, 13)}
+
+_DISTRIBUTIONS: Dict[str, 'LandingDistribution'] = {}
+# board -> (squares when hashed, key) for the default decks, so repeat lookups skip hashing
+_DEFAULT_KEYS = weakref.WeakKeyDictionary()
+
+
+def board_key(board: MonopolyBoard, decks: Sequence[Deck] = None) -> str:
+    """ Stable hash of everything that affects movement: squares, Go/Jail and the card decks """
+    decks = decks if decks is not None else DECKS
+    squares = tuple((p.name, int(p.kind), p.cost, p.color) for p in board.positions)
+    # draw order does not matter in the long run, only which cards are in each deck
+    cards = tuple(tuple(sorted((card.code, card.arg) for card in deck.cards)) for deck in decks)
+    raw = repr((squares, board.go_index, board.jail.index if board.jail else None, cards))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _card_outcomes(board: MonopolyBoard, deck: Deck, square: int, jail_state: int) -> List[Tuple[int, float]]:
+    """ (state, probability) after drawing one card from `deck` on `square` """
+    if not deck.cards:
+        return [(square, 1.0)]
+    share = 1.0 / len(deck)
+    outcomes = []
+    for card in deck.cards:
+        if card.code == CardEffect.GO_TO_JAIL:
+            outcomes.append((jail_state, share))
+        elif card.code == CardEffect.MOVE:
+            # fortune cards move counter-clockwise, advance handles negative steps
+            outcomes.append((board.advance(square, card.arg)[0], share))
+        else:
+            outcomes.append((square, share))
+    return outcomes
+
+
+def transition_matrix(board: MonopolyBoard, decks: Sequence[Deck] = None) -> np.ndarray:
+    """ (n + 1, n + 1) matrix of end-of-turn to end-of-turn probabilities; state n is "in jail" """
+    chance, millionaire = decks if decks is not None else DECKS
+    n = len(board)
+    jail_state = n
+    jail_square = board.jail.index if board.jail else 0
+    matrix = np.zeros((n + 1, n + 1))
+
+    for state in range(n + 1):
+        start = jail_square if state == jail_state else state
+        for total, p in DICE_PROBABILITIES.items():
+            square = board.advance(start, total)[0]
+            kind = board.kinds[square]
+            if kind == SquareKind.GO_TO_JAIL:
+                outcomes = [(jail_state, 1.0)]
+            elif kind == SquareKind.CHANCE:
+                outcomes = _card_outcomes(board, chance, square, jail_state)
+            elif kind == SquareKind.MILLIONAIRE:
+                outcomes = _card_outcomes(board, millionaire, square, jail_state)
+            else:
+                outcomes = [(square, 1.0)]
+            for target, q in outcomes:
+                matrix[state, target] += p * q
+    return matrix
+
+
+def stationary_distribution(matrix: np.ndarray) -> np.ndarray:
+    """ Solve pi P = pi with sum(pi) = 1 """
+    size = matrix.shape[0]
+    system = matrix.T - np.eye(size)
+    system[-1] = 1.0
+    rhs = np.zeros(size)
+    rhs[-1] = 1.0
+    return np.linalg.solve(system, rhs)
+
+
+class LandingDistribution:
+    """ Long-run probability of ending a turn on each square """
+    def __init__(self, board: MonopolyBoard, states: np.ndarray):
+        n = len(board)
+        self.names = [p.name for p in board.positions]
+        self.states = states
+        self.in_jail = float(states[n])
+        # players in jail sit on the Jail square
+        squares = states[:n].copy()
+        if board.jail:
+            squares[board.jail.index] += states[n]
+        self.squares = squares
+        self.states.setflags(write=False)
+        self.squares.setflags(write=False)
+
+    def probability(self, index: int) -> float:
+        return float(self.squares[index])
+
+    def ranked(self) -> List[Tuple[str, int, float]]:
+        """ (name, index, probability), most visited first """
+        order = np.argsort(-self.squares, kind="stable")
+        return [(self.names[i], int(i), float(self.squares[i])) for i in order]
+
+
+def landing_distribution(board: MonopolyBoard, decks: Optional[Sequence[Deck]] = None) -> LandingDistribution:
+    """ Stationary landing distribution for `board`, cached by board_key """
+    if decks is None:
+        size, key = _DEFAULT_KEYS.get(board, (None, None))
+        if size != len(board):
+            key = board_key(board)
+            _DEFAULT_KEYS[board] = (len(board), key)
+    else:
+        key = board_key(board, decks)
+    cached = _DISTRIBUTIONS.get(key)
+    if cached is None:
+        cached = LandingDistribution(board, stationary_distribution(transition_matrix(board, decks)))
+        _DISTRIBUTIONS[key] = cached
+    return cached
+
+
+class ExpectedIncome:
+    """ Expected rent per opponent turn, for every square and every player of `game`: the landing
+    probability of each owned square times the rent it charges now. Attach with
+    ExpectedIncome(game), much like a Journal; the engine reports every change of ownership or
+    houses and only the color groups it touched are recomputed, when the figures are next read.
+    A new rent mapping recomputes everything. Reading the per-player totals is O(players) once
+    they are up to date """
+    def __init__(self, game, weights: Optional[Sequence[float]] = None):
+        self.game = game
+        if weights is None:
+            weights = landing_distribution(game.board, None if game.decks is DECKS else game.decks).squares
+        self.weights = [float(w) for w in weights]
+        self.groups = {squares[0].color_id: tuple(p.index for p in squares)
+                       for squares in game.board.color_groups.values()}
+        self.seats = {p: i for i, p in enumerate(game.players)}
+        self.table = None
+        game.income = self
+        self.rebuild()
+
+    def changed(self, color_id: int):
+        """ Called by the engine when ownership or houses change in a color group """
+        if color_id in self.groups: # uncolored squares (color_id -1) never charge rent
+            self._dirty.add(color_id)
+
+    def rebuild(self):
+        """ Recompute everything, e.g. after the rent mapping changed """
+        self.table = self.game.rent_table
+        self.squares = [0.0] * len(self.game.board) # square -> expected rent per opponent turn
+        self.players = [0.0] * len(self.game.players) # seat -> sum over its squares
+        self._owners = [-1] * len(self.game.board) # seat each square's figure is counted for
+        self._dirty = set(self.groups)
+        self._refresh()
+
+    def _refresh(self):
+        game = self.game
+        if game.rent_table is not self.table:
+            return self.rebuild()
+        rents, set_sizes = self.table.rents, self.table.set_sizes
+        weights, squares, players, counted = self.weights, self.squares, self.players, self._owners
+        for color_id in self._dirty:
+            for index in self.groups[color_id]:
+                seat = counted[index]
+                if seat >= 0:
+                    players[seat] -= squares[index]
+                owner = game.owners[index]
+                if owner is None:
+                    squares[index], counted[index] = 0.0, -1
+                    continue
+                doubled = owner.set_counts.get(color_id, 0) == set_sizes[index] and not owner.built_counts.get(color_id)
+                income = weights[index] * rents[(index * RENT_LEVELS + game.houses[index]) * 2 + doubled]
+                seat = self.seats[owner]
+                players[seat] += income
+                squares[index], counted[index] = income, seat
+        self._dirty.clear()
+
+    def totals(self) -> List[float]:
+        """ Expected rent per opponent turn of each player, by seat """
+        if self._dirty or self.game.rent_table is not self.table:
+            self._refresh()
+        return list(self.players)
+
+    def square(self, index: int) -> float:
+        """ Expected rent per opponent turn of square `index` (0 when unowned) """
+        if self._dirty or self.game.rent_table is not self.table:
+            self._refresh()
+        return self.squares[index]
+
+    def close(self):
+        """ Detach from the game """
+        if self.game.income is self:
+            self.game.income = None
+
+
+def clear_cache():
+    _DISTRIBUTIONS.clear()
+    _DEFAULT_KEYS.clear()
+
+
+if __name__ == "__main__":
+    from monopoly_engine import default_board
+
+    dist = landing_distribution(default_board())
+    for name, index, p in dist.ranked():
+        print(f"{index:>2} {name:<22} {p:.4f}")
+    print(f"in jail: {dist.in_jail:.4f}")
@@ -0,0 +1 @@
+# Benchmarks for the engine. Run from backend/, e.g. `python -m benchmarks.memory`
@@ -0,0 +1,72 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.journal import play
+from dice import BlockDice, ScriptedDice
+from journal import Journal, replay
+from monopoly_engine import MillionaireMonopoly, default_board
+from simulator import POLICIES, game_seed, new_game, play_game, simulate
+from snapshot import dump_game, load_game
+
+POLICY_NAMES = ("greedy", "greedy", "cautious", "fixed")
+
+
+def check_reproducible(seed: int, games: int, max_turns: int):
+    """ The same seed must give the same game in the scalar engine, the batch runner and a replay """
+    batch = simulate(games, POLICY_NAMES, seed=seed, workers=2, max_turns=max_turns, chunk_size=3, dice="block")
+    scalar = simulate(games, POLICY_NAMES, seed=seed, workers=1, max_turns=max_turns, dice="block")
+    assert batch.to_dict() == scalar.to_dict()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(games):
+            s = game_seed(seed, i)
+            game = new_game(s, len(POLICY_NAMES), "block")
+            path = os.path.join(tmp, "game.journal")
+            with Journal(path, game, fsync="never", snapshot_every=500):
+                play(game, [POLICIES[name]() for name in POLICY_NAMES], max_turns)
+            assert dump_game(replay(path, from_start=True)) == dump_game(game)
+            assert dump_game(load_game(dump_game(game))) == dump_game(game)
+            winner, turns, _, _ = play_game(s, POLICY_NAMES, max_turns, dice="block")
+            assert turns == game.turns and (game.winner is None or game.players[winner] is game.winner)
+
+
+def check_scripted():
+    """ Injected rolls drive both the turn and the cards that roll """
+    game = MillionaireMonopoly(default_board(), ["A", "B"], dice=ScriptedDice([(3, 4), (1, 1)]))
+    game.roll_dice()
+    assert (game.d1, game.d2) == (3, 4)
+    game.move_player()
+    assert game.players[0].position.index == 7
+    fork = game.fork()
+    assert game.roll_pair() == fork.roll_pair() == (1, 1)
+
+
+def rate(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dice sources: reproducibility and speed")
+    parser.add_argument("--games", type=int, default=12)
+    parser.add_argument("--max-turns", type=int, default=600)
+    parser.add_argument("--rolls", type=int, default=500_000)
+    args = parser.parse_args()
+
+    check_reproducible(7, args.games, args.max_turns)
+    check_scripted()
+    print("scalar, batch and replay agree; scripted dice ok")
+
+    rng = random.Random(0)
+    block = BlockDice(0)
+    print(f"Random.randint pair: {rate(lambda: (rng.randint(1, 6), rng.randint(1, 6)), args.rolls):>12,.0f} rolls/s")
+    print(f"BlockDice.roll:      {rate(block.roll, args.rolls):>12,.0f} rolls/s")
+    for dice in ("rng", "block"):
+        start = time.perf_counter()
+        turns = sum(play_game(game_seed(1, i), POLICY_NAMES, args.max_turns, dice)[1] for i in range(args.games))
+        print(f"play_game dice={dice:<5}  {turns / (time.perf_counter() - start):>12,.0f} turns/s")
@@ -0,0 +1,50 @@
+import argparse
+import time
+
+from monopoly_engine import describe
+from simulator import POLICIES, game_seed, new_game
+
+POLICY_NAMES = ("greedy", "greedy", "cautious", "fixed")
+
+
+def play(seed: int, max_turns: int, render: bool) -> int:
+    """ simulator.play_game's loop; with `render` every result is turned into text, as the engine
+    used to do on every call. Returns the number of turns played """
+    game = new_game(seed, len(POLICY_NAMES))
+    policies = [POLICIES[name]() for name in POLICY_NAMES]
+    while not game.game_over and game.turns < max_turns:
+        action = game.pending_action
+        if action is not None:
+            events = game.handle_pending_choice(policies[game.players.index(action.player)].choose(game, action))
+        else:
+            seat = game.current_player_index
+            policies[seat].build(game, game.players[seat])
+            game.roll_dice()
+            events = game.move_player(upgrade_mover=policies[seat].upgrade_mover)
+        if render:
+            describe(events)
+    return game.turns
+
+
+def turn_time(games: int, max_turns: int, render: bool, repeat: int) -> float:
+    """ Best-of-`repeat` microseconds per turn """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        turns = sum(play(game_seed(0, i), max_turns, render) for i in range(games))
+        best = min(best, (time.perf_counter() - start) / turns * 1e6)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-turn cost of event records vs rendered messages")
+    parser.add_argument("--games", type=int, default=40)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    headless = turn_time(args.games, args.max_turns, False, args.repeat)
+    rendered = turn_time(args.games, args.max_turns, True, args.repeat)
+    print(f"headless (events only): {headless:6.2f} us/turn")
+    print(f"rendering every result: {rendered:6.2f} us/turn")
+    print(f"saved per turn:         {rendered - headless:6.2f} us ({1 - headless / rendered:.1%})")
@@ -0,0 +1,64 @@
+import argparse
+import random
+import time
+
+from analytics import ExpectedIncome, landing_distribution
+from monopoly_engine import MillionaireMonopoly, default_board
+from simulator import GreedyPolicy
+
+# Expected income per player read after every turn, as a server does for each state push:
+# the maintained figures (analytics.ExpectedIncome) against recomputing them over the whole
+# board every time, and what keeping them attached costs the engine per turn.
+
+
+def play(games: int, turns: int, reader):
+    """ Seconds spent in `reader(game)` after each turn, reads made, and total seconds """
+    reading, reads = 0.0, 0
+    start = time.perf_counter()
+    for seed in range(games):
+        game = MillionaireMonopoly(default_board(), [f"P{i}" for i in range(4)], rng=random.Random(seed))
+        policy = GreedyPolicy()
+        if reader is not None:
+            read = reader(game)
+        for _ in range(turns):
+            game.run_turns(1, policy)
+            if reader is not None:
+                began = time.perf_counter()
+                read()
+                reading += time.perf_counter() - began
+                reads += 1
+            if game.game_over:
+                break
+    return reading, reads, time.perf_counter() - start
+
+
+def full_recompute(game):
+    weights = [float(w) for w in landing_distribution(game.board).squares]
+
+    def read():
+        totals = [0.0] * len(game.players)
+        seat = {p: i for i, p in enumerate(game.players)}
+        for position in game.board.positions:
+            owner = game.owners[position.index]
+            if owner is not None:
+                other = game.players[seat[owner] - 1]
+                totals[seat[owner]] += weights[position.index] * game.calculate_rent(other, position)
+        return totals
+    return read
+
+
+def maintained(game):
+    return ExpectedIncome(game).totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintained expected income against full recomputation")
+    parser.add_argument("--games", type=int, default=40)
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+
+    _, _, bare = play(args.games, args.turns, None)
+    for label, reader in (("full recompute", full_recompute), ("maintained", maintained)):
+        reading, reads, total = play(args.games, args.turns, reader)
+        print(f"{label:>14}: {reading / reads * 1e6:.2f} us per read, games {total / bare - 1:+.1%} slower "
+              f"than without reading")
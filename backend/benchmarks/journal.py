@@ -0,0 +1,109 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from analytics import ExpectedIncome
+from journal import Journal, read_records, replay
+from monopoly_engine import MillionaireMonopoly, default_board
+from server import GameRegistry, create_app
+from simulator import POLICIES
+from snapshot import dump_game
+
+
+def play(game: MillionaireMonopoly, policies, max_turns: int):
+    game.run_turns(max_turns - game.turns, policies)
+
+
+def new_game(seed: int):
+    game = MillionaireMonopoly(default_board(), ["A", "B", "C", "D"], rng=random.Random(seed))
+    return game, [POLICIES[name]() for name in ("greedy", "greedy", "cautious", "fixed")]
+
+
+def best_of(repeat: int, fn):
+    """ Fastest of `repeat` runs of fn() in seconds, and what the last run returned """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def play_journaled(tmp: str, games: int, max_turns: int, fsync: str, snapshot_every: int, income: bool = False):
+    """ Play journaled games (with their expected income kept up to date, as the server does, when
+    `income`), returning the journal paths and final states """
+    paths, finals = [], []
+    for seed in range(games):
+        game, policies = new_game(seed)
+        if income:
+            ExpectedIncome(game)
+        path = os.path.join(tmp, f"{seed}.journal")
+        with Journal(path, game, fsync=fsync, snapshot_every=snapshot_every):
+            play(game, policies, max_turns)
+        paths.append(path)
+        finals.append(dump_game(game))
+    return paths, finals
+
+
+def check_server_run(journal_dir: str, turns: int = 30) -> int:
+    """ Play bot seats through POST /games/<id>/run on journaled games, recover them as a restarted
+    server would and check they come back identical. Returns the number of games checked """
+    registry = GameRegistry(journal_dir=journal_dir, fsync="never")
+    client = create_app(registry).test_client()
+    finals = {}
+    for seed, policies in enumerate((["random", "random"], ["random", "greedy", "cautious"],
+                                     ["fixed", "random", "random", "greedy"])):
+        game_id = client.post("/games", json={"players": [f"P{i}" for i in range(len(policies))],
+                                              "seed": seed}).get_json()["game_id"]
+        response = client.post(f"/games/{game_id}/run", json={"policies": policies, "turns": turns})
+        assert response.status_code == 200, response.get_json()
+        finals[game_id] = dump_game(registry.get(game_id).game)
+    registry.close()
+    recovered = GameRegistry(journal_dir=journal_dir, fsync="never")
+    assert recovered.recover() == len(finals)
+    for game_id, final in finals.items():
+        assert dump_game(recovered.get(game_id).game) == final, f"{game_id} recovered differently"
+    recovered.close()
+    return len(finals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Journal overhead, size and replay speed")
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--fsync", default="never")
+    parser.add_argument("--snapshot-every", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5, help="timings are the best of this many runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, _ = best_of(args.repeat, lambda: [play(*new_game(seed), args.max_turns) for seed in range(args.games)])
+        journaled, (paths, finals) = best_of(args.repeat, lambda: play_journaled(
+            tmp, args.games, args.max_turns, args.fsync, args.snapshot_every))
+        served_play, _ = best_of(args.repeat, lambda: play_journaled(
+            tmp, args.games, args.max_turns, args.fsync, args.snapshot_every, income=True))
+
+        records = sum(len(read_records(p)) for p in paths)
+        size = sum(os.path.getsize(p) + os.path.getsize(p + ".snap") for p in paths)
+
+        full_replay, replayed = best_of(args.repeat, lambda: [replay(path, from_start=True) for path in paths])
+        assert [dump_game(game) for game in replayed] == finals
+        tail_replay, replayed = best_of(args.repeat, lambda: [replay(path) for path in paths])
+        assert [dump_game(game) for game in replayed] == finals
+
+        served = os.path.join(tmp, "server")
+        os.makedirs(served)
+        checked = check_server_run(served)
+
+    print(f"{args.games} games, {records:,} records, {size / args.games / 1024:,.1f} KiB per game on disk "
+          f"(best of {args.repeat} runs)")
+    print(f"play:                {plain:7.3f}s")
+    print(f"play + journal:      {journaled:7.3f}s  ({journaled / plain - 1:+.1%}, fsync={args.fsync})")
+    print(f"play as served:      {served_play:7.3f}s  ({served_play / plain - 1:+.1%}, journal and expected income)")
+    # replay re-runs the rules as bare play does, minus the bots' decisions
+    print(f"replay from start:   {full_replay:7.3f}s  ({plain / full_replay:.2f}x the speed of play, "
+          f"{served_play / full_replay:.2f}x of play as served)")
+    print(f"replay last segment: {tail_replay:7.3f}s")
+    print(f"server /run games recovered identical: {checked}")
@@ -0,0 +1,86 @@
+import argparse
+import random
+import time
+
+from analytics import landing_distribution
+from benchmarks.suite import synthetic_board
+from liquidation import plan_liquidation
+from monopoly_engine import MillionaireMonopoly, default_board
+
+# The liquidation solver against the old raise_funds, which sold houses and then bare
+# properties in purchase order until the debt was covered. Fixtures are mid-game holdings:
+# a few random properties plus full sets with houses, owing a random part of what they would
+# fetch. Income is expected rent per opponent turn, weighting squares by the landing distribution.
+
+
+def fixture(board, seed: int):
+    """ A game whose first player holds random properties and full sets, with no cash, and the
+    amount they owe """
+    rng = random.Random(seed)
+    game = MillionaireMonopoly(board, ["A", "B"], rng=random.Random(seed))
+    player = game.players[0]
+    player.money = 0
+    colors = list(board.color_groups)
+    for color in rng.sample(colors, rng.randint(1, min(3, len(colors)))):
+        for position in board.color_groups[color]:
+            game._add_property(player, position)
+            game._set_houses(position, rng.randint(0, 5))
+    for position in rng.sample([p for p in board.positions if p.cost], 4):
+        if game.owners[position.index] is None:
+            game._add_property(player, position)
+    return game, rng.randint(1, player.sale_value)
+
+
+def income(game, player, weights) -> float:
+    return sum(weights[p.index] * game.calculate_rent(game.players[1], p) for p in player.properties)
+
+
+def sell_in_order(game, player, amount):
+    """ The old raise_funds """
+    for prop in list(player.properties):
+        while game.houses[prop.index] > 0 and player.money < amount:
+            game._set_houses(prop, game.houses[prop.index] - 1)
+            player.money += game.HOUSE_COST.get(prop.color, 0) // 2
+    for prop in list(player.properties):
+        if player.money >= amount:
+            break
+        if game.houses[prop.index] == 0:
+            game._remove_property(player, prop)
+            player.money += prop.cost // 2
+
+
+def compare(board, fixtures: int):
+    weights = [float(w) for w in landing_distribution(board).squares]
+    kept_old = kept_new = overshoot_old = overshoot_new = 0.0
+    planning = 0.0
+    for seed in range(fixtures):
+        game, amount = fixture(board, seed)
+        before = income(game, game.players[0], weights)
+
+        old = game.fork()
+        sell_in_order(old, old.players[0], amount)
+        kept_old += income(old, old.players[0], weights) / before
+        overshoot_old += old.players[0].money - amount
+
+        new = game.fork()
+        start = time.perf_counter()
+        plan = plan_liquidation(new, new.players[0], amount, weights)
+        planning += time.perf_counter() - start
+        new.raise_funds(new.players[0], amount, weights)
+        assert new.players[0].money == plan.cash >= amount
+        kept_new += income(new, new.players[0], weights) / before
+        overshoot_new += new.players[0].money - amount
+
+    print(f"  rent income kept:  in order {kept_old / fixtures:6.1%}   solver {kept_new / fixtures:6.1%}")
+    print(f"  mean overshoot:    in order ${overshoot_old / fixtures:>9,.0f}   solver ${overshoot_new / fixtures:>9,.0f}")
+    print(f"  solver: {planning / fixtures * 1e6:,.0f} us per plan")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Liquidation solver against selling in purchase order")
+    parser.add_argument("--fixtures", type=int, default=500)
+    args = parser.parse_args()
+
+    for name, board in (("default board", default_board()), ("512 squares", synthetic_board(512))):
+        print(name)
+        compare(board, args.fixtures)
@@ -0,0 +1,126 @@
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# Load generator for server.py. Each client thread creates its own game and plays it through
+# the HTTP API as fast as it can (roll, move, then answer any pending action), timing every
+# request. Reports p50/p99 latency and request rate per endpoint.
+
+
+class Client:
+    """ One keep-alive connection to the server """
+    def __init__(self, host: str, port: int):
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+
+    def call(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else None
+        start = time.perf_counter()
+        self.conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+        response = self.conn.getresponse()
+        data = response.read()
+        elapsed = time.perf_counter() - start
+        return response.status, json.loads(data) if data else None, elapsed
+
+
+def play(host, port, seed, duration, timings, lock):
+    client = Client(host, port)
+    local = defaultdict(list)
+    status, body, _ = client.call("POST", "/games", {"players": ["A", "B", "C", "D"], "seed": seed})
+    if status != 201:
+        raise RuntimeError(f"could not create a game: {status} {body}")
+    base = f"/games/{body['game_id']}"
+
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        status, _, elapsed = client.call("POST", base + "/roll")
+        local["roll"].append(elapsed)
+        if status == 409:
+            # game over, start another one
+            client.call("DELETE", base)
+            seed += 1_000_003
+            status, body, _ = client.call("POST", "/games", {"players": ["A", "B", "C", "D"], "seed": seed})
+            base = f"/games/{body['game_id']}"
+            continue
+        _, body, elapsed = client.call("POST", base + "/move", {"upgrade_mover": True})
+        local["move"].append(elapsed)
+        pending = body and body.get("pending_action")
+        while pending:
+            _, body, elapsed = client.call("POST", base + "/choice", {"choice": pending["choices"][0]})
+            local["choice"].append(elapsed)
+            pending = body and body.get("pending_action")
+
+    client.call("DELETE", base)
+    with lock:
+        for name, samples in local.items():
+            timings[name].extend(samples)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(host, port, clients, duration):
+    timings = defaultdict(list)
+    lock = threading.Lock()
+    threads = [threading.Thread(target=play, args=(host, port, i, duration, timings, lock)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in timings.values())
+    print(f"{clients} clients, {elapsed:.1f}s, {total / elapsed:,.0f} requests/s")
+    for name in ("roll", "move", "choice"):
+        samples = timings.get(name)
+        if not samples:
+            continue
+        print(f"  {name:<7} {len(samples) / elapsed:>8,.0f} /s  p50 {percentile(samples, 0.5) * 1000:6.2f} ms"
+              f"  p99 {percentile(samples, 0.99) * 1000:6.2f} ms")
+
+
+def wait_for(host, port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on {host}:{port} did not come up")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--spawn", type=int, default=0, metavar="SHARDS",
+                        help="start a local server with this many shards first (0 = use a running server)")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+        server = subprocess.Popen([sys.executable, script, "--host", args.host, "--port", str(args.port),
+                                   "--shards", str(args.spawn)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_for(args.host, args.port)
+    try:
+        run(args.host, args.port, args.clients, args.duration)
+    finally:
+        if server is not None:
+            # SIGINT lets a sharded server shut its workers down
+            server.send_signal(signal.SIGINT)
+            server.wait()
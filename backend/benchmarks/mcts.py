@@ -0,0 +1,97 @@
+import argparse
+import random
+import time
+
+from mcts import MCTSPolicy
+from monopoly_engine import MillionaireMonopoly, default_board
+from simulator import GreedyPolicy, net_worth
+from undo import UndoLog
+
+# The look-ahead bot: what undoing saves over forking a copy per line of play, how many lines a
+# search gets through with root-parallel workers, and how one MCTS seat does against three
+# greedy bots (seat rotated across games; a game still running at the turn limit goes to the
+# richest player).
+
+
+def mid_game(seed: int) -> MillionaireMonopoly:
+    game = MillionaireMonopoly(default_board(), [f"P{i}" for i in range(4)], rng=random.Random(seed))
+    game.run_turns(60, GreedyPolicy())
+    return game
+
+
+def restore_cost(games: int, lines: int, horizon: int):
+    """ Microseconds per line of play spent getting back to the start: fork() for every line,
+    against mark() and undo() on one copy """
+    policies = [GreedyPolicy()] * 4
+    forking = undoing = 0.0
+    for seed in range(games):
+        game = mid_game(seed)
+        clock = time.perf_counter
+        for i in range(lines):
+            start = clock()
+            copy = game.fork(rng=random.Random(i))
+            forking += clock() - start
+            copy.dice = None
+            copy.run_turns(horizon, policies)
+
+        copy = game.fork(rng=random.Random(0))
+        copy.dice = None
+        log = UndoLog(copy)
+        for i in range(lines):
+            start = clock()
+            mark = log.mark()
+            undoing += clock() - start
+            copy.run_turns(horizon, policies)
+            start = clock()
+            log.undo(mark)
+            undoing += clock() - start
+    n = games * lines
+    return forking / n * 1e6, undoing / n * 1e6
+
+
+def lines_per_search(workers: int, budget: float, searches: int) -> float:
+    policy = MCTSPolicy(budget=budget, workers=workers, seed=0)
+    try:
+        for seed in range(searches):
+            game = mid_game(seed)
+            policy.search(game, game.current_player_index)
+    finally:
+        policy.close()
+    return policy.iterations / searches
+
+
+def strength(games: int, budget: float, workers: int, max_turns: int):
+    """ Mean share of the surviving net worth and wins of the MCTS seat """
+    share = wins = decisions = 0
+    for i in range(games):
+        game = MillionaireMonopoly(default_board(), [f"P{i}" for i in range(4)], rng=random.Random(1000 + i))
+        seat = i % 4
+        policies = [GreedyPolicy() for _ in range(4)]
+        bot = policies[seat] = MCTSPolicy(budget=budget, workers=workers, seed=i)
+        try:
+            game.run_turns(max_turns, policies)
+        finally:
+            bot.close()
+        worth = [0 if p.is_bankrupt else net_worth(game, p) for p in game.players]
+        share += worth[seat] / sum(worth)
+        wins += worth[seat] == max(worth)
+        decisions += bot.searches
+    return share / games, wins / games, decisions / games
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCTS bot: undo log, root-parallel search and strength")
+    parser.add_argument("--games", type=int, default=40)
+    parser.add_argument("--budget", type=float, default=0.05, help="seconds per decision")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-turns", type=int, default=300)
+    parser.add_argument("--horizon", type=int, default=40)
+    args = parser.parse_args()
+
+    forking, undoing = restore_cost(10, 50, args.horizon)
+    print(f"back to the root per line of play: fork {forking:.1f} us, mark + undo {undoing:.1f} us")
+    for workers in sorted({1, args.workers}):
+        print(f"{workers} worker(s): {lines_per_search(workers, args.budget, 10):,.0f} lines per {args.budget}s search")
+    share, wins, decisions = strength(args.games, args.budget, 1, args.max_turns)
+    print(f"MCTS seat against 3 greedy bots over {args.games} games: net worth share {share:.3f}, "
+          f"wins {wins:.1%} (even: 0.250 / 25%), {decisions:.0f} searches per game")
@@ -0,0 +1,52 @@
+import argparse
+import gc
+import random
+import tracemalloc
+
+from monopoly_engine import MillionaireMonopoly, default_board
+
+
+def new_game(players: int, seed: int) -> MillionaireMonopoly:
+    return MillionaireMonopoly(default_board(), [f"P{i}" for i in range(players)], rng=random.Random(seed))
+
+
+def play(game: MillionaireMonopoly, turns: int):
+    """ Advance a game by buying everything it lands on, so ownership state is populated """
+    for _ in range(turns):
+        if game.game_over:
+            break
+        if game.pending_action:
+            game.handle_pending_choice(game.pending_action.choices[0])
+            continue
+        game.roll_dice()
+        game.move_player()
+
+
+def bytes_per_game(num_games: int = 1000, players: int = 4, turns: int = 0) -> float:
+    """ Traced heap bytes per live game, averaged over `num_games` games kept alive together.
+    The shared board and rent table are built before measuring since every game reuses them """
+    new_game(players, -1)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = []
+    for i in range(num_games):
+        game = new_game(players, i)
+        play(game, turns)
+        games.append(game)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del games
+    return (after - before) / num_games
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report heap bytes per live MillionaireMonopoly game")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=4)
+    args = parser.parse_args()
+
+    for turns in (0, 100):
+        print(f"{args.players} players, {turns:>3} turns played: "
+              f"{bytes_per_game(args.games, args.players, turns):,.0f} bytes/game")
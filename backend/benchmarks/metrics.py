@@ -0,0 +1,42 @@
+import argparse
+import json
+import time
+
+from metrics import GameMetrics
+from simulator import POLICIES, game_seed, new_game
+
+POLICY_NAMES = ("greedy", "greedy", "cautious", "fixed")
+
+
+def turn_time(games: int, max_turns: int, instrument: bool, repeat: int):
+    """ Best-of-`repeat` microseconds per turn, and the metrics of the last game played """
+    best, metrics = float("inf"), None
+    for _ in range(repeat):
+        seconds = turns = 0
+        for i in range(games):
+            game = new_game(game_seed(0, i), len(POLICY_NAMES))
+            if instrument:
+                GameMetrics(game)
+            policies = [POLICIES[name]() for name in POLICY_NAMES]
+            start = time.perf_counter()
+            turns += game.run_turns(max_turns, policies).turns
+            seconds += time.perf_counter() - start
+            metrics = game.get_metrics()
+        best = min(best, seconds / turns * 1e6)
+    return best, metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-turn cost of game instrumentation")
+    parser.add_argument("--games", type=int, default=40)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--show", action="store_true", help="print the metrics of one game")
+    args = parser.parse_args()
+
+    off, _ = turn_time(args.games, args.max_turns, False, args.repeat)
+    on, metrics = turn_time(args.games, args.max_turns, True, args.repeat)
+    print(f"metrics off: {off:6.2f} us/turn")
+    print(f"metrics on:  {on:6.2f} us/turn ({on / off - 1:+.1%})")
+    if args.show:
+        print(json.dumps(metrics, indent=1))
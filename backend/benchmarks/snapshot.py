@@ -0,0 +1,61 @@
+import argparse
+import random
+import time
+
+from benchmarks.memory import play
+from monopoly_engine import MillionaireMonopoly, default_board
+from snapshot import dump_game, load_game
+
+
+def sample_games(count: int, players: int = 4):
+    """ Games at assorted points of play, some of them waiting on a pending action """
+    games = []
+    for i in range(count):
+        game = MillionaireMonopoly(default_board(), [f"P{j}" for j in range(players)], rng=random.Random(i))
+        play(game, turns=i % 150)
+        games.append(game)
+    return games
+
+
+def check_round_trip(games):
+    """ Restored games must serialise identically, report the same state and play on identically """
+    for game in games:
+        blob = dump_game(game)
+        restored = load_game(blob)
+        assert dump_game(restored) == blob
+        # restored games restart change tracking, so only the version differs
+        assert dict(restored.get_game_state(), version=None) == dict(game.get_game_state(), version=None)
+        fork = game.fork()
+        assert dump_game(fork) == blob
+        play(restored, 20)
+        play(fork, 20)
+        assert dump_game(restored) == dump_game(fork)
+
+
+def rate(fn, items, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(item)
+    return repeat * len(items) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot round-trip check and throughput")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    games = sample_games(args.games)
+    check_round_trip(games)
+    print(f"round trip ok for {len(games)} games")
+
+    blobs = [dump_game(g) for g in games]
+    small = [dump_game(g, include_rng=False) for g in games]
+    print(f"snapshot size: {sum(map(len, blobs)) / len(blobs):,.0f} bytes "
+          f"({sum(map(len, small)) / len(small):,.0f} without RNG state)")
+    print(f"dump:        {rate(dump_game, games, args.repeat):>10,.0f} /s")
+    print(f"dump no rng: {rate(lambda g: dump_game(g, include_rng=False), games, args.repeat):>10,.0f} /s")
+    print(f"load:        {rate(load_game, blobs, args.repeat):>10,.0f} /s")
+    print(f"fork:        {rate(MillionaireMonopoly.fork, games, args.repeat):>10,.0f} /s")
+    print(f"fork new rng:{rate(lambda g: g.fork(random.Random(0)), games, args.repeat):>10,.0f} /s")
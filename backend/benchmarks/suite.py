@@ -0,0 +1,292 @@
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+
+from benchmarks.memory import bytes_per_game
+from monopoly_engine import DEFAULT_BOARD, MillionaireMonopoly, MonopolyBoard, SquareKind, default_board
+from simulator import POLICIES
+
+# Engine benchmark suite. `run` times the hot engine calls one by one (micro), whole bot games
+# on the default and on larger synthetic boards (macro) and heap bytes per live game (memory),
+# and writes the results as JSON. `compare` checks a run against a stored baseline and exits
+# non-zero when anything got slower or bigger by more than the threshold:
+#
+#   python -m benchmarks.suite run --out baseline.json    # on the commit before a change
+#   python -m benchmarks.suite compare baseline.json      # after it, on the same machine
+#
+# Every result is "lower is better". Timings are the best of several repeats, so they measure
+# the engine rather than whatever else the machine was doing; compare runs from the same machine.
+
+MACRO_POLICIES = ("greedy", "cautious", "fixed", "greedy")
+RICH = 10 ** 15 # enough money that nobody in a micro fixture ever runs out
+
+
+def synthetic_board(squares: int) -> MonopolyBoard:
+    """ DEFAULT_BOARD repeated until the board has `squares` squares. Only the first copy keeps
+    Go, Jail and Go to Jail (later ones become Free Parking), and properties keep their color,
+    so color groups grow with the board """
+    board = MonopolyBoard()
+    for i in range(squares):
+        copy, data = divmod(i, len(DEFAULT_BOARD))
+        data = DEFAULT_BOARD[data]
+        if copy:
+            if data["Name"] in ("Go", "Jail", "Go to Jail"):
+                data = {"Name": "Free Parking"}
+            elif "Color" in data:
+                data = dict(data, Name=f"{data['Name']} {copy + 1}")
+        board.append(data)
+    return board.freeze()
+
+
+def owned_game(seed: int = 0) -> MillionaireMonopoly:
+    """ Two rich players, the second owning every property with a few houses on each, so moves
+    never stop for a decision: the first pays rent, the second lands on its own squares """
+    game = MillionaireMonopoly(default_board(), ["A", "B"], rng=random.Random(seed))
+    rng = random.Random(seed)
+    owner = game.players[1]
+    for player in game.players:
+        player.money = RICH
+    for position in game.board.positions:
+        if position.cost:
+            game.buy_property(owner, position)
+            game.buy_house(owner, position, 0, rng.randint(0, 5))
+    return game
+
+
+def best_of(repeat: int, run) -> float:
+    """ Lowest of `repeat` calls to run(), which returns (seconds, operations), in ns per operation.
+    The garbage collector is off while timing, as in timeit """
+    best = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            seconds, ops = run()
+            best = min(best, seconds / ops * 1e9)
+    finally:
+        gc.enable()
+    return best
+
+
+def micro_move_player(repeat: int, n: int = 20_000) -> float:
+    game = owned_game()
+    steps = [random.Random(i).randint(2, 12) for i in range(n)]
+    move = game.move_player
+
+    def run():
+        start = time.perf_counter()
+        for s in steps:
+            move(s)
+        return time.perf_counter() - start, n
+    return best_of(repeat, run)
+
+
+def micro_calculate_rent(repeat: int, n: int = 50_000) -> float:
+    game = owned_game()
+    tenant = game.players[0]
+    properties = [p for p in game.board.positions if p.cost]
+    # half the groups without houses, so doubled rent is taken too
+    for position in properties[:len(properties) // 2]:
+        game._set_houses(position, 0)
+    squares = (properties * (n // len(properties) + 1))[:n]
+    rent = game.calculate_rent
+
+    def run():
+        start = time.perf_counter()
+        for position in squares:
+            rent(tenant, position)
+        return time.perf_counter() - start, n
+    return best_of(repeat, run)
+
+
+def micro_owns_set(repeat: int, n: int = 50_000) -> float:
+    game = owned_game()
+    players = game.players
+    colors = list(game.board.color_groups)
+    checks = [(players[i % 2], colors[i % len(colors)]) for i in range(n)]
+    owns_set = game.owns_set
+
+    def run():
+        start = time.perf_counter()
+        for player, color in checks:
+            owns_set(player, color)
+        return time.perf_counter() - start, n
+    return best_of(repeat, run)
+
+
+def micro_get_game_state(repeat: int, n: int = 10_000) -> float:
+    """ Uncached: every call follows a change to the turn and to every player """
+    game = owned_game()
+    touch, state, players = game._touch, game.get_game_state, game.players
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(n):
+            touch(*players, meta=True)
+            state()
+        return time.perf_counter() - start, n
+    return best_of(repeat, run)
+
+
+def micro_buy_property(repeat: int) -> float:
+    """ Buying every property of a fresh game; forking the fixture is not timed """
+    fixture = MillionaireMonopoly(default_board(), ["A", "B"], rng=random.Random(0))
+    fixture.players[0].money = RICH
+    properties = [p for p in fixture.board.positions if p.cost]
+
+    def run():
+        seconds = 0.0
+        for _ in range(200):
+            game = fixture.fork()
+            buy, player = game.buy_property, game.players[0]
+            start = time.perf_counter()
+            for position in properties:
+                buy(player, position)
+            seconds += time.perf_counter() - start
+        return seconds, 200 * len(properties)
+    return best_of(repeat, run)
+
+
+def micro_transfer_property(repeat: int, n: int = 20_000) -> float:
+    game = owned_game()
+    a, b = game.players
+    properties = [p for p in game.board.positions if p.cost]
+    transfer = game.transfer_property
+
+    def run():
+        start = time.perf_counter()
+        for i in range(n // len(properties)):
+            for position in properties:
+                transfer(b, a, position)
+            for position in properties:
+                transfer(a, b, position)
+        return time.perf_counter() - start, n // len(properties) * len(properties) * 2
+    return best_of(repeat, run)
+
+
+def micro_draw_card(repeat: int, n: int = 20_000) -> float:
+    game = owned_game()
+    player = game.players[0]
+    square = next(p for p in game.board.positions if p.kind == SquareKind.MILLIONAIRE)
+    draw = game.draw_card
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(n):
+            draw(player, square)
+            player.in_jail = False # some cards send the player to jail
+        return time.perf_counter() - start, n
+    return best_of(repeat, run)
+
+
+MICRO = {
+    "move_player": micro_move_player,
+    "calculate_rent": micro_calculate_rent,
+    "owns_set": micro_owns_set,
+    "get_game_state": micro_get_game_state,
+    "buy_property": micro_buy_property,
+    "transfer_property": micro_transfer_property,
+    "draw_card": micro_draw_card,
+}
+
+
+def macro_game(board: MonopolyBoard, players: int, games: int, max_turns: int, repeat: int) -> float:
+    """ Microseconds per turn of bot games played through run_turns """
+    def run():
+        seconds = turns = 0
+        for seed in range(games):
+            game = MillionaireMonopoly(board, [f"P{i}" for i in range(players)], rng=random.Random(seed))
+            policies = [POLICIES[MACRO_POLICIES[i % len(MACRO_POLICIES)]]() for i in range(players)]
+            start = time.perf_counter()
+            turns += game.run_turns(max_turns, policies).turns
+            seconds += time.perf_counter() - start
+        return seconds, turns
+    return best_of(repeat, run) / 1000
+
+
+def run_suite(repeat: int = 5, games: int = 20, max_turns: int = 500) -> dict:
+    results = {}
+
+    def report(name, value, unit):
+        results[name] = {"value": value, "unit": unit}
+        print(f"  {name:<32} {value:>12,.1f} {unit}", flush=True)
+
+    print("micro")
+    for name, bench in MICRO.items():
+        report(f"micro.{name}", bench(repeat), "ns/op")
+    print("macro")
+    boards = {"default": default_board(), "squares128": synthetic_board(128), "squares512": synthetic_board(512)}
+    for board_name, board in boards.items():
+        for players in (2, 4, 8):
+            report(f"macro.{board_name}.players{players}",
+                   macro_game(board, players, games, max_turns, repeat), "us/turn")
+    print("memory")
+    for turns in (0, 100):
+        report(f"memory.players4.turns{turns}", bytes_per_game(500, 4, turns), "bytes/game")
+    return {
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """ Print every benchmark in both runs with its change; returns the names that got worse
+    by more than `threshold` (0.1 = 10%) """
+    regressions = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None:
+            print(f"  {name:<32} missing from this run")
+            continue
+        change = now["value"] / base["value"] - 1 if base["value"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"  {name:<32} {base['value']:>12,.1f} -> {now['value']:>12,.1f} {now['unit']:<10} {change:+7.1%}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Engine benchmark suite with stored baselines")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and write the results as JSON")
+    run_parser.add_argument("--out", default="benchmarks/baseline.json")
+    compare_parser = commands.add_parser("compare", help="compare a run against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results", nargs="?", help="results of an earlier run (default: run the suite now)")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative slowdown that counts as a regression (default 0.10)")
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--repeat", type=int, default=5)
+        sub.add_argument("--games", type=int, default=20, help="games per macrobenchmark")
+        sub.add_argument("--max-turns", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        data = run_suite(args.repeat, args.games, args.max_turns)
+        with open(args.out, "w") as f:
+            json.dump(data, f, indent=2)
+        print(f"wrote {args.out}")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if args.results:
+            with open(args.results) as f:
+                current = json.load(f)
+        else:
+            current = run_suite(args.repeat, args.games, args.max_turns)
+        print(f"against {args.baseline} ({baseline['created']}, Python {baseline['python']})")
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"no regressions over {args.threshold:.0%}")
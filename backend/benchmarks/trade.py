@@ -0,0 +1,103 @@
+import argparse
+import random
+import time
+
+import trade
+from monopoly_engine import MillionaireMonopoly, default_board
+from simulator import GreedyPolicy
+from trade import Trade, candidate_swaps, evaluate_trade, suggest_trades, tradable, valuator_for
+
+# Trade suggestions on mid-game positions (4 greedy bots after 30, 60 and 90 turns): latency
+# of a suggest_trades call for every player, without and with the valuation memo, how
+# far pruning cuts the swaps to evaluate, and what scoring one proposal by simulation (greedy
+# rollouts from a fork with the trade applied) would cost instead.
+
+
+def positions(seeds: int):
+    for seed in range(seeds):
+        for turns in (30, 60, 90):
+            game = MillionaireMonopoly(default_board(), [f"P{i}" for i in range(4)], rng=random.Random(seed))
+            game.run_turns(turns, GreedyPolicy())
+            if not game.game_over and game.pending_action is None:
+                yield game
+
+
+def latency(games, budget: float):
+    """ Milliseconds per suggest_trades call, sorted, and the suggestions made """
+    times, suggested = [], 0
+    for game in games:
+        for player in game.players:
+            if player.is_bankrupt:
+                continue
+            start = time.perf_counter()
+            suggested += len(suggest_trades(game, player, budget=budget))
+            times.append((time.perf_counter() - start) * 1e3)
+    return sorted(times), suggested
+
+
+def pruning(games):
+    """ Swaps of at most one property each way, all and after pruning """
+    every = kept = 0
+    for game in games:
+        for proposer in game.players:
+            for partner in game.players:
+                if partner is proposer:
+                    continue
+                mine, theirs = len(tradable(game, proposer)), len(tradable(game, partner))
+                every += (mine + 1) * (theirs + 1) - 1
+                kept += sum(1 for _ in candidate_swaps(game, proposer, partner))
+    return every, kept
+
+
+def by_simulation(game, proposal: Trade, rollouts: int, turns: int) -> float:
+    """ Mean net worth change of the proposer over greedy rollouts, with and without the trade """
+    seat = game.players.index(proposal.proposer)
+    total = 0.0
+    for i in range(rollouts):
+        for sign, apply in ((1, True), (-1, False)):
+            copy = game.fork(rng=random.Random(i))
+            copy.dice = None
+            if apply:
+                trade.execute_trade(copy, Trade(copy.players[seat], copy.players[game.players.index(proposal.partner)],
+                                                proposal.give and copy.board.positions[proposal.give.index],
+                                                proposal.take and copy.board.positions[proposal.take.index],
+                                                proposal.cash))
+            copy.run_turns(turns, GreedyPolicy())
+            me = copy.players[seat]
+            total += sign * (0 if me.is_bankrupt else me.money + me.sale_value)
+    return total / rollouts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trade valuation and suggestions")
+    parser.add_argument("--seeds", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=0.005, help="seconds per suggest_trades call")
+    parser.add_argument("--rollouts", type=int, default=16, help="per proposal for the simulation baseline")
+    args = parser.parse_args()
+
+    games = list(positions(args.seeds))
+    trade._VALUATORS.clear()
+    valuator = valuator_for(games[0])
+    valuator.group_value = lambda *key: valuator._group_value(*key[:4])
+    unmemoised, _ = latency(games, args.budget)
+    del valuator.group_value
+    memoised, suggested = latency(games, args.budget)
+    for label, times in (("no memo", unmemoised), ("memo", memoised)):
+        print(f"suggest_trades, {label}: median {times[len(times) // 2]:.2f} ms, "
+              f"p99 {times[int(len(times) * 0.99)]:.2f} ms, "
+              f"max {times[-1]:.2f} ms over {len(times)} calls (budget {args.budget * 1e3:.0f} ms)")
+    print(f"  {suggested} suggestions; memo {valuator.hits:,} hits, {valuator.misses:,} misses, "
+          f"{len(valuator.memo):,} group values")
+    every, kept = pruning(games)
+    print(f"pruning: {kept:,} of {every:,} swaps evaluated ({kept / every:.1%})")
+
+    proposals = [(game, t) for game in games for t in suggest_trades(game, game.players[0], budget=1.0, limit=1)]
+    start = time.perf_counter()
+    for game, proposal in proposals:
+        evaluate_trade(game, Trade(proposal.proposer, proposal.partner, proposal.give, proposal.take, proposal.cash))
+    valued = (time.perf_counter() - start) / len(proposals)
+    start = time.perf_counter()
+    by_simulation(*proposals[0], args.rollouts, 60)
+    simulated = time.perf_counter() - start
+    print(f"one proposal: {valued * 1e6:.0f} us by valuation, {simulated * 1e3:.0f} ms by simulation "
+          f"({args.rollouts} rollout pairs of 60 turns)")
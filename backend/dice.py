@@ -0,0 +1,61 @@
+from typing import Iterable, Tuple
+
+import numpy as np
+
+# Dice sources for MillionaireMonopoly(dice=...). A game without one rolls game.rng; a source
+# only needs roll() -> (d1, d2) and copy() -> an independent source at the same point, which
+# fork() uses. Snapshots know how to store the two sources below.
+
+
+class BlockDice:
+    """ Rolls pre-generated in blocks with NumPy's PCG64. Block k of a stream is generated from
+    the seed (seed, k), so (seed, block, offset) is the whole state and no generator is kept """
+    __slots__ = ('seed', 'block_size', 'block', 'offset', '_rolls')
+
+    def __init__(self, seed: int, block_size: int = 1024, block: int = 0, offset: int = 0):
+        self.seed = seed
+        self.block_size = block_size
+        self._fill(block)
+        self.offset = offset
+
+    def _fill(self, block: int):
+        generator = np.random.Generator(np.random.PCG64([self.seed, block]))
+        # d1, d2 interleaved as bytes: 2 bytes per roll, indexing gives ints
+        self._rolls = generator.integers(1, 7, size=2 * self.block_size, dtype=np.uint8).tobytes()
+        self.block = block
+        self.offset = 0
+
+    def roll(self) -> Tuple[int, int]:
+        i = self.offset
+        if i == self.block_size:
+            self._fill(self.block + 1)
+            i = 0
+        self.offset = i + 1
+        rolls = self._rolls
+        return rolls[2 * i], rolls[2 * i + 1]
+
+    def copy(self) -> 'BlockDice':
+        dice = BlockDice.__new__(BlockDice)
+        dice.seed, dice.block_size, dice.block, dice.offset = self.seed, self.block_size, self.block, self.offset
+        dice._rolls = self._rolls # immutable, safe to share
+        return dice
+
+
+class ScriptedDice:
+    """ Hands out a fixed list of rolls, for tests and reproducing reported games """
+    __slots__ = ('rolls', 'offset')
+
+    def __init__(self, rolls: Iterable[Tuple[int, int]], offset: int = 0):
+        self.rolls = [(int(d1), int(d2)) for d1, d2 in rolls]
+        self.offset = offset
+
+    def roll(self) -> Tuple[int, int]:
+        if self.offset >= len(self.rolls):
+            raise IndexError(f"scripted dice ran out after {len(self.rolls)} rolls")
+        self.offset += 1
+        return self.rolls[self.offset - 1]
+
+    def copy(self) -> 'ScriptedDice':
+        dice = ScriptedDice.__new__(ScriptedDice)
+        dice.rolls, dice.offset = self.rolls, self.offset
+        return dice
@@ -0,0 +1,195 @@
+import os
+import struct
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+from monopoly_engine import JournalOp, MillionaireMonopoly, MonopolyBoard
+from snapshot import dump_game, load_game
+
+# Append-only journal of everything that happens in one game.
+#
+# <path> holds 16-byte records (op, seat, a, b, c), see JournalOp for what each field means per
+# op; <path>.snap holds length-prefixed dump_game snapshots. Records are buffered and written
+# in batches; the fsync policy decides how much a crash may lose:
+#   "always"  every record is written and fsynced as it happens
+#   "batch"   each batch is fsynced when written (batch_size records or flush_interval seconds)
+#   "never"   batches are handed to the OS, which writes them when it likes
+# A SNAPSHOT record is written at the start and every snapshot_every records, between engine
+# calls, so replay only has to re-run the calls after the last one.
+#
+# Replay re-runs the recorded commands on the snapshot (the game's RNG and dice source are part
+# of it, so dice and card rolls come out the same) and checks every record the engine emits
+# against the journal. Engine calls return event records and never build messages, so replay
+# pays only for the rules. Replay stays exact as long as nothing but the engine draws from game.rng.
+
+RECORD = struct.Struct("<BBHiq")
+SNAP_LEN = struct.Struct("<I")
+FSYNC_POLICIES = ("always", "batch", "never")
+
+Record = Tuple[int, int, int, int, int]
+
+_SNAPSHOT = int(JournalOp.SNAPSHOT) # plain int: compared against every record on replay
+
+
+class ReplayError(Exception):
+    """ The journal does not match what the engine does when it is replayed """
+
+
+class Journal:
+    """ Records every engine call of `game` to `path`. With append=True an existing journal is
+    continued (typically after replay) instead of replaced """
+    def __init__(self, path: str, game: MillionaireMonopoly, fsync: str = "batch", batch_size: int = 256,
+                 flush_interval: float = 1.0, snapshot_every: int = 2000, append: bool = False):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.path = path
+        self.fsync = fsync
+        self.batch_size = 1 if fsync == "always" else batch_size
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        if append and os.path.exists(path):
+            # drop a record torn by a crash so new records stay aligned
+            size = os.path.getsize(path)
+            if size % RECORD.size:
+                os.truncate(path, size - size % RECORD.size)
+        mode = "ab" if append else "wb"
+        self._file = open(path, mode)
+        self._snap_file = open(path + ".snap", mode)
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._since_snapshot = 0
+        self._last_flush = time.monotonic()
+        self.game = game
+        game.journal = self
+        self.snapshot()
+
+    def record(self, op: int, seat: int, a: int, b: int, c: int):
+        self._buffer += RECORD.pack(op, seat, a, b, c)
+        self._buffered += 1
+        self._since_snapshot += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def checkpoint(self, game: MillionaireMonopoly):
+        """ Called by the engine between calls, when the game is in a state that can be snapshotted """
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+        elif self._buffered and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        blob = dump_game(self.game)
+        offset = self._snap_file.tell()
+        self._snap_file.write(SNAP_LEN.pack(len(blob)) + blob)
+        self._snap_file.flush()
+        if self.fsync != "never":
+            os.fsync(self._snap_file.fileno())
+        # the snapshot is on disk before any record points at it
+        self.record(JournalOp.SNAPSHOT, 0, 0, 0, offset)
+        self._since_snapshot = 0
+        self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+            self._file.flush()
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """ Flush and detach from the game """
+        self.flush()
+        self._file.close()
+        self._snap_file.close()
+        if self.game.journal is self:
+            self.game.journal = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_records(path: str) -> List[Record]:
+    """ All complete records in a journal; a record torn by a crash is ignored """
+    with open(path, "rb") as f:
+        data = f.read()
+    return list(RECORD.iter_unpack(memoryview(data)[:len(data) - len(data) % RECORD.size]))
+
+
+def read_snapshot(path: str, offset: int, board: Optional[MonopolyBoard] = None) -> MillionaireMonopoly:
+    with open(path + ".snap", "rb") as f:
+        f.seek(offset)
+        (size,) = SNAP_LEN.unpack(f.read(SNAP_LEN.size))
+        return load_game(f.read(size), board)
+
+
+class _Expected:
+    """ Stands in for the journal during replay and collects the records the engine emits """
+    __slots__ = ('records',)
+
+    def __init__(self):
+        self.records = deque()
+
+    def record(self, op, seat, a, b, c):
+        self.records.append((op, seat, a, b, c))
+
+    def checkpoint(self, game):
+        pass
+
+
+def _choose(game, player, a, b, c):
+    if game.pending_action is None:
+        raise ReplayError("choice recorded but nothing is pending")
+    game.handle_pending_choice(game.pending_action.choices[a])
+
+
+# op -> how to re-run it; DRAW and SNAPSHOT are never commands, only side records
+_COMMANDS = {
+    JournalOp.ROLL: lambda game, player, a, b, c: game.roll_dice(),
+    JournalOp.MOVE: lambda game, player, a, b, c: game.move_player(b, bool(a)),
+    JournalOp.CHOICE: _choose,
+    JournalOp.PURCHASE: lambda game, player, a, b, c: game.buy_property(player, game.board.positions[a]),
+    JournalOp.TRANSFER: lambda game, player, a, b, c: game.transfer_property(player, game.players[b],
+                                                                             game.board.positions[a]),
+    JournalOp.PAYMENT: lambda game, player, a, b, c: game.send_money(player, game.players[b], c),
+    JournalOp.BUILD: lambda game, player, a, b, c: game.buy_house(player, game.board.positions[a], c, b),
+    JournalOp.BANKRUPTCY: lambda game, player, a, b, c: game.declare_bankruptcy(
+        player, game.players[b] if b >= 0 else None),
+}
+
+
+def replay(path: str, board: Optional[MonopolyBoard] = None, from_start: bool = False) -> MillionaireMonopoly:
+    """ Rebuild the game recorded in `path`, starting from its last snapshot (or its first, to
+    re-check the whole journal). Raises ReplayError if the engine's records differ from the journal """
+    records = read_records(path)
+    starts = [i for i, rec in enumerate(records) if rec[0] == JournalOp.SNAPSHOT]
+    if not starts:
+        raise ReplayError(f"{path} has no snapshot")
+    start = starts[0] if from_start else starts[-1]
+    game = read_snapshot(path, records[start][4], board)
+
+    expected = _Expected()
+    game.journal = expected
+    emitted = expected.records
+    next_emitted, players, commands = emitted.popleft, game.players, _COMMANDS
+    for i in range(start + 1, len(records)):
+        rec = records[i]
+        op = rec[0]
+        if op == _SNAPSHOT:
+            continue
+        if not emitted:
+            command = commands.get(op)
+            if command is None:
+                raise ReplayError(f"record {i}: {JournalOp(op).name} does not follow the command that caused it")
+            command(game, players[rec[1]], rec[2], rec[3], rec[4])
+        if not emitted or next_emitted() != rec:
+            raise ReplayError(f"record {i}: journal has {JournalOp(op).name} {rec[1:]}, replay differs")
+    # a command cut short by a crash has been replayed in full
+    game.journal = None
+    return game
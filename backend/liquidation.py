@@ -0,0 +1,134 @@
+from typing import List, Optional, Sequence, Tuple
+
+# Forced liquidation: which houses and properties a player sells to the bank to raise a
+# shortfall. Houses sell for half their cost and bare properties for half their price, so every
+# sale destroys as much value as it raises; the plan raises the shortfall while losing as little
+# rent income as possible, then overshooting as little as possible.
+#
+# Rent income is the rent a square charges (weighted by how often it is landed on, when weights
+# are given), so a plan accounts for houses, and for full sets that lose or regain doubled rent.
+# Apart from that doubling a square's income only depends on its own houses, so the options of
+# each square (keep h houses, or sell it) are merged into a frontier of (cash, income lost) per
+# color group, the group's bare full set is added as one extra option, and the group frontiers
+# are merged the same way. Frontiers key options by cash capped at the shortfall, so the work is
+# bounded by the number of distinct amounts below it; past MAX_STATES amounts (only on boards
+# with very large groups) cash is bucketed into MAX_STATES ranges and the plan may be slightly
+# off the optimum. The option raising the most is always kept, so a plan is found whenever the
+# player's assets cover the shortfall.
+
+MAX_STATES = 256
+
+# option for one square: houses kept, or SOLD
+SOLD = -1
+
+# a frontier entry: (cash raised, income lost, choice)
+Option = Tuple[int, float, tuple]
+
+
+class LiquidationPlan:
+    """ Sales that raise at least the requested amount: `houses` is [(position, houses to sell)],
+    `properties` the positions sold, which have no houses left once `houses` is applied """
+    __slots__ = ('houses', 'properties', 'cash', 'income_lost')
+
+    def __init__(self, houses, properties, cash: int, income_lost: float):
+        self.houses = houses
+        self.properties = properties
+        self.cash = cash
+        self.income_lost = income_lost
+
+
+def _frontier(options, cap: int) -> List[Option]:
+    """ Per cash amount (capped at `cap`) the option losing the least income, then raising the
+    least, without those beaten by one raising more and losing strictly less. One losing the same
+    with more cash does not beat an option: it would overshoot further. By increasing cash """
+    best = _best_per_key(options, cap, 1)
+    richest = None
+    if len(best) > MAX_STATES:
+        richest = max(options)
+        best = _best_per_key(best.values(), cap, cap // MAX_STATES + 1)
+    kept, best_loss = [], float("inf")
+    for key in sorted(best, reverse=True):
+        option = best[key]
+        if option[1] <= best_loss:
+            kept.append(option)
+            best_loss = option[1]
+    kept.reverse()
+    if richest is not None and richest[0] < cap and richest is not kept[-1]:
+        kept.append(richest)
+    return kept
+
+
+def _best_per_key(options, cap: int, bucket: int):
+    best = {}
+    for option in options:
+        key = option[0] // bucket if option[0] < cap else cap
+        current = best.get(key)
+        if current is None or (option[1], option[0]) < (current[1], current[0]):
+            best[key] = option
+    return best
+
+
+def _merge(states: List[Option], options: List[Option], cap: int) -> List[Option]:
+    """ The frontier of every state combined with every option; choices accumulate in a tuple """
+    return _frontier([(cash + option_cash, lost + option_lost, picks + (choice,))
+                      for cash, lost, picks in states
+                      for option_cash, option_lost, choice in options], cap)
+
+
+def _group_frontier(game, squares, weights, cap: int) -> List[Option]:
+    """ Options for one color group; the choice is the houses kept on each square, or SOLD """
+    table = game.rent_table
+    house_refund = game.HOUSE_COST.get(squares[0].color, 0) // 2
+    states = [(0, 0.0, ())]
+    bonus = 0.0 # extra income of the bare full set
+    bare_loss = 0.0 # income lost selling every house
+    houses_left = 0
+    for square in squares:
+        index = square.index
+        houses = game.houses[index]
+        w = weights[index] if weights is not None else 1.0
+        rent = w * table.rent(index, houses)
+        bonus += w * (table.rent(index, 0, True) - table.rent(index, 0))
+        bare_loss += rent - w * table.rent(index, 0)
+        houses_left += houses
+        options = [((houses - h) * house_refund, rent - w * table.rent(index, h), h) for h in range(houses, -1, -1)]
+        options.append((houses * house_refund + square.cost // 2, rent, SOLD))
+        states = _merge(states, options, cap)
+    if len(squares) != table.set_sizes[squares[0].index]:
+        return states
+    # the full set rents double while it has no houses: when it is bare now every loss counts
+    # from the doubled rent, and keeping every square while selling every house keeps the bonus
+    offset = bonus if houses_left == 0 else 0.0
+    states = [(cash, lost + offset, picks) for cash, lost, picks in states]
+    states.append((houses_left * house_refund, bare_loss + offset - bonus, (0,) * len(squares)))
+    return _frontier(states, cap)
+
+
+def plan_liquidation(game, player, amount: int, weights: Optional[Sequence[float]] = None) -> Optional[LiquidationPlan]:
+    """ The sales that bring `player`'s cash up to `amount` losing the least rent income, or None
+    when selling everything would not be enough. `weights` are per-square landing probabilities
+    (e.g. analytics.landing_distribution(board).squares); without them every square counts the same """
+    shortfall = amount - player.money
+    if shortfall <= 0:
+        return LiquidationPlan([], [], 0, 0.0)
+    if player.sale_value < shortfall:
+        return None
+
+    groups = [squares for _, squares in sorted(player.holdings.items()) if squares]
+    states = [(0, 0.0, ())]
+    for squares in groups:
+        states = _merge(states, _group_frontier(game, squares, weights, shortfall), shortfall)
+    cash, lost, picks = states[-1] # the most cash, which reaches the shortfall given sale_value
+    if cash < shortfall:
+        return None
+
+    houses, properties = [], []
+    for squares, kept in zip(groups, picks):
+        for square, h in zip(squares, kept):
+            had = game.houses[square.index]
+            left = 0 if h == SOLD else h
+            if had > left:
+                houses.append((square, had - left))
+            if h == SOLD:
+                properties.append(square)
+    return LiquidationPlan(houses, properties, cash, lost)
@@ -0,0 +1,278 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from monopoly_engine import MillionaireMonopoly, default_board
+from simulator import BotPolicy, CautiousPolicy, GreedyPolicy, _build_houses
+from snapshot import dump_game, load_game
+from undo import UndoLog
+
+# Look-ahead bot: Monte Carlo tree search over one seat's decisions.
+#
+# The seat decides at every PendingAction addressed to it (buy or pass, whom to pay, sell or go
+# bankrupt) and at the start of each of its turns, where it picks how much to build before
+# rolling and whether to upgrade its mover if it passes Go (see turn_choices). Dice and cards
+# are not part of the tree: it is open-loop UCT, so a node stands for the decisions taken to
+# reach it and its statistics average over the rolls in between. Other seats play an opponent
+# policy (GreedyPolicy by default); past the tree the seat plays GreedyPolicy, up to `horizon`
+# turns after the root. A line of play scores the seat's share of the surviving players'
+# assets, valued at cost (1 for a win, 0 once bankrupt). Lines come in rounds that share their
+# dice, one line per root choice, so root choices are compared on the same luck.
+#
+# Every iteration plays on the same private fork, undoing back to the root through an UndoLog
+# instead of copying the game (see benchmarks/mcts.py for what that saves). The search never
+# sees the game's own dice stream: the fork rolls from a fresh RNG.
+#
+# Root-parallel search: with workers > 1 each worker process searches its own tree from a
+# snapshot of the game with its own seed, and the root statistics are summed before choosing.
+
+# how much a turn builds before rolling: nothing, above CautiousPolicy's reserve, or all it can
+BUILD_RESERVES = {"none": None, "reserve": CautiousPolicy.reserve, "all": 0}
+TURN = "turn" # decision kind at the start of the seat's own turn
+ROLLOUT = GreedyPolicy() # plays the searching seat beyond the tree
+
+
+class Node:
+    """ Statistics of one sequence of decisions, with children per (kind, choice) """
+    __slots__ = ('visits', 'total', 'squares', 'children')
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.0
+        self.squares = 0.0 # sum of squared rewards, for the spread at the root
+        self.children: Dict[tuple, 'Node'] = {}
+
+
+def can_build(game, player) -> bool:
+    """ Whether `player` can afford a house on one of its full sets """
+    for held in player.holdings.values():
+        if not held or len(held) != game.rent_table.set_sizes[held[0].index]:
+            continue
+        if player.money >= game.HOUSE_COST.get(held[0].color, 0) and min(game.houses[p.index] for p in held) < 5:
+            return True
+    return False
+
+
+def turn_choices(game, player) -> List[Tuple[str, bool]]:
+    """ (build, upgrade_mover) options at the start of `player`'s turn, without ones that
+    can't make a difference """
+    builds = ("none", "reserve", "all") if can_build(game, player) else ("none",)
+    upgrades = (False, True) if player.mover_level < 2 else (False,)
+    return [(build, upgrade) for build in builds for upgrade in upgrades]
+
+
+def asset_value(player) -> int:
+    """ Cash plus what the player's properties and houses cost. Scoring at the bank's half-price
+    refund instead would make every purchase look like a loss within the horizon """
+    return player.money + 2 * player.sale_value
+
+
+def greedy_choice(game, player):
+    """ What the rollout policy (GreedyPolicy) does at `player`'s current decision """
+    action = game.pending_action
+    if action is not None:
+        return ROLLOUT.choose(game, action)
+    return ("all" if can_build(game, player) else "none", player.mover_level < 2)
+
+
+def play_turn(game, player, choice: Tuple[str, bool]):
+    build, upgrade = choice
+    reserve = BUILD_RESERVES[build]
+    if reserve is not None:
+        _build_houses(game, player, reserve)
+    game.roll_dice()
+    game.move_player(upgrade_mover=upgrade)
+
+
+class Search:
+    """ Open-loop UCT for `seat` from the current state of `game`, which is not modified """
+    def __init__(self, game: MillionaireMonopoly, seat: int, seed: int, opponent: BotPolicy = None,
+                 horizon: int = 40, exploration: float = 0.25):
+        self.game = game.fork(rng=random.Random(seed))
+        self.game.dice = None
+        self.log = UndoLog(self.game)
+        self.seat = seat
+        self.seed = seed
+        self.me = self.game.players[seat]
+        self.policies = [opponent or ROLLOUT] * len(self.game.players)
+        self.policies[seat] = ROLLOUT
+        self.horizon = horizon
+        self.exploration = exploration
+        self.root = Node()
+        self.root_decision = self.decision()
+        self.iterations = 0
+
+    def decision(self) -> Optional[Tuple[str, list]]:
+        """ (kind, choices) when the seat has to decide now, else None """
+        game = self.game
+        action = game.pending_action
+        if action is not None:
+            return (action.action_type, action.choices) if action.player is self.me else None
+        if game.current_player_index == self.seat and not game.game_over:
+            return TURN, turn_choices(game, self.me)
+        return None
+
+    def _apply(self, kind, choice):
+        if kind == TURN:
+            play_turn(self.game, self.me, choice)
+        else:
+            self.game.handle_pending_choice(choice)
+
+    def _advance(self, stop: int) -> Optional[Tuple[str, list]]:
+        """ Let the other seats play until the seat decides again (None: game over or `stop` reached) """
+        game = self.game
+        while not game.game_over and game.turns < stop:
+            decision = self.decision()
+            if decision is not None:
+                return decision
+            game.run_turns(1, self.policies)
+        return None
+
+    def _select(self, node: Node, kind: str, choices) -> tuple:
+        """ UCB1 over the choices offered now; untried ones first """
+        best, best_score = None, -1.0
+        log_visits = math.log(node.visits) if node.visits else 0.0
+        for choice in choices:
+            child = node.children.get((kind, choice))
+            if child is None or not child.visits:
+                return choice
+            score = child.total / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best, best_score = choice, score
+        return best
+
+    def _score(self) -> float:
+        game, me = self.game, self.me
+        if me.is_bankrupt:
+            return 0.0
+        if game.game_over:
+            return 1.0
+        total = sum(asset_value(p) for p in game.players if not p.is_bankrupt)
+        return asset_value(me) / total if total > 0 else 0.0
+
+    def iterate(self):
+        """ One line of play: descend the tree, expand one node, roll out, back up, undo """
+        game = self.game
+        mark = self.log.mark()
+        # rounds of lines share their dice (common random numbers)
+        game.rng.seed(self.seed * 1_000_003 + self.iterations // len(self.root_decision[1]))
+        stop = game.turns + self.horizon
+        node, path = self.root, [self.root]
+        kind, choices = self.root_decision
+        while True:
+            choice = self._select(node, kind, choices)
+            child = node.children.get((kind, choice))
+            expand = child is None
+            if expand:
+                child = node.children[(kind, choice)] = Node()
+            self._apply(kind, choice)
+            node = child
+            path.append(node)
+            decision = None if expand else self._advance(stop)
+            if decision is None:
+                break
+            kind, choices = decision
+        if not game.game_over and game.turns < stop:
+            game.run_turns(stop - game.turns, self.policies)
+        reward = self._score()
+        for n in path:
+            n.visits += 1
+            n.total += reward
+            n.squares += reward * reward
+        self.log.undo(mark)
+        self.iterations += 1
+
+    def run(self, budget: float, max_iterations: Optional[int] = None) -> Dict[tuple, Tuple[int, float, float]]:
+        """ Iterate for `budget` seconds (or max_iterations); returns (visits, total reward, total
+        squared reward) per root choice """
+        deadline = time.perf_counter() + budget
+        while time.perf_counter() < deadline and (max_iterations is None or self.iterations < max_iterations):
+            self.iterate()
+        return {choice: (child.visits, child.total, child.squares) for (_, choice), child in self.root.children.items()}
+
+
+def _search_worker(blob: bytes, board, seat: int, seed: int, opponent: Optional[BotPolicy], horizon: int,
+                   exploration: float, budget: float, max_iterations: Optional[int]):
+    game = load_game(blob, board or default_board())
+    search = Search(game, seat, seed, opponent, horizon, exploration)
+    return search.run(budget, max_iterations), search.iterations
+
+
+class MCTSPolicy(BotPolicy):
+    """ Bot seat that searches each of its decisions for `budget` seconds (or `max_iterations`
+    lines of play per search). It plays what GreedyPolicy would unless the search finds a choice
+    scoring better by `margin` standard errors: with few lines per search most differences are
+    luck. Call close() to stop the worker processes """
+    def __init__(self, budget: float = 0.1, max_iterations: Optional[int] = None, workers: int = 1,
+                 horizon: int = 40, exploration: float = 0.25, opponent: Optional[BotPolicy] = None,
+                 margin: float = 2.0, seed: Optional[int] = None):
+        self.budget = budget
+        self.margin = margin
+        self.max_iterations = max_iterations
+        self.workers = workers
+        self.horizon = horizon
+        self.exploration = exploration
+        self.opponent = opponent
+        self.rng = random.Random(seed)
+        self._pool = None
+        self.searches = 0
+        self.iterations = 0 # lines of play over all searches and workers
+
+    def search(self, game: MillionaireMonopoly, seat: int) -> tuple:
+        """ The choice for `seat` at its current decision in `game`, see the class docstring """
+        seeds = [self.rng.getrandbits(48) for _ in range(max(1, self.workers))]
+        if self.workers <= 1:
+            search = Search(game, seat, seeds[0], self.opponent, self.horizon, self.exploration)
+            results = [(search.run(self.budget, self.max_iterations), search.iterations)]
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            blob = dump_game(game, include_rng=False)
+            board = None if game.board is default_board() else game.board
+            futures = [self._pool.submit(_search_worker, blob, board, seat, seed, self.opponent, self.horizon,
+                                         self.exploration, self.budget, self.max_iterations) for seed in seeds]
+            results = [future.result() for future in futures]
+        merged: Dict[tuple, List[float]] = {}
+        for stats, iterations in results:
+            self.iterations += iterations
+            for choice, values in stats.items():
+                totals = merged.setdefault(choice, [0, 0.0, 0.0])
+                for i, value in enumerate(values):
+                    totals[i] += value
+        self.searches += 1
+
+        def mean_and_variance(choice):
+            n, total, squares = merged[choice]
+            mean = total / n
+            return mean, max(squares / n - mean * mean, 0.0) / n
+
+        incumbent = greedy_choice(game, game.players[seat])
+        if merged.get(incumbent, (0,))[0] < 2:
+            return max(merged, key=lambda c: merged[c][0])
+        best = max((c for c in merged if merged[c][0] >= 2), key=lambda c: mean_and_variance(c)[0])
+        (mean, variance), (base, base_variance) = mean_and_variance(best), mean_and_variance(incumbent)
+        if mean - base > self.margin * math.sqrt(variance + base_variance):
+            return best
+        return incumbent
+
+    def choose(self, game, action) -> str:
+        if len(action.choices) == 1:
+            return action.choices[0]
+        return self.search(game, game.players.index(action.player))
+
+    def build(self, game, player) -> bool:
+        choices = turn_choices(game, player)
+        if len(choices) == 1:
+            return False
+        build, upgrade = self.search(game, game.players.index(player))
+        reserve = BUILD_RESERVES[build]
+        if reserve is not None:
+            _build_houses(game, player, reserve)
+        return upgrade
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,136 @@
+import time
+from bisect import bisect_left
+from typing import Any, Dict
+
+# Optional instrumentation for one game, attached with GameMetrics(game) much like a Journal.
+#
+# Counts landings per square and card draws per deck, times the engine calls in PHASES and
+# records how long each turn took (wall time between turn ends, so on the server it includes
+# the time players take to decide). Phase times are inclusive: move_player contains the
+# calculate_rent calls it makes.
+#
+# A game without metrics pays one `is not None` check per move, card draw and turn end. The
+# phase timers cost nothing at all when off: attaching installs timed wrappers as instance
+# attributes over the engine's methods, and close() removes them again.
+
+PHASES = ("move_player", "calculate_rent", "handle_pending_choice", "get_game_state")
+DECKS = ("chance", "millionaire")
+
+# histogram bucket i counts durations up to BOUNDS[i]; bounds double from 1 us to ~67 s and
+# one more bucket takes everything longer
+BOUNDS = tuple(1e-6 * 2 ** i for i in range(27))
+
+
+class Histogram:
+    """ Log-scale latency histogram, in seconds """
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'Histogram'):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """ Upper bound of the bucket holding the q-quantile (never above the largest sample) """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(BOUNDS[i], self.max) if i < len(BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ Summary in microseconds; "buckets" maps each non-empty bucket's upper bound to its count """
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count * 1e6 if self.count else 0.0,
+            "p50_us": self.percentile(0.5) * 1e6,
+            "p90_us": self.percentile(0.9) * 1e6,
+            "p99_us": self.percentile(0.99) * 1e6,
+            "max_us": self.max * 1e6,
+            "total_s": self.total,
+            "buckets": {(f"{BOUNDS[i] * 1e6:g}" if i < len(BOUNDS) else "inf"): n
+                        for i, n in enumerate(self.counts) if n},
+        }
+
+
+def _timed(method, histogram: Histogram):
+    clock = time.perf_counter
+    add = histogram.add
+
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            add(clock() - start)
+    return timed
+
+
+class GameMetrics:
+    """ Counters, phase timers and the turn latency histogram of `game`. Without a game it is
+    an empty total that other metrics can be merged into """
+    def __init__(self, game=None):
+        self.game = None
+        self.landings = [0] * len(game.board) if game is not None else []
+        self.draws = [0] * len(DECKS)
+        self.phases = {name: Histogram() for name in PHASES}
+        self.turn_latency = Histogram()
+        self._turn_start = time.perf_counter()
+        if game is not None:
+            self.game = game
+            game.metrics = self
+            for name in PHASES:
+                setattr(game, name, _timed(getattr(game, name), self.phases[name]))
+
+    def end_turn(self):
+        """ Called by the engine whenever a turn ends """
+        now = time.perf_counter()
+        self.turn_latency.add(now - self._turn_start)
+        self._turn_start = now
+
+    def merge(self, other: 'GameMetrics'):
+        """ Add `other`'s counts into this one, e.g. to total a server's games """
+        if len(self.landings) < len(other.landings):
+            self.landings.extend([0] * (len(other.landings) - len(self.landings)))
+        for i, n in enumerate(other.landings):
+            self.landings[i] += n
+        self.draws = [a + b for a, b in zip(self.draws, other.draws)]
+        for name, histogram in other.phases.items():
+            self.phases[name].merge(histogram)
+        self.turn_latency.merge(other.turn_latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "landings": list(self.landings), # by square index
+            "card_draws": dict(zip(DECKS, self.draws)),
+            "phases": {name: histogram.to_dict() for name, histogram in self.phases.items()},
+            "turn_latency": self.turn_latency.to_dict(),
+        }
+
+    def close(self):
+        """ Detach from the game and remove the phase timers """
+        game = self.game
+        if game is not None and game.metrics is self:
+            for name in PHASES:
+                game.__dict__.pop(name, None)
+            game.metrics = None
+        self.game = None
+
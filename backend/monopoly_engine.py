@@ -1,17 +1,18 @@
+import json
+import os
 import random
-from collections import deque
-from enum import Enum
+from enum import Enum, IntEnum
 from typing import List, Optional, Dict, Callable, Any
 
+from liquidation import plan_liquidation
+
 # Doubly circular linked list implementation for the monopoly board, this allows for traversing back when going to jail & forth when moving normally
 # Implementations needed:
 # - Add a trading mechanism between players (kinda done, just need to call transfer_property and send_money calls from UI)
 # - Add a method to declare bankruptcy
 # - Add winning condition (easy pz)
-# - Add chance/community chest cards (draw from a deck, implement the effects)
 # - Add a method to display the current state of the board and players
 # - Add a method to handle special cards (when you owe money to another player(s))
-# - Add a cache to players for full sets (to speed up rent calculation)
 
 class GameState(Enum):
     PLAYING = "playing"
@@ -20,8 +21,195 @@ class GameState(Enum):
     WAITING_FOR_PROPERTY_DECISION = "waiting_for_property_decision"
     GAME_OVER = "game_over"
 
+class SquareKind(IntEnum):
+    """Integer kind code for each board square, used instead of comparing names"""
+    OTHER = 0
+    GO = 1
+    JAIL = 2
+    GO_TO_JAIL = 3
+    CHANCE = 4
+    MILLIONAIRE = 5
+    FREE_PARKING = 6
+    PROPERTY = 7
+
+SPECIAL_SQUARES = {
+    'Go': SquareKind.GO,
+    'Jail': SquareKind.JAIL,
+    'Go to Jail': SquareKind.GO_TO_JAIL,
+    'Chance': SquareKind.CHANCE,
+    'Millionaire Lifestyle': SquareKind.MILLIONAIRE,
+    'Free Parking': SquareKind.FREE_PARKING,
+}
+
+def square_kind(data) -> SquareKind:
+    """Classify a square's source data into a SquareKind"""
+    kind = SPECIAL_SQUARES.get(data.get('Name'))
+    if kind is not None:
+        return kind
+    if data.get('Price'):
+        return SquareKind.PROPERTY
+    return SquareKind.OTHER
+
+class Interner:
+    """ Maps strings to small ints, so per-square state holds an int instead of its own string """
+    __slots__ = ('values', 'ids')
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        idx = self.ids.get(value)
+        if idx is None:
+            idx = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return idx
+
+SQUARE_NAMES = Interner()
+COLORS = Interner()
+
+# action_type -> compact code, used when pending actions are stored as data (snapshots, journals)
+PENDING_ACTION_CODES = {
+    "property_purchase": 1,
+    "choose_player_to_pay": 2,
+    "must_pay_rent": 3,
+}
+
+class JournalOp(IntEnum):
+    """Record type codes written to a game journal (see journal.py)"""
+    SNAPSHOT = 0
+    ROLL = 1
+    MOVE = 2
+    DRAW = 3
+    CHOICE = 4
+    PURCHASE = 5
+    TRANSFER = 6
+    PAYMENT = 7
+    BUILD = 8
+    BANKRUPTCY = 9
+
+class EventKind:
+    """Type code of an event record (see render_event). Plain ints rather than an IntEnum: the
+    engine builds events on every call and enum member lookups cost several times more"""
+    MOVE = 1
+    GO_TO_JAIL = 2
+    CARD = 3
+    AWAITING_CHOICE = 4
+    NO_ONE_TO_PAY = 5
+    EARN = 6
+    PAY = 7
+    CANNOT_PAY = 8
+    RENT = 9
+    MOVER_DOWN = 10
+    MOVER_AT_MIN = 11
+    MOVER_UP = 12
+    MOVER_AT_MAX = 13
+    ADVANCE = 14
+    ROLL_EARN = 15
+    ROLL_MISS = 16
+    JAIL_FREE_CARD = 17
+    JAIL_FREE_USED = 18
+    NOT_IN_JAIL = 19
+    NO_JAIL_FREE_CARD = 20
+    BUY = 21
+    PASS = 22
+    ALREADY_OWNED = 23
+    CANNOT_AFFORD = 24
+    TRANSFER = 25
+    NOT_OWNER = 26
+    BUILD = 27
+    HAS_HOTEL = 28
+    NO_ROOM = 29
+    CANNOT_AFFORD_HOUSES = 30
+    BANKRUPT = 31
+    SELL_AND_PAY_RENT = 32
+    NO_PENDING_ACTION = 33
+    INVALID_CHOICE = 34
+    CANNOT_MOVE = 35
+    PAY_BANK = 36
+    CANNOT_PAY_BANK = 37
+    MOVE_BACK = 38
+    SELL_HOUSES = 39
+    SELL_PROPERTY = 40
+
+EVENT_NAMES = {code: name.lower() for name, code in vars(EventKind).items() if name.isupper()}
+
+# Engine calls return a list of events. An event is a plain tuple
+#   (kind, player, other, square, amount, extra)
+# with Player / Position references (or None) and ints; `extra` is the card for CARD, the dice
+# for rolls, a level or a house count. Tuples cost far less to build than the messages, which
+# are only rendered when a consumer asks for them.
+EVENT_TEXT = {
+    EventKind.MOVE: "{player} moves to {square}",
+    EventKind.GO_TO_JAIL: "{player} goes to Jail!",
+    EventKind.CARD: "{square} Card: {extra.text}",
+    EventKind.AWAITING_CHOICE: "{player} must choose: {extra}",
+    EventKind.NO_ONE_TO_PAY: "{player} has no one to pay!",
+    EventKind.EARN: "{player} earns ${amount}",
+    EventKind.PAY: "{player} pays ${amount} to {other}",
+    EventKind.CANNOT_PAY: "{player} cannot pay ${amount} to {other} (insufficient funds)",
+    EventKind.RENT: "{player} pays ${amount} rent to {other}",
+    EventKind.MOVER_DOWN: "{player} downgrades their mover to level {extra}",
+    EventKind.MOVER_AT_MIN: "{player}'s mover is already at the lowest level",
+    EventKind.MOVER_UP: "{player} upgrades their mover to level {extra}",
+    EventKind.MOVER_AT_MAX: "{player}'s mover is already at the highest level, receives ${amount} instead",
+    EventKind.ADVANCE: "{player} advances to {square}",
+    EventKind.ROLL_EARN: "{player} rolls {extra[0]} + {extra[1]} and earns ${amount}",
+    EventKind.ROLL_MISS: "{player} rolls {extra[0]} + {extra[1]} and earns nothing",
+    EventKind.JAIL_FREE_CARD: "{player} can get out of Jail for free!",
+    EventKind.JAIL_FREE_USED: "{player} uses a Get Out of Jail Free card!",
+    EventKind.NOT_IN_JAIL: "{player} is not in Jail!",
+    EventKind.NO_JAIL_FREE_CARD: "{player} does not have a Get Out of Jail Free card!",
+    EventKind.BUY: "{player} buys {square} for ${amount}.",
+    EventKind.PASS: "{player} passes on {square}",
+    EventKind.ALREADY_OWNED: "{square} is already owned by {other}!",
+    EventKind.CANNOT_AFFORD: "{player} does not have enough money to buy {square}!",
+    EventKind.TRANSFER: "{player} transfers {square} to {other}.",
+    EventKind.NOT_OWNER: "{player} does not own {square}!",
+    EventKind.BUILD: "{player} buys {extra} house(s) on {square} for ${amount}.",
+    EventKind.HAS_HOTEL: "{square} already has a hotel!",
+    EventKind.NO_ROOM: "{square} only has room for {extra} more house(s)!",
+    EventKind.CANNOT_AFFORD_HOUSES: "{player} does not have enough money to buy {extra} house(s) on {square}!",
+    EventKind.BANKRUPT: "{player} declares bankruptcy to {other}",
+    EventKind.SELL_AND_PAY_RENT: "{player} sells assets and pays ${amount} rent to {other}",
+    EventKind.NO_PENDING_ACTION: "No pending action",
+    EventKind.INVALID_CHOICE: "Invalid choice. Valid options: {extra}",
+    EventKind.CANNOT_MOVE: "Cannot move - game is in pending state",
+    EventKind.PAY_BANK: "{player} pays ${amount} to the bank",
+    EventKind.CANNOT_PAY_BANK: "{player} cannot pay ${amount} to the bank (insufficient funds)",
+    EventKind.MOVE_BACK: "{player} moves back to {square}",
+    EventKind.SELL_HOUSES: "{player} sells {extra} house(s) on {square} for ${amount}",
+    EventKind.SELL_PROPERTY: "{player} sells {square} to the bank for ${amount}",
+}
+
+def render_event(event) -> str:
+    """The human-readable message for one event"""
+    kind, player, other, square, amount, extra = event
+    return EVENT_TEXT[kind].format(player=player.name if player is not None else "",
+                                   other=other.name if other is not None else "the bank",
+                                   square=square.name if square is not None else "", amount=amount, extra=extra)
+
+def describe(events) -> str:
+    """Render the events returned by an engine call as one message"""
+    return " | ".join(map(render_event, events))
+
+def event_dict(event) -> Dict[str, Any]:
+    """JSON-friendly form of an event, with names instead of references"""
+    kind, player, other, square, amount, extra = event
+    return {
+        "type": EVENT_NAMES[kind],
+        "player": player.name if player is not None else None,
+        "other": other.name if other is not None else None,
+        "square": square.name if square is not None else None,
+        "amount": amount,
+        "text": render_event(event),
+    }
+
 class PendingAction:
-    """Represents an action that requires user input"""
+    """Represents an action that requires user input. The engine's own actions carry all their
+    state in `data` and are resolved by MillionaireMonopoly; `callback` is only for custom actions"""
+    __slots__ = ('action_type', 'player', 'description', 'choices', 'callback', 'data')
+
     def __init__(self, action_type: str, player: 'Player', description: str, 
                  choices: List[str] = None, callback: Callable = None, data: Dict = None):
         self.action_type = action_type
@@ -33,200 +221,314 @@ class PendingAction:
 
 class Player:
     """ Represents a player in the game """
+    __slots__ = ('name', 'mover_type', 'mover_level', 'position', 'money', 'properties', 'set_counts',
+                 'built_counts', 'holdings', 'sale_value', 'in_jail', 'jail_free_card', 'must_sell',
+                 'must_pay_someone', 'is_bankrupt', 'bankrupt_turn', 'version', 'state_cache')
+
     def __init__(self, name):
         self.name = name
         self.mover_type = None 
         self.mover_level = 0
         self.position = None  
         self.money = 372_000
-        self.properties = []
+        self.properties = {} # insertion-ordered set of owned Positions (values unused)
+        self.set_counts = {} # color id -> number of properties owned in that color
+        self.built_counts = {} # color id -> number of owned properties in that color with houses
+        self.holdings = {} # color id -> owned Positions of that color, the liquidation solver's asset book
+        self.sale_value = 0 # cash from selling every house and property back to the bank
         self.in_jail = False
         self.jail_free_card = False
         self.must_sell = False
         self.must_pay_someone = False
         self.is_bankrupt = False
+        self.bankrupt_turn = None
+        self.version = 0 # game version at which this player's public state last changed
+        self.state_cache = None # (version, dict) of the last serialised state
 
     def __str__(self):
-        return f"Player {self.name}, Money: {self.money}, Position: {self.position.data['Name'] if self.position else 'None'}"
+        return f"Player {self.name}, Money: {self.money}, Position: {self.position.name if self.position else 'None'}"
 
 
 class Position:
-    """ Represents a position on the board """
+    """ Represents a position on the board. Positions are static topology shared by every game
+    on the board; who owns a square and how many houses it has live in the game.
+    Name and color are stored as interned ids """
+    __slots__ = ('index', 'kind', 'name_id', 'color_id', 'cost', 'prev', 'next')
+
     def __init__(self, data=None):
-        self.data = data
+        data = data or {}
+        self.index = -1 # fixed slot on the board, assigned by MonopolyBoard.append
+        self.kind = square_kind(data) if data else SquareKind.OTHER
+        self.name_id = SQUARE_NAMES.intern(data.get('Name', ''))
+        self.color_id = COLORS.intern(data['Color']) if data.get('Color') else -1
+        self.cost = data.get('Price', 0)
         self.prev = None
         self.next = None
-        self.owner = None
-        self.houses = 0 # hotel = 5 houses
-        self.cost = data.get('Price') if data and 'Price' in data else 0
-        self.color = data.get('Color') if data and 'Color' in data else None
+
+    @property
+    def name(self) -> str:
+        return SQUARE_NAMES.values[self.name_id]
+
+    @property
+    def color(self) -> Optional[str]:
+        return COLORS.values[self.color_id] if self.color_id >= 0 else None
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """ The square's source dict, rebuilt on demand """
+        data = {'Name': self.name}
+        if self.cost:
+            data['Price'] = self.cost
+        if self.color_id >= 0:
+            data['Color'] = self.color
+        return data
 
 class Card:
-    """ Represents a Chance or Millionaire card """
-    def __init__(self, description, effect, params):
-        self.desc = description
-        self.effect = effect # action is a callable that takes a player and game state
-        self.effect_params = params or {}
-    
-    def apply(self, game, player):
-        return self.effect(game, player, **self.effect_params)
+    """ One compiled card: its effect code and argument (amount, or steps for movement).
+    Cards are immutable and shared by every game """
+    __slots__ = ('index', 'code', 'arg', 'text')
+
+    def __init__(self, index: int, code: int, arg: int, text: str):
+        self.index = index # position in its deck's definition order
+        self.code = code
+        self.arg = arg
+        self.text = text
+
+class Deck:
+    """ A compiled deck of cards in definition order, shared read-only by every game. A game only
+    holds its shuffle order (card indices as bytes) and a cursor into it """
+    __slots__ = ('name', 'cards', 'definitions')
+
+    def __init__(self, name: str, cards, definitions):
+        self.name = name
+        self.cards = tuple(cards)
+        self.definitions = definitions # the source definitions, for snapshots of custom decks
+
+    def __len__(self):
+        return len(self.cards)
 
 def _pay_player_with_choice(game, player, amount: int):
     """This creates a pending state where player must choose who to pay"""
     other_players = [p for p in game.players if p != player and not p.is_bankrupt]
     
     if not other_players:
-        return f"{player.name} has no one to pay!"
-    
-    def handle_choice(chosen_player_name):
-        chosen_player = next((p for p in other_players if p.name == chosen_player_name), None)
-        if chosen_player:
-            if player.money < amount:
-                player.must_sell = True
-                return f"{player.name} cannot pay ${amount} to {chosen_player.name} (insufficient funds)"
-            player.money -= amount
-            chosen_player.money += amount
-            return f"{player.name} pays ${amount} to {chosen_player.name}"
-        return "Invalid choice"
+        return [(EventKind.NO_ONE_TO_PAY, player, None, None, 0, None)]
     
-    # Create pending action
-    pending_action = PendingAction(
-        action_type="choose_player_to_pay",
-        player=player,
-        description=f"Choose a player to pay ${amount} to:",
-        choices=[p.name for p in other_players],
-        callback=handle_choice,
-        data={"amount": amount}
-    )
-    
-    game.set_pending_action(pending_action)
-    return "PENDING_CHOICE"
+    game.set_pending_action(game.pay_choice_action(player, amount, other_players))
+    return []
 
 def _earn_money(game, player, amount: int):
     player.money += amount
-    return f"{player.name} earns ${amount}"
+    return [(EventKind.EARN, player, None, None, amount, None)]
+
+def _pay_bank(game, player, amount: int):
+    return game.settle_debt(player, None, amount)
 
 def _pay_player(game, player, amount: int, p2: Player):
-    if player.money < amount:
-        player.must_sell = True
-        return f"{player.name} cannot pay ${amount} to {p2.name} (insufficient funds)"
-    player.money -= amount
-    p2.money += amount
-    return f"{player.name} pays ${amount} to {p2.name}"
+    return game.settle_debt(player, p2, amount)
 
 def _pay_all_players(game, player, amount: int):
-    total_paid = 0
-    messages = []
+    events = []
     
     for other_player in game.players:
-        if other_player != player:
-            if player.money < amount:
-                player.must_sell = True
-                messages.append(f"{player.name} cannot pay ${amount} to {other_player.name} (insufficient funds)")
-                break
-            player.money -= amount
-            other_player.money += amount
-            total_paid += amount
-            messages.append(f"{player.name} pays ${amount} to {other_player.name}")
+        if other_player != player and not other_player.is_bankrupt:
+            events += game.settle_debt(player, other_player, amount)
+            if player.is_bankrupt:
+                break # everything left went to this creditor
     
-    return "; ".join(messages)
+    return events
 
-# collect from all players based on their levels amount: -> list (idx on mover level)
 def _collect_from_all_players(game, player, amount: int):
-    total_collected = 0
-    messages = []
+    events = []
     
     for other_player in game.players:
-        if other_player != player:
-            if other_player.money < amount:
-                other_player.must_sell = True
-                messages.append(f"{other_player.name} cannot pay ${amount} to {player.name} (insufficient funds)")
-            else:
-                other_player.money -= amount
-                player.money += amount
-                total_collected += amount
-                messages.append(f"{other_player.name} pays ${amount} to {player.name}")
+        if other_player != player and not other_player.is_bankrupt:
+            events += game.settle_debt(other_player, player, amount)
     
-    return "; ".join(messages)
+    return events
 
-def _downgrade_mover(game, player):
+def _downgrade_mover(game, player, arg=0):
     if player.mover_level > 0:
         player.mover_level -= 1
-        return f"{player.name} downgrades their mover to level {player.mover_level}"
-    return f"{player.name}'s mover is already at the lowest level"
+        return [(EventKind.MOVER_DOWN, player, None, None, 0, player.mover_level)]
+    return [(EventKind.MOVER_AT_MIN, player, None, None, 0, None)]
 
-def _upgrade_mover(game, player):
+def _upgrade_mover(game, player, arg=0):
     if player.mover_level < 2:
         player.mover_level += 1
-        return f"{player.name} upgrades their mover to level {player.mover_level}"
+        return [(EventKind.MOVER_UP, player, None, None, 0, player.mover_level)]
     else:
         player.money += 50_000
-        return f"{player.name}'s mover is already at the highest level, receives $50,000 instead"
+        return [(EventKind.MOVER_AT_MAX, player, None, None, 50_000, None)]
 
-def _go_to_jail(game, player):
+def _go_to_jail(game, player, arg=0):
     player.position = game.board.jail
     player.in_jail = True
-    return f"{player.name} goes to Jail!"
+    return [(EventKind.GO_TO_JAIL, player, None, None, 0, None)]
 
 def _advance_num_spaces(game, player, num):
-    cur = player.position
-    for _ in range(num):
-        cur = cur.next
+    """Move `num` squares, counter-clockwise when negative (fortune cards). Like the other card
+    moves this only relocates the player: Go is not paid and the new square is not resolved"""
+    new_index, _ = game.board.advance(player.position.index, num)
+    cur = game.board.positions[new_index]
     player.position = cur
-    return f"{player.name} advances to {cur.data['Name']}"
+    return [(EventKind.ADVANCE if num >= 0 else EventKind.MOVE_BACK, player, None, cur, num, None)]
 
-def _get_out_of_jail_free(game, player):
+def _roll_for_earnings(game, player, amount: int):
+    """Roll two dice and earn `amount` on a hit: doubles at mover level 0, 8-12 at level 1, 5-12 at level 2"""
+    d1, d2 = game.roll_pair()
+    if player.mover_level == 0:
+        hit = d1 == d2
+    else:
+        hit = d1 + d2 >= (8 if player.mover_level == 1 else 5)
+    if hit:
+        player.money += amount
+        return [(EventKind.ROLL_EARN, player, None, None, amount, (d1, d2))]
+    return [(EventKind.ROLL_MISS, player, None, None, 0, (d1, d2))]
+
+def _get_out_of_jail_free(game, player, arg=0):
     player.jail_free_card = True
-    return f"{player.name} can get out of Jail for free!"
+    return [(EventKind.JAIL_FREE_CARD, player, None, None, 0, None)]
 
 def _use_jail_free_card(game, player):
     if player.jail_free_card:
         if not player.in_jail:
-            return f"{player.name} is not in Jail!"
+            return [(EventKind.NOT_IN_JAIL, player, None, None, 0, None)]
         player.in_jail = False
         player.jail_free_card = False
-        return f"{player.name} uses a Get Out of Jail Free card!"
-    return f"{player.name} does not have a Get Out of Jail Free card!"
-    
-### FORTUNE CARDS ### -> implement effects later (counterclockwise movement)
-
-def make_decks():
-    """ Create and shuffle the Chance and Millionaire decks """
-    chance_deck = []
-    millionaire_deck = [Card("Go Straight to Jail. Do not pass Go. Do not collect your salary.", _go_to_jail, {}),
-                        Card("Start your own business. To make $150,000, roll: doubles, 8-12, 5-12", )]
-
-    random.shuffle(chance_deck)
-    random.shuffle(millionaire_deck)
-
-    return deque(chance_deck), deque(millionaire_deck)
+        return [(EventKind.JAIL_FREE_USED, player, None, None, 0, None)]
+    return [(EventKind.NO_JAIL_FREE_CARD, player, None, None, 0, None)]
+
+class CardEffect:
+    """Effect code of a compiled card, an index into CARD_EFFECTS"""
+    EARN = 0
+    PAY_BANK = 1
+    PAY_EACH = 2
+    COLLECT_FROM_EACH = 3
+    PAY_CHOSEN = 4
+    MOVER_UP = 5
+    MOVER_DOWN = 6
+    GO_TO_JAIL = 7
+    MOVE = 8
+    ROLL_FOR_EARNINGS = 9
+    JAIL_FREE_CARD = 10
+
+# dispatch table: CARD_EFFECTS[code](game, player, arg) -> events
+CARD_EFFECTS = (
+    _earn_money,
+    _pay_bank,
+    _pay_all_players,
+    _collect_from_all_players,
+    _pay_player_with_choice,
+    _upgrade_mover,
+    _downgrade_mover,
+    _go_to_jail,
+    _advance_num_spaces,
+    _roll_for_earnings,
+    _get_out_of_jail_free,
+)
+
+# effect name in card definitions -> (code, name of its argument or None)
+EFFECT_SPECS = {
+    "earn": (CardEffect.EARN, "amount"),
+    "pay_bank": (CardEffect.PAY_BANK, "amount"),
+    "pay_each": (CardEffect.PAY_EACH, "amount"),
+    "collect_from_each": (CardEffect.COLLECT_FROM_EACH, "amount"),
+    "pay_chosen": (CardEffect.PAY_CHOSEN, "amount"),
+    "mover_up": (CardEffect.MOVER_UP, None),
+    "mover_down": (CardEffect.MOVER_DOWN, None),
+    "go_to_jail": (CardEffect.GO_TO_JAIL, None),
+    "move": (CardEffect.MOVE, "steps"),
+    "roll_for_earnings": (CardEffect.ROLL_FOR_EARNINGS, "amount"),
+    "jail_free_card": (CardEffect.JAIL_FREE_CARD, None),
+}
+
+CHANCE, MILLIONAIRE = 0, 1 # deck ids, as stored in DRAW journal records
+DECK_NAMES = ("chance", "millionaire")
+CARDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cards.json")
+
+def compile_deck(name: str, definitions: List[Dict[str, Any]]) -> Deck:
+    """ Compile card definitions ({"text", "effect", and "amount" or "steps" as the effect needs})
+    into a Deck. Raises ValueError for unknown effects and missing or unexpected arguments """
+    if len(definitions) > 255:
+        raise ValueError(f"{name} deck has {len(definitions)} cards, at most 255 fit a shuffle order")
+    cards = []
+    for i, definition in enumerate(definitions):
+        spec = EFFECT_SPECS.get(definition.get("effect"))
+        if spec is None:
+            raise ValueError(f"{name} card {i}: unknown effect {definition.get('effect')!r}")
+        code, arg_name = spec
+        extra = set(definition) - {"text", "effect", arg_name}
+        if extra:
+            raise ValueError(f"{name} card {i}: unexpected {', '.join(sorted(extra))}")
+        if arg_name is not None and not isinstance(definition.get(arg_name), int):
+            raise ValueError(f"{name} card {i}: {definition['effect']} needs an integer {arg_name!r}")
+        cards.append(Card(i, code, definition.get(arg_name, 0) if arg_name else 0, definition.get("text", "")))
+    return Deck(name, cards, definitions)
+
+def decks_from_data(data: Dict[str, List[Dict[str, Any]]]) -> tuple:
+    """ (Chance, Millionaire Lifestyle) decks from {"chance": [...], "millionaire": [...]} """
+    return tuple(compile_deck(name, data.get(name, [])) for name in DECK_NAMES)
+
+def load_decks(path: str = CARDS_PATH) -> tuple:
+    """ Compile the decks defined in a JSON file, see cards.json """
+    with open(path) as f:
+        return decks_from_data(json.load(f))
+
+DECKS = load_decks() # the standard decks, shared by every game that doesn't bring its own
+
+def shuffle_decks(decks, rng=None) -> List[bytes]:
+    """ A shuffled draw order for each deck, using `rng` (defaults to the random module) """
+    rng = rng or random
+    orders = []
+    for deck in decks:
+        order = list(range(len(deck)))
+        rng.shuffle(order)
+        orders.append(bytes(order))
+    return orders
 
 class MonopolyBoard:
-    """ Represents the Monopoly board as a doubly circular linked list """
+    """ Represents the Monopoly board as a doubly circular linked list, with an index layer on top.
+    A board only describes topology; once frozen it can be shared by any number of games """
     def __init__(self):
         self.head = None
         self.jail = None
         self.color_groups = {}
+        self.frozen = False
+
+        # index layer: positions[i].index == i, so movement is (idx + steps) % n
+        self.positions: List[Position] = []
+        self.kinds: List[SquareKind] = []
+        self.name_to_index: Dict[str, int] = {} # first index of each name (Chance etc. repeat)
+        self.go_index: Optional[int] = None
 
     def append(self, data):
         """ Append a new position to the board """
+        if self.frozen:
+            raise ValueError("cannot append to a frozen board")
         new_node = Position(data)
+        new_node.index = len(self.positions)
+        self.positions.append(new_node)
+        self.kinds.append(new_node.kind)
+        self.name_to_index.setdefault(data["Name"], new_node.index)
+        if new_node.kind == SquareKind.GO and self.go_index is None:
+            self.go_index = new_node.index
+
         if not self.head:
             self.head = new_node
             new_node.next = new_node
             new_node.prev = new_node
-            return
-
-        last = self.head.prev
+        else:
+            last = self.head.prev
 
-        # insert new_node between last and head
-        last.next = new_node
-        new_node.prev = last
-        new_node.next = self.head
-        self.head.prev = new_node
+            # insert new_node between last and head
+            last.next = new_node
+            new_node.prev = last
+            new_node.next = self.head
+            self.head.prev = new_node
 
         # store jail pointer
-        if data["Name"] == "Jail":
+        if new_node.kind == SquareKind.JAIL:
             self.jail = new_node
 
         # group by color for property sets safely -> to check if a player owns all properties of a color
@@ -234,6 +536,38 @@ class MonopolyBoard:
         if color:
             self.color_groups.setdefault(color, []).append(new_node)
 
+    def freeze(self) -> 'MonopolyBoard':
+        """ Make the board read-only so games can share it """
+        self.positions = tuple(self.positions)
+        self.kinds = tuple(self.kinds)
+        self.color_groups = {color: tuple(group) for color, group in self.color_groups.items()}
+        self.color_layout = tuple(p.color_id for p in self.positions)
+        self.frozen = True
+        return self
+
+    def __len__(self):
+        return len(self.positions)
+
+    def find_position_by_name(self, name) -> Optional[Position]:
+        """ Return the first position with the given name, or None """
+        idx = self.name_to_index.get(name)
+        return self.positions[idx] if idx is not None else None
+
+    def advance(self, index, steps):
+        """ Move `steps` squares from `index` (negative = counter-clockwise).
+        Returns (new_index, go_passes) where go_passes counts how many times Go was
+        landed on or passed; it is negative for backward moves. """
+        n = len(self.positions)
+        new_index = (index + steps) % n
+        go = self.go_index
+        if go is None or steps == 0:
+            return new_index, 0
+        if steps > 0:
+            # squares visited are index+1 .. index+steps
+            return new_index, (index + steps - go) // n - (index - go) // n
+        # squares visited are index-1 down to index+steps
+        return new_index, -((index - 1 - go) // n - (index + steps - 1 - go) // n)
+
     def display(self):
         """ Utility method to display the board positions """
         if not self.head:
@@ -242,11 +576,11 @@ class MonopolyBoard:
 
         current = self.head
         while True:
-            print(current.data['Name'], end=" -> ")
+            print(current.name, end=" -> ")
             current = current.next
             if current == self.head:
                 break
-        print(current.data['Name'])
+        print(current.name)
 
     def iter_nodes(self):
         if not self.head:
@@ -258,6 +592,109 @@ class MonopolyBoard:
             if cur is self.head:
                 break
 
+RENT_LEVELS = 6 # 0-4 houses, then hotel
+
+class RentTable:
+    """ Flat rent lookup compiled from a board and a rent mapping.
+    rents[(square * RENT_LEVELS + houses) * 2 + doubled] is the rent for landing on `square`,
+    where `doubled` means the owner holds the full set with no houses on it """
+    def __init__(self, board, rent_mapping):
+        self.num_squares = len(board)
+        self.rents: List[int] = [0] * (self.num_squares * RENT_LEVELS * 2)
+        # size of each square's color group, -1 for squares without a color so they never double
+        self.set_sizes: List[int] = [-1] * self.num_squares
+        for position in board.positions:
+            mapping = rent_mapping.get(position.color)
+            if mapping is None:
+                continue # no rent for this square (not a property, or no mapping for its color)
+            self.set_sizes[position.index] = len(board.color_groups[position.color])
+            for houses in range(RENT_LEVELS):
+                rent = mapping[min(houses, len(mapping) - 1)]
+                base = (position.index * RENT_LEVELS + houses) * 2
+                self.rents[base] = rent
+                self.rents[base + 1] = rent * 2
+
+    def rent(self, index, houses, doubled=False) -> int:
+        return self.rents[(index * RENT_LEVELS + houses) * 2 + doubled]
+
+_RENT_TABLES: Dict[tuple, RentTable] = {} # (board colors, mapping) -> RentTable
+
+def compile_rent_table(board, rent_mapping) -> RentTable:
+    """ Compile (or fetch the cached) RentTable for `board` under `rent_mapping`.
+    Tables only depend on each square's color, so boards with the same layout share one """
+    layout = board.color_layout if board.frozen else tuple(p.color_id for p in board.positions)
+    key = (layout,
+           tuple((color, tuple(rents)) for color, rents in sorted(rent_mapping.items())))
+    table = _RENT_TABLES.get(key)
+    if table is None:
+        table = _RENT_TABLES[key] = RentTable(board, rent_mapping)
+    return table
+
+# The standard 32 square Millionaire board, clockwise from Go
+DEFAULT_BOARD = [
+    {'Name' : 'Go'},
+    {'Name' : 'Motor Drive', 'Price': 5_000, 'Color': 'Brown'},
+    {'Name' : 'Millionaire Lifestyle'},
+    {'Name' : 'Gadget Wharf', 'Price': 5_000, 'Color': 'Brown'},
+    {'Name' : 'Surfer\'s Cove', 'Price': 15_000, 'Color': 'Light Blue'},
+    {'Name' : 'Chance'},
+    {'Name' : 'Aqua Park Resort', 'Price': 15_000, 'Color': 'Light Blue'},
+    {'Name' : 'Lakeside Marina', 'Price': 20_000, 'Color': 'Light Blue'},
+    {'Name' : 'Jail'},
+    {'Name' : 'Castle View', 'Price': 35_000, 'Color': 'Pink'},
+    {'Name' : 'Dream Avenue', 'Price': 35_000, 'Color': 'Pink'},
+    {'Name' : 'Palace Gardens', 'Price': 40_000, 'Color': 'Pink'},
+    {'Name' : 'Adventure Park', 'Price': 55_000, 'Color': 'Orange'},
+    {'Name' : 'Millionaire Lifestyle'},
+    {'Name' : 'Themepark City', 'Price': 55_000, 'Color': 'Orange'},
+    {'Name' : 'Movie District', 'Price': 60_000, 'Color': 'Orange'},
+    {'Name' : 'Free Parking'},
+    {'Name' : 'Style Square', 'Price': 80_000, 'Color': 'Red'},
+    {'Name' : 'Chance'},
+    {'Name' : 'Party Plaza', 'Price': 80_000, 'Color': 'Red'},
+    {'Name' : 'Showtime Boulevard', 'Price': 90_000, 'Color': 'Red'},
+    {'Name' : 'Sunshine Bay', 'Price': 115_000, 'Color': 'Yellow'},
+    {'Name' : 'Bling Beach', 'Price': 115_000, 'Color': 'Yellow'},
+    {'Name' : 'Yacht Harbor', 'Price': 120_000, 'Color': 'Yellow'},
+    {'Name' : 'Go to Jail'},
+    {'Name' : 'Treetop Retreat', 'Price': 145_000, 'Color': 'Green'},
+    {'Name' : 'Ski Mountain', 'Price': 145_000, 'Color': 'Green'},
+    {'Name' : 'Millionaire Lifestyle'},
+    {'Name' : 'Diamond Hills', 'Price': 150_000, 'Color': 'Green'},
+    {'Name' : 'Chance'},
+    {'Name' : 'Fortune Valley', 'Price': 170_000, 'Color': 'Dark Blue'},
+    {'Name' : 'Paradise Island', 'Price': 200_000, 'Color': 'Dark Blue'},
+]
+
+def build_default_board() -> MonopolyBoard:
+    """ Build a fresh, frozen MonopolyBoard from DEFAULT_BOARD """
+    board = MonopolyBoard()
+    for item in DEFAULT_BOARD:
+        board.append(item)
+    return board.freeze()
+
+_SHARED_BOARD: Optional[MonopolyBoard] = None
+
+def default_board() -> MonopolyBoard:
+    """ The process-wide DEFAULT_BOARD instance, built once and shared by every game """
+    global _SHARED_BOARD
+    if _SHARED_BOARD is None:
+        _SHARED_BOARD = build_default_board()
+    return _SHARED_BOARD
+
+class RunSummary:
+    """ What run_turns / run_until did: turns played, decisions made by policies, and why it
+    stopped: "turns", "condition", "game_over" or "human" (a seat without a policy must act) """
+    __slots__ = ('turns', 'decisions', 'reason')
+
+    def __init__(self, turns: int, decisions: int, reason: str):
+        self.turns = turns
+        self.decisions = decisions
+        self.reason = reason
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"turns": self.turns, "decisions": self.decisions, "reason": self.reason}
+
 class MillionaireMonopoly:
     """ Main game class for Millionaire Monopoly """
     GO_BONUS = [150_000, 200_000, 250_000]
@@ -272,10 +709,28 @@ class MillionaireMonopoly:
         'Green': [50000, 125000, 210000, 320000, 375000, 485000], #cost 55k
         'Dark Blue': [65000, 160000, 250000, 370000, 430000, 550000], # cost 60k
     }
+    HOUSE_COST = {
+        'Brown': 10000,
+        'Light Blue': 15000,
+        'Pink': 25000,
+        'Orange': 30000,
+        'Red': 35000,
+        'Yellow': 45000,
+        'Green': 55000,
+        'Dark Blue': 60000,
+    }
 
-    def __init__(self, board, players):
+    def __init__(self, board, players, rng: Optional[random.Random] = None,
+                 rent_mapping: Optional[Dict[str, List[int]]] = None, dice=None, decks=None):
         # setup game state
         self.board = board
+        self.rng = rng or random.Random() # per-game RNG, pass a seeded Random for reproducible games
+        self.dice = dice # dice source (see dice.py); None rolls self.rng
+        self.set_rent_mapping(rent_mapping or self.RENT_MAPPING)
+
+        # per-game square state, indexed like board.positions
+        self.owners: List[Optional[Player]] = [None] * len(board)
+        self.houses = bytearray(len(board)) # hotel = 5 houses
         self.players = [Player(name) for name in players]
         self.current_player_index = 0
         self.turns = 0
@@ -289,337 +744,733 @@ class MillionaireMonopoly:
         self.d2 = 0
         self.double_rolls = 0
         self.game_over = False
+        self.winner: Optional[Player] = None
 
         start_pointer = self.board.head # self.board.find_position_by_name('Go') or 
         for player in self.players:
             player.position = start_pointer
 
-        self.chance_deck, self.millionaire_deck = make_decks()
+        # the (Chance, Millionaire) decks are shared; each game keeps a shuffled order and a cursor per deck
+        self.decks = decks or DECKS
+        self.card_orders = shuffle_decks(self.decks, self.rng)
+        self.card_cursors = [0] * len(self.decks)
+        self._subscribers = []
+        self.journal = None # set by journal.Journal
+        self.metrics = None # set by metrics.GameMetrics
+        self.undo = None # set by undo.UndoLog
+        self.income = None # set by analytics.ExpectedIncome
+        self._reset_tracking()
+
+    def _reset_tracking(self, version=0):
+        """Start change tracking at `version` (restored games start over, so clients resync)"""
+        self.version = version
+        self._meta_version = version # game_state / current_player / turn / dice
+        self._pending_version = version
+        self._state_cache = None # (version, full state dict)
+        for player in self.players:
+            player.version = version
+            player.state_cache = None
+        self._mark_published()
+
+    def _touch(self, *players, meta=False, pending=False):
+        """Record that the given parts of the public state changed, under a new version"""
+        self.version += 1
+        version = self.version
+        for player in players:
+            player.version = version
+        if meta:
+            self._meta_version = version
+        if pending:
+            self._pending_version = version
+
+    def _move_steps(self, player, steps, upgrade_mover=False) -> int:
+        """Move player `steps` squares and pay the Go bonus for every forward pass of Go"""
+        new_index, passes = self.board.advance(player.position.index, steps)
+        player.position = self.board.positions[new_index]
+        for _ in range(passes):
+            bonus = self.GO_BONUS[player.mover_level] # mover level determines bonus
+            if upgrade_mover and player.mover_level < 2:
+                player.mover_level += 1
+                bonus -= 50_000
+            player.money += bonus
+        return passes
+
+    def _end_turn(self):
+        """Hand the turn to the next player who is still in the game"""
+        n = len(self.players)
+        idx = self.current_player_index
+        for _ in range(n):
+            idx = (idx + 1) % n
+            if not self.players[idx].is_bankrupt:
+                break
+        self.current_player_index = idx
+        self.turns += 1
+        if self.metrics is not None:
+            self.metrics.end_turn()
+
+    def fork(self, rng: Optional[random.Random] = None, dice=None) -> 'MillionaireMonopoly':
+        """Cheap independent copy of this game: board, rent table and cards are shared, only
+        per-game state is copied. The fork continues this game's RNG and dice streams unless
+        `rng` / `dice` are given"""
+        game = MillionaireMonopoly.__new__(MillionaireMonopoly)
+        game.__dict__.update(self.__dict__)
+
+        players = []
+        for old in self.players:
+            player = Player.__new__(Player)
+            for slot in Player.__slots__:
+                setattr(player, slot, getattr(old, slot))
+            player.properties = old.properties.copy()
+            player.set_counts = old.set_counts.copy()
+            player.built_counts = old.built_counts.copy()
+            player.holdings = {color: held[:] for color, held in old.holdings.items()}
+            players.append(player)
+        remap = dict(zip(self.players, players))
+        remap[None] = None
+
+        game.players = players
+        # subscribers, the journal, metrics, undo log and income figures follow the original game, not its forks
+        game._subscribers = []
+        game.journal = None
+        game.undo = None
+        game.income = None
+        if self.metrics is not None:
+            for name in self.metrics.phases: # the timed wrappers are bound to this game
+                del game.__dict__[name]
+            game.metrics = None
+        game.owners = [remap[owner] for owner in self.owners]
+        game.houses = self.houses[:]
+        game.winner = remap[self.winner]
+        game.card_orders = list(self.card_orders) # the orders themselves are immutable bytes
+        game.card_cursors = list(self.card_cursors)
+        game.action_queue = list(self.action_queue)
+        if rng is None:
+            rng = random.Random()
+            rng.setstate(self.rng.getstate())
+        game.rng = rng
+        if dice is None and self.dice is not None:
+            dice = self.dice.copy()
+        game.dice = dice
+        action = self.pending_action
+        if action is not None:
+            game.pending_action = PendingAction(action.action_type, remap[action.player], action.description,
+                                                list(action.choices), action.callback, dict(action.data))
+        return game
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> Callable[[], None]:
+        """Call `listener` after every state-changing call (roll_dice, move_player, handle_pending_choice,
+        buy_property, transfer_property, send_money, buy_house) with one message {"version", "events",
+        "delta"}: "events" lists which of "turn", "money", "ownership" and "pending" changed and "delta"
+        is get_state_delta since the previous message, so a burst like Go bonus + card + rent arrives as
+        one message. Listeners run inside the call on the caller's thread and must not block. Returns a
+        function that unsubscribes"""
+        if not self._subscribers:
+            self._mark_published() # changes made while nobody listened are not replayed
+        self._subscribers.append(listener)
+
+        def unsubscribe():
+            if listener in self._subscribers:
+                self._subscribers.remove(listener)
+        return unsubscribe
+
+    def _mark_published(self):
+        self._published_version = self.version
+        self._published_turn = self.turns
+        self._published_money = [p.money for p in self.players]
+        self._published_owners = (list(self.owners), bytes(self.houses))
+
+    def _record(self, op, player, a=0, b=0, c=0):
+        """Append a record to the journal, if one is attached"""
+        if self.journal is not None:
+            self.journal.record(op, self.players.index(player), a, b, c)
+
+    def _finish(self):
+        """End of a public call: let the journal checkpoint and publish to subscribers"""
+        if self.journal is not None:
+            self.journal.checkpoint(self)
+        self._publish()
+
+    def _publish(self):
+        """Send subscribers everything that changed since the last message"""
+        since = self._published_version
+        if not self._subscribers or since == self.version:
+            return
+        events = []
+        if self.turns != self._published_turn:
+            events.append("turn")
+        if [p.money for p in self.players] != self._published_money:
+            events.append("money")
+        if (self.owners, bytes(self.houses)) != self._published_owners:
+            events.append("ownership")
+        if self._pending_version > since:
+            events.append("pending")
+        message = {"version": self.version, "events": events, "delta": self.get_state_delta(since)}
+        self._mark_published()
+        for listener in list(self._subscribers):
+            listener(message)
+
+    def set_rent_mapping(self, rent_mapping: Dict[str, List[int]]):
+        """Use house-rule rents for this game; the rent table is recompiled once here, not per landing"""
+        self.rent_mapping = rent_mapping
+        self.rent_table = compile_rent_table(self.board, rent_mapping)
 
     def set_pending_action(self, action: PendingAction):
         """Set a pending action and change game state"""
         self.pending_action = action
         self.state = GameState.WAITING_FOR_CHOICE
+        self._touch(meta=True, pending=True)
 
-    def handle_pending_choice(self, choice: str) -> str:
-        """Handle a user's choice for a pending action"""
+    def handle_pending_choice(self, choice: str) -> List[tuple]:
+        """Handle a user's choice for a pending action. Returns the resulting events; custom
+        action callbacks return events too"""
         if not self.pending_action:
-            return "No pending action"
+            return [(EventKind.NO_PENDING_ACTION, None, None, None, 0, None)]
         
         if choice not in self.pending_action.choices:
-            return f"Invalid choice. Valid options: {', '.join(self.pending_action.choices)}"
+            return [(EventKind.INVALID_CHOICE, self.pending_action.player, None, None, 0,
+                     ', '.join(self.pending_action.choices))]
         
-        # Execute the callback
-        result = self.pending_action.callback(choice)
-        
-        # Clear pending state
+        # Clear pending state first so the callback may set a new pending action
+        action = self.pending_action
+        self._record(JournalOp.CHOICE, action.player, action.choices.index(choice))
         self.pending_action = None
         self.state = GameState.PLAYING
+
+        # Execute the callback, or the engine's handler for its own action types
+        if action.callback is not None:
+            result = action.callback(choice)
+        else:
+            result = self._PENDING_HANDLERS[action.action_type](self, action, choice)
+
+        # The move that raised the action is now resolved
+        if self.state == GameState.PLAYING and not self.game_over:
+            self._end_turn()
+        # resolutions can move money between anyone (payments, bankruptcy), so mark every player
+        self._touch(*self.players, meta=True, pending=True)
+        self._finish()
         
         return result
     
+    # Deltas are cut off past this many versions; clients that far behind get the full state
+    MAX_DELTA_LAG = 10_000
+
+    def _player_state(self, player) -> Dict[str, Any]:
+        cache = player.state_cache
+        if cache is not None and cache[0] == player.version:
+            return cache[1]
+        state = {
+            "name": player.name,
+            "money": player.money,
+            "position": player.position.name if player.position else None,
+            "properties": [prop.name for prop in player.properties],
+            "in_jail": player.in_jail,
+            "mover_level": player.mover_level,
+            "must_sell": player.must_sell
+        }
+        player.state_cache = (player.version, state)
+        return state
+
+    def _pending_state(self) -> Optional[Dict[str, Any]]:
+        action = self.pending_action
+        if not action:
+            return None
+        return {
+            "type": action.action_type,
+            "player": action.player.name,
+            "description": action.description,
+            "choices": action.choices,
+            # positions are sent by name
+            "data": {key: value.name if isinstance(value, Position) else value for key, value in action.data.items()}
+        }
+
     def get_game_state(self) -> Dict[str, Any]:
-        """Get the current game state for the frontend"""
+        """Get the current game state for the frontend. The dict is cached per version, treat it as read-only"""
+        cache = self._state_cache
+        if cache is not None and cache[0] == self.version:
+            return cache[1]
         state = {
+            "version": self.version,
             "game_state": self.state.value,
             "current_player": self.players[self.current_player_index].name,
             "turn": self.turns,
             "dice": [self.d1, self.d2],
-            "players": [
-                {
-                    "name": p.name,
-                    "money": p.money,
-                    "position": p.position.data["Name"] if p.position else None,
-                    "properties": [prop.data["Name"] for prop in p.properties],
-                    "in_jail": p.in_jail,
-                    "mover_level": p.mover_level,
-                    "must_sell": p.must_sell
-                }
-                for p in self.players
-            ]
+            "players": [self._player_state(p) for p in self.players]
         }
         
         if self.pending_action:
-            state["pending_action"] = {
-                "type": self.pending_action.action_type,
-                "player": self.pending_action.player.name,
-                "description": self.pending_action.description,
-                "choices": self.pending_action.choices,
-                "data": self.pending_action.data
-            }
+            state["pending_action"] = self._pending_state()
+        if self.income is not None:
+            state["expected_income"] = self.expected_income()
         
+        self._state_cache = (self.version, state)
         return state
+
+    def get_state_delta(self, since: int) -> Dict[str, Any]:
+        """Everything that changed after version `since`. Clients pass back the "version" of the last
+        state or delta they applied. Unchanged sections are left out, "players" maps player index to
+        that player's full entry, and "pending_action" is None once an action is cleared. Clients
+        too far behind (or ahead, e.g. after a restore) get {"full": True, "state": ...} instead"""
+        if since > self.version or since < self.version - self.MAX_DELTA_LAG:
+            return {"version": self.version, "full": True, "state": self.get_game_state()}
+        delta = {"version": self.version, "full": False}
+        if since == self.version:
+            return delta
+        if self._meta_version > since:
+            delta["game_state"] = self.state.value
+            delta["current_player"] = self.players[self.current_player_index].name
+            delta["turn"] = self.turns
+            delta["dice"] = [self.d1, self.d2]
+        players = {i: self._player_state(p) for i, p in enumerate(self.players) if p.version > since}
+        if players:
+            delta["players"] = players
+            if self.income is not None: # income only changes with ownership and houses, which touch players
+                delta["expected_income"] = self.expected_income()
+        if self._pending_version > since:
+            delta["pending_action"] = self._pending_state()
+        return delta
     
+    def expected_income(self) -> Optional[List[int]]:
+        """Expected rent per opponent turn of each player, in player order, or None when no
+        analytics.ExpectedIncome is attached"""
+        return [round(x) for x in self.income.totals()] if self.income is not None else None
+
+    def get_metrics(self) -> Optional[Dict[str, Any]]:
+        """Snapshot of the game's instrumentation, or None when no metrics.GameMetrics is attached"""
+        return self.metrics.snapshot() if self.metrics is not None else None
+
+    def run_turns(self, n: int, policy) -> RunSummary:
+        """Play up to `n` turns, see run_until"""
+        return self.run_until(None, policy, max_turns=n)
+
+    def run_until(self, predicate: Optional[Callable[['MillionaireMonopoly'], bool]], policy,
+                  max_turns: Optional[int] = None) -> RunSummary:
+        """Play turns inside the engine until `predicate(game)` is true (checked before each turn),
+        `max_turns` turns have been played, the game is over, or a seat without a policy has to act.
+        `policy` is one policy for every seat or a list with one per seat, None marking a human
+        seat. A policy answers pending actions with choose(game, action) -> choice and may define
+        build(game, player), called before its turn, and upgrade_mover (simulator.BotPolicy fits);
+        build may return True or False to decide upgrade_mover for that turn instead.
+        Subscribers get one message for the whole run instead of one per call"""
+        seats = list(policy) if isinstance(policy, (list, tuple)) else [policy] * len(self.players)
+        builders = [getattr(p, "build", None) for p in seats]
+        upgrades = [bool(getattr(p, "upgrade_mover", False)) for p in seats]
+        seat_of = {player: i for i, player in enumerate(self.players)}
+        start = self.turns
+        stop_at = start + max_turns if max_turns is not None else None
+        decisions = 0
+        reason = "turns"
+        # hold subscribers back so the run publishes one coalesced message at the end
+        subscribers, self._subscribers = self._subscribers, []
+        try:
+            while True:
+                if self.game_over:
+                    reason = "game_over"
+                    break
+                action = self.pending_action
+                if action is not None:
+                    chooser = seats[seat_of[action.player]]
+                    if chooser is None:
+                        reason = "human"
+                        break
+                    self.handle_pending_choice(chooser.choose(self, action))
+                    decisions += 1
+                    continue
+                if stop_at is not None and self.turns >= stop_at:
+                    break
+                if predicate is not None and predicate(self):
+                    reason = "condition"
+                    break
+                seat = self.current_player_index
+                if seats[seat] is None:
+                    reason = "human"
+                    break
+                build = builders[seat]
+                upgrade = upgrades[seat]
+                if build is not None:
+                    decided = build(self, self.players[seat])
+                    if decided is not None:
+                        upgrade = decided
+                self.roll_dice()
+                self.move_player(upgrade_mover=upgrade)
+        finally:
+            self._subscribers = subscribers
+            self._publish()
+
+        return RunSummary(self.turns - start, decisions, reason)
+
     def can_make_move(self) -> bool:
         """Check if the game can proceed with the next move"""
         return self.state == GameState.PLAYING and not self.game_over
     
     def handle_property_landing(self, player, position):
         """Handle when a player lands on a property - might create pending state"""
-        if position.owner and position.owner != player:
+        owner = self.owners[position.index]
+        if owner and owner != player:
             rent = self.calculate_rent(player, position)
             if rent > 0:
                 if player.money < rent:
                     # Create pending state for selling assets
-                    pending_action = PendingAction(
-                        action_type="must_pay_rent",
-                        player=player,
-                        description=f"You owe ${rent} to {position.owner.name} for {position.data['Name']}. You must sell assets or declare bankruptcy.",
-                        choices=["sell_assets", "declare_bankruptcy"],
-                        data={"rent": rent, "owner": position.owner.name}
-                    )
-                    self.set_pending_action(pending_action)
-                    return "PENDING_PAYMENT"
+                    self.set_pending_action(self.rent_action(player, owner, rent, position))
                 else:
                     player.money -= rent
-                    position.owner.money += rent
-                    return f"{player.name} pays ${rent} rent to {position.owner.name}"
-        elif not position.owner and position.cost > 0:
+                    owner.money += rent
+                    self._touch(owner)
+                    return [(EventKind.RENT, player, owner, position, rent, None)]
+        elif not owner and position.cost > 0:
             # Create pending state for property purchase
-            pending_action = PendingAction(
-                action_type="property_purchase",
-                player=player,
-                description=f"Do you want to buy {position.data['Name']} for ${position.cost}?",
-                choices=["buy", "pass"],
-                data={"property": position, "cost": position.cost}
-            )
-            self.set_pending_action(pending_action)
-            return "PENDING_PROPERTY_DECISION"
+            self.set_pending_action(self.purchase_action(player, position))
         
-        return None
+        return []
 
     def roll_dice(self):
         """Roll dice - only allowed if game can make a move"""
         if not self.can_make_move():
             return False
         
-        self.d1 = random.randint(1, 6)
-        self.d2 = random.randint(1, 6)
+        self.d1, self.d2 = self.roll_pair()
+        self._record(JournalOp.ROLL, self.players[self.current_player_index], 0, self.d1, self.d2)
+        self._touch(meta=True)
+        self._finish()
         return True
     
-    def move_player(self, steps=None, upgrade_mover=False):
-        """Move player and handle the resulting position"""
+    def roll_pair(self):
+        """Two dice from the game's dice source, for turns and for cards that roll"""
+        if self.dice is not None:
+            return self.dice.roll()
+        rng = self.rng
+        return rng.randint(1, 6), rng.randint(1, 6)
+
+    def move_player(self, steps=None, upgrade_mover=False) -> List[tuple]:
+        """Move player and handle the resulting position. Returns the events of the move, in order"""
         if not self.can_make_move():
-            return "Cannot move - game is in pending state"
+            return [(EventKind.CANNOT_MOVE, None, None, None, 0, None)]
         
         if steps is None:
             steps = self.d1 + self.d2
         
         player = self.players[self.current_player_index]
-        
-        # Move the player
-        for _ in range(steps):
-            player.position = player.position.next
-            if player.position.data['Name'] == 'Go':
-                bonus = self.GO_BONUS[player.mover_level]
-                if upgrade_mover and player.mover_level < 2:
-                    player.mover_level += 1
-                    bonus -= 50_000 
-                player.money += bonus
-        
-        position_name = player.position.data['Name']
-        result = f"{player.name} moves to {position_name}"
+        self._record(JournalOp.MOVE, player, bool(upgrade_mover), steps)
+        self._move_steps(player, steps, upgrade_mover)
+        position = player.position
+        kind = position.kind
+        if self.metrics is not None:
+            self.metrics.landings[position.index] += 1
+        events = [(EventKind.MOVE, player, None, position, steps, None)]
 
         # Handle special positions
-        if position_name == 'Go to Jail':
-            _go_to_jail(self, player)
-            result += " and goes to Jail!"
-        elif position_name == 'Chance':
-            if self.chance_deck:
-                card = self.chance_deck.popleft()
-                card_result = card.apply(self, player)
-                self.chance_deck.append(card)
-                if card_result != "PENDING_CHOICE":
-                    result += f" | Chance Card: {card.desc} -> {card_result}"
-                else:
-                    result += f" | Chance Card: {card.desc} (awaiting choice)"
-        elif position_name == 'Millionaire Lifestyle':
-            if self.millionaire_deck:
-                card = self.millionaire_deck.popleft()
-                card_result = card.apply(self, player)
-                self.millionaire_deck.append(card)
-                if card_result != "PENDING_CHOICE":
-                    result += f" | Millionaire Card: {card.desc} -> {card_result}"
-                else:
-                    result += f" | Millionaire Card: {card.desc} (awaiting choice)"
+        if kind == SquareKind.GO_TO_JAIL:
+            events += _go_to_jail(self, player)
+        elif kind == SquareKind.CHANCE or kind == SquareKind.MILLIONAIRE:
+            events += self.draw_card(player, position)
         else:
-            # Handle property landing
-            landing_result = self.handle_property_landing(player, player.position)
-            if landing_result and not landing_result.startswith("PENDING"):
-                result += f" | {landing_result}"
+            events += self.handle_property_landing(player, position)
 
         # Only advance turn if no pending action
         if self.state == GameState.PLAYING:
-            self.current_player_index = (self.current_player_index + 1) % len(self.players)
-            self.turns += 1
+            self._end_turn()
+        elif self.pending_action is not None:
+            events.append((EventKind.AWAITING_CHOICE, self.pending_action.player, None, None, 0,
+                           self.pending_action.description))
+        self._touch(player, meta=True)
+        self._finish()
+        return events
+
+    def draw_card(self, player, position) -> List[tuple]:
+        """Draw the next card of the deck for `position` (a Chance or Millionaire square) and apply it"""
+        deck_id = MILLIONAIRE if position.kind == SquareKind.MILLIONAIRE else CHANCE
+        cards = self.decks[deck_id].cards
+        if not cards:
+            return []
+        cursor = self.card_cursors[deck_id]
+        card = cards[self.card_orders[deck_id][cursor]]
+        self.card_cursors[deck_id] = cursor + 1 if cursor + 1 < len(cards) else 0
+        if self.metrics is not None:
+            self.metrics.draws[deck_id] += 1
+        if self.journal is not None:
+            self._record(JournalOp.DRAW, player, deck_id, card.index)
+        events = [(EventKind.CARD, player, None, position, 0, card)]
+        events += CARD_EFFECTS[card.code](self, player, card.arg)
+        self._touch(*self.players) # card effects can pay or charge anyone
+        return events
+
+    def _sale_value(self, property) -> int:
+        """What the bank pays for `property` and the houses on it"""
+        houses = self.houses[property.index]
+        if houses:
+            return property.cost // 2 + houses * (self.HOUSE_COST.get(property.color, 0) // 2)
+        return property.cost // 2
+
+    def _add_property(self, player, property):
+        """Give `property` to `player`, keeping the per-color counters and asset book in sync"""
+        player.properties[property] = None
+        self.owners[property.index] = player
+        color = property.color_id
+        if color >= 0:
+            player.set_counts[color] = player.set_counts.get(color, 0) + 1
+            if self.houses[property.index] > 0:
+                player.built_counts[color] = player.built_counts.get(color, 0) + 1
+        held = player.holdings.get(color)
+        if held is None:
+            player.holdings[color] = [property]
+        else:
+            held.append(property)
+        player.sale_value += self._sale_value(property)
+        if self.undo is not None:
+            self.undo.added(player, property)
+        if self.income is not None:
+            self.income.changed(color)
+
+    def _remove_property(self, player, property):
+        """Take `property` away from `player`, keeping the per-color counters and asset book in sync"""
+        if self.undo is not None:
+            self.undo.removing(player, property)
+        del player.properties[property]
+        self.owners[property.index] = None
+        color = property.color_id
+        if color >= 0:
+            player.set_counts[color] -= 1
+            if self.houses[property.index] > 0:
+                player.built_counts[color] -= 1
+        player.holdings[color].remove(property)
+        player.sale_value -= self._sale_value(property)
+        if self.income is not None:
+            self.income.changed(color)
+
+    def _set_houses(self, property, houses):
+        """Change the house count on a property and update its owner's built counter and sale value"""
+        owner = self.owners[property.index]
+        color = property.color_id
+        old = self.houses[property.index]
+        if owner is not None:
+            if color >= 0 and (old > 0) != (houses > 0):
+                delta = 1 if houses > 0 else -1
+                owner.built_counts[color] = owner.built_counts.get(color, 0) + delta
+            owner.sale_value += (houses - old) * (self.HOUSE_COST.get(property.color, 0) // 2)
+        self.houses[property.index] = houses
+        if self.undo is not None:
+            self.undo.houses_changed(property, old)
+        if self.income is not None:
+            self.income.changed(color)
 
-        return result
-    
     def buy_property(self, player, property):
-        if property.owner is not None:
-            return f"{property.data['Name']} is already owned by {property.owner.name}!"
-        price = property.data.get('Price', 0)
+        events = self._buy_property(player, property)
+        self._finish()
+        return events
+
+    def _buy_property(self, player, property):
+        """buy_property without the end-of-call checkpoint, for resolving a purchase choice"""
+        owner = self.owners[property.index]
+        if owner is not None:
+            return [(EventKind.ALREADY_OWNED, player, owner, property, 0, None)]
+        price = property.cost
 
         # this will be handled in the UI, but just in case
         if player.money < price:
-            return f"{player.name} does not have enough money to buy {property.data['Name']}!"
+            return [(EventKind.CANNOT_AFFORD, player, None, property, price, None)]
         
+        self._record(JournalOp.PURCHASE, player, property.index, 0, price)
         player.money -= price
-        player.properties.append(property)
-        property.owner = player
-        return f"{player.name} buys {property.data['Name']} for ${price}."
+        self._add_property(player, property)
+        self._touch(player)
+        return [(EventKind.BUY, player, None, property, price, None)]
     
     def transfer_property(self, from_player, to_player, property):
         if property not in from_player.properties:
-            return f"{from_player.name} does not own {property.data['Name']}!"
-        from_player.properties.remove(property)
-        to_player.properties.append(property)
-        property.owner = to_player
-        return f"{from_player.name} transfers {property.data['Name']} to {to_player.name}."
+            return [(EventKind.NOT_OWNER, from_player, None, property, 0, None)]
+        self._record(JournalOp.TRANSFER, from_player, property.index, self.players.index(to_player))
+        self._remove_property(from_player, property)
+        self._add_property(to_player, property)
+        self._touch(from_player, to_player)
+        self._finish()
+        return [(EventKind.TRANSFER, from_player, to_player, property, 0, None)]
     
     def send_money(self, from_player, to_player, amount):
         if from_player.money < amount:
-            return f"{from_player.name} does not have enough money to pay ${amount} to {to_player.name}!"
+            return [(EventKind.CANNOT_PAY, from_player, to_player, None, amount, None)]
+        self._record(JournalOp.PAYMENT, from_player, 0, self.players.index(to_player), amount)
         from_player.money -= amount
         to_player.money += amount
-        return f"{from_player.name} pays ${amount} to {to_player.name}."
+        self._touch(from_player, to_player)
+        self._finish()
+        return [(EventKind.PAY, from_player, to_player, None, amount, None)]
     
     def buy_house(self, player, property, cost_per_house, num=1):
-        if property.owner != player:
-            return f"{player.name} does not own {property.data['Name']}!"
-        if property.houses >= 5:
-            return f"{property.data['Name']} already has a hotel!"
+        if self.owners[property.index] != player:
+            return [(EventKind.NOT_OWNER, player, None, property, 0, None)]
+        houses = self.houses[property.index]
+        if houses >= 5:
+            return [(EventKind.HAS_HOTEL, player, None, property, 0, None)]
+        if houses + num > 5:
+            return [(EventKind.NO_ROOM, player, None, property, 0, 5 - houses)]
         total_cost = num * cost_per_house
         if player.money < total_cost:
-            return f"{player.name} does not have enough money to buy {num} house(s) on {property.data['Name']}!"
+            return [(EventKind.CANNOT_AFFORD_HOUSES, player, None, property, total_cost, num)]
         
-        property.houses += num
+        self._record(JournalOp.BUILD, player, property.index, num, cost_per_house)
+        self._set_houses(property, houses + num)
         player.money -= total_cost
-        return f"{player.name} buys {num} house(s) on {property.data['Name']} for ${total_cost}."
+        self._touch(player)
+        self._finish()
+        return [(EventKind.BUILD, player, None, property, total_cost, num)]
     
+    def raise_funds(self, player, amount, weights=None):
+        """Sell houses and properties back to the bank at half price until `player` holds at
+        least `amount`, choosing the sales that keep the most rent income (see liquidation.py;
+        `weights` are optional per-square landing probabilities). Returns the sale events, or
+        None without selling anything when all of the player's assets would not be enough"""
+        plan = plan_liquidation(self, player, amount, weights)
+        if plan is None:
+            return None
+        events = []
+        for position, count in plan.houses:
+            refund = count * (self.HOUSE_COST.get(position.color, 0) // 2)
+            self._set_houses(position, self.houses[position.index] - count)
+            player.money += refund
+            events.append((EventKind.SELL_HOUSES, player, None, position, refund, count))
+        for position in plan.properties:
+            refund = position.cost // 2
+            self._remove_property(player, position)
+            player.money += refund
+            events.append((EventKind.SELL_PROPERTY, player, None, position, refund, None))
+        if events:
+            self._touch(player)
+        return events
+
+    def settle_debt(self, debtor, creditor, amount):
+        """`debtor` pays `amount` to `creditor` (None for the bank), raising the cash when short
+        and going bankrupt to the creditor when even selling everything would not cover it"""
+        events = []
+        if debtor.money < amount:
+            sales = self.raise_funds(debtor, amount)
+            if sales is None:
+                return self.declare_bankruptcy(debtor, creditor)
+            events += sales
+        debtor.money -= amount
+        if creditor is None:
+            events.append((EventKind.PAY_BANK, debtor, None, None, amount, None))
+        else:
+            creditor.money += amount
+            events.append((EventKind.PAY, debtor, creditor, None, amount, None))
+        return events
+
+    def declare_bankruptcy(self, player, creditor=None):
+        """Remove `player` from the game, handing cash and properties to `creditor` (or the bank)"""
+        self._record(JournalOp.BANKRUPTCY, player, 0, self.players.index(creditor) if creditor is not None else -1)
+        for prop in list(player.properties):
+            self._remove_property(player, prop)
+            if creditor is not None:
+                self._add_property(creditor, prop)
+            else:
+                self._set_houses(prop, 0) # buildings go back to the bank with the property
+        if creditor is not None:
+            creditor.money += player.money
+        player.money = 0
+        player.must_sell = False
+        player.is_bankrupt = True
+        player.bankrupt_turn = self.turns
+
+        active = [p for p in self.players if not p.is_bankrupt]
+        if len(active) <= 1:
+            self.game_over = True
+            self.state = GameState.GAME_OVER
+            self.winner = active[0] if active else None
+        self._touch(*self.players, meta=True)
+        return [(EventKind.BANKRUPT, player, creditor, None, 0, None)]
+
+    # Pending actions are plain data so they can be snapshotted and forked; these build them
+    def purchase_action(self, player, position) -> PendingAction:
+        return PendingAction(
+            action_type="property_purchase",
+            player=player,
+            description=f"Do you want to buy {position.name} for ${position.cost}?",
+            choices=["buy", "pass"],
+            data={"property": position, "cost": position.cost}
+        )
+
+    def rent_action(self, player, owner, rent, position) -> PendingAction:
+        return PendingAction(
+            action_type="must_pay_rent",
+            player=player,
+            description=f"You owe ${rent} to {owner.name} for {position.name}. You must sell assets or declare bankruptcy.",
+            choices=["sell_assets", "declare_bankruptcy"],
+            data={"rent": rent, "owner": owner.name, "square": position.index}
+        )
+
+    def pay_choice_action(self, player, amount, other_players) -> PendingAction:
+        return PendingAction(
+            action_type="choose_player_to_pay",
+            player=player,
+            description=f"Choose a player to pay ${amount} to:",
+            choices=[p.name for p in other_players],
+            data={"amount": amount}
+        )
+
+    def find_player(self, name) -> Optional[Player]:
+        return next((p for p in self.players if p.name == name), None)
+
+    def _resolve_purchase(self, action, choice):
+        player, position = action.player, action.data["property"]
+        if choice == "buy":
+            return self._buy_property(player, position)
+        return [(EventKind.PASS, player, None, position, 0, None)]
+
+    def _resolve_pay_choice(self, action, choice):
+        player, amount = action.player, action.data["amount"]
+        chosen_player = self.find_player(choice)
+        if chosen_player is None:
+            return [(EventKind.INVALID_CHOICE, player, None, None, 0, choice)]
+        return self.settle_debt(player, chosen_player, amount)
+
+    def _resolve_rent(self, action, choice):
+        return self._resolve_rent_debt(action.player, self.find_player(action.data["owner"]), action.data["rent"], choice)
+
+    def _resolve_rent_debt(self, player, creditor, rent, choice):
+        """must_pay_rent: sell assets to cover the rent, or go bankrupt"""
+        if choice == "sell_assets":
+            sales = self.raise_funds(player, rent)
+            if sales is not None:
+                player.money -= rent
+                creditor.money += rent
+                return sales + [(EventKind.SELL_AND_PAY_RENT, player, creditor, None, rent, None)]
+        return self.declare_bankruptcy(player, creditor)
+
+    _PENDING_HANDLERS = {
+        "property_purchase": _resolve_purchase,
+        "choose_player_to_pay": _resolve_pay_choice,
+        "must_pay_rent": _resolve_rent,
+    }
+
+    def owner_of(self, position) -> Optional[Player]:
+        return self.owners[position.index]
+
+    def houses_on(self, position) -> int:
+        return self.houses[position.index]
+
     def owns_set(self, player, color) -> bool:
         props = self.board.color_groups.get(color)
         if not props:
             return False
         # all positions in that color group must be owned by `player`
-        return all(getattr(p, "owner", None) == player for p in props)
+        return player.set_counts.get(COLORS.ids[color], 0) == len(props)
 
     def has_houses(self, player, color) -> bool:
-        props = self.board.color_groups.get(color)
-        if not props:
-            return False
         # any of the player's properties in that color has houses > 0
-        return any(getattr(p, "owner", None) == player and getattr(p, "houses", 0) > 0
-                   for p in props)
+        return player.built_counts.get(COLORS.ids.get(color), 0) > 0
 
     def calculate_rent(self, player, position) -> int:
-        owner = position.owner
+        owner = self.owners[position.index]
         if owner is None or owner == player:
             return 0
 
-        color = position.color or position.data.get("Color")
-        mapping = MillionaireMonopoly.RENT_MAPPING.get(color)
-        if mapping is None:
-            return 0  # safe guard if code is wrong & no mapping exists
-
-        idx = max(0, min(getattr(position, "houses", 0), len(mapping) - 1))
-        rent = mapping[idx]
-
+        table = self.rent_table
+        idx = position.index
+        color = position.color_id
         # double rent if owner has the full set and NO houses anywhere in that set
-        if self.owns_set(owner, color) and not self.has_houses(owner, color):
-            rent *= 2
-
-        return rent
-
-    def move_player(self, steps, upgrade_mover=False) -> None:
-        player = self.players[self.current_player_index]
-        for _ in range(steps):
-            player.position = player.position.next
-            if player.position.data['Name'] == 'Go':
-                bonus = self.GO_BONUS[player.mover_level] # mover level determines bonus
-                if upgrade_mover and player.mover_level < 2:
-                    player.mover_level += 1
-                    print(f"{player.name} upgrades their mover to level {player.mover_level}!")
-                    bonus -= 50_000 
-                player.money += bonus
-                print(f"{player.name} passed Go and collects ${bonus}!")
-        
-        position_name = player.position.data['Name']
-
-        if position_name == 'Go to Jail':
-            _go_to_jail(self, player)
-            print(f"{player.name} goes directly to Jail!")
-        elif position_name == 'Chance':
-            if self.chance_deck:
-                card = self.chance_deck.popleft()
-                result = card.apply(self, player)
-                print(f"Chance Card: {card.desc} -> {result}")
-                self.chance_deck.append(card)
-            else:
-                print("Chance deck is empty!")
-        elif position_name == 'Millionaire Lifestyle':
-            if self.millionaire_deck:
-                card = self.millionaire_deck.popleft()
-                result = card.apply(self, player)
-                print(f"Millionaire Card: {card.desc} -> {result}")
-                self.millionaire_deck.append(card)
-            else:
-                print("Millionaire deck is empty!")
-        else:
-            # calculate the effect of landing on the new position
-            cost = self.calculate_rent(player, player.position)
-            if cost > 0:
-                if player.money < cost:
-                    player.must_sell = True
-                    print(f"{player.name} cannot pay rent of ${cost} to {player.position.owner.name} (insufficient funds)")
-                else:
-                    player.money -= cost
-                    player.position.owner.money += cost
-                    print(f"{player.name} pays ${cost} rent to {player.position.owner.name} for landing on {player.position.data['Name']}")
-
-        self.current_player_index = (self.current_player_index + 1) % len(self.players)        
-    
+        doubled = owner.set_counts.get(color, 0) == table.set_sizes[idx] and not owner.built_counts.get(color)
+        return table.rents[(idx * RENT_LEVELS + self.houses[position.index]) * 2 + doubled]
 
 if __name__ == "__main__":
-    loc = [{'Name' : 'Go'}, 
-           {'Name' : 'Motor Drive', 'Price': 5_000, 'Color': 'Brown'},
-           {'Name' : 'Millionaire Lifestyle'},
-           {'Name' : 'Gadget Wharf', 'Price': 5_000, 'Color': 'Brown'},
-           {'Name' : 'Surfer\'s Cove', 'Price': 15_000, 'Color': 'Light Blue'},
-           {'Name' : 'Chance'},
-           {'Name' : 'Aqua Park Resort', 'Price': 15_000, 'Color': 'Light Blue'},
-           {'Name' : 'Lakeside Marina', 'Price': 20_000, 'Color': 'Light Blue'},
-           {'Name' : 'Jail'},
-           {'Name' : 'Castle View', 'Price': 35_000, 'Color': 'Pink'},
-           {'Name' : 'Dream Avenue', 'Price': 35_000, 'Color': 'Pink'},
-           {'Name' : 'Palace Gardens', 'Price': 40_000, 'Color': 'Pink'},
-           {'Name' : 'Adventure Park', 'Price': 55_000, 'Color': 'Orange'},
-           {'Name' : 'Millionaire Lifestyle'},
-           {'Name' : 'Themepark City', 'Price': 55_000, 'Color': 'Orange'},
-           {'Name' : 'Movie District', 'Price': 60_000, 'Color': 'Orange'},
-           {'Name' : 'Free Parking'},
-           {'Name' : 'Style Square', 'Price': 80_000, 'Color': 'Red'},
-           {'Name' : 'Chance'},
-           {'Name' : 'Party Plaza', 'Price': 80_000, 'Color': 'Red'},
-           {'Name' : 'Showtime Boulevard', 'Price': 90_000, 'Color': 'Red'},
-           {'Name' : 'Sunshine Bay', 'Price': 115_000, 'Color': 'Yellow'},
-           {'Name' : 'Bling Beach', 'Price': 115_000, 'Color': 'Yellow'},
-           {'Name' : 'Yacht Harbor', 'Price': 120_000, 'Color': 'Yellow'},
-           {'Name' : 'Go to Jail'},
-           {'Name' : 'Treetop Retreat', 'Price': 145_000, 'Color': 'Green'},
-           {'Name' : 'Ski Mountain', 'Price': 145_000, 'Color': 'Green'},
-           {'Name' : 'Millionaire Lifestyle'},
-           {'Name' : 'Diamond Hills', 'Price': 150_000, 'Color': 'Green'},
-           {'Name' : 'Chance'},
-           {'Name' : 'Fortune Valley', 'Price': 170_000, 'Color': 'Dark Blue'},
-           {'Name' : 'Paradise Island', 'Price': 200_000, 'Color': 'Dark Blue'},]
-
-
-    ll = MonopolyBoard()
-    for item in loc:
-        ll.append(item)
-
-    game = MillionaireMonopoly(ll, ['Alice', 'Bob', 'Charlie'])
+    game = MillionaireMonopoly(build_default_board(), ['Alice', 'Bob', 'Charlie'])
     brown_props = game.board.color_groups.get('Brown', [])
     for p in brown_props:
         game.buy_property(game.players[0], p)  # Alice buys both brown properties
@@ -640,7 +1491,7 @@ if __name__ == "__main__":
 
     print("Initial Player States:")
     for p in game.players:
-        print(f'player: {p.name}, position: {p.position.data["Name"]}, money: {p.money}')
+        print(f'player: {p.name}, position: {p.position.name}, money: {p.money}')
     
     
     # Simulate a few turns
@@ -649,12 +1500,14 @@ if __name__ == "__main__":
 
         steps = game.d1 + game.d2
         print(f"\nTurn {turn + 1}: Dice rolled: {game.d1} + {game.d2} = {steps}")
-        game.move_player(steps, upgrade_mover=True)
-        print(f"{game.players[turn % len(game.players)].name} moved to: {game.players[turn % len(game.players)].position.data['Name']}")
+        print(describe(game.move_player(steps, upgrade_mover=True)))
+        if game.pending_action:
+            # take the first option, a human would pick one from the frontend
+            print(f"{game.pending_action.description} -> {describe(game.handle_pending_choice(game.pending_action.choices[0]))}")
 
     print("\nFinal Player States:")
     for p in game.players:
-        print(f'player: {p.name}, position: {p.position.data["Name"]}, money: {p.money}')
+        print(f'player: {p.name}, position: {p.position.name}, money: {p.money}')
 
 
 
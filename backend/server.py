@@ -0,0 +1,546 @@
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import re
+import signal
+import struct
+import threading
+import uuid
+import zlib
+from typing import Dict, Optional
+
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+
+from analytics import ExpectedIncome
+from journal import Journal, ReplayError, replay
+from metrics import GameMetrics
+from monopoly_engine import MillionaireMonopoly, default_board, describe, event_dict
+from simulator import POLICIES
+
+# HTTP service hosting many concurrent games.
+#
+# Every game has its own lock, so requests for different games never wait on each other;
+# the registry lock is only held to add, look up or drop a game. For more than one core,
+# run_sharded starts one worker process per shard and a router process in front of them.
+# A game lives on shard crc32(game_id) % num_shards and the router forwards every request
+# for that id there, so a game's state never leaves its process.
+#
+# GET /games/<id>/events is a server-sent event stream: the full state first ("state"), then
+# one "update" per engine call, carrying the events and state delta from
+# MillionaireMonopoly.subscribe. Clients apply updates in order and skip any whose version is
+# not newer than the last state they hold.
+#
+# With a journal directory every game is journaled to <dir>/<game_id>.journal, and on startup
+# each shard replays the journals of its games so they survive a restart. A journal that can't
+# be replayed is logged and renamed to <game_id>.journal.failed (and .failed.snap) so the shard
+# still starts with the rest.
+#
+# Every game carries an analytics.ExpectedIncome, so states and deltas include each player's
+# expected rent per opponent turn ("expected_income", in player order).
+#
+# With --metrics every game gets a metrics.GameMetrics: GET /games/<id>/metrics returns one
+# game's, GET /metrics the totals of a shard (games already deleted included) and, on the
+# router, each shard's totals.
+
+# Messages a stream client may fall behind by before its backlog is replaced with a full state
+STREAM_QUEUE_SIZE = 64
+# Seconds between keep-alive comments on an idle stream
+STREAM_KEEPALIVE = 15.0
+# Longest player name in UTF-8 bytes; snapshots store names with a one-byte length
+MAX_NAME_BYTES = 255
+# Most turns one POST /games/<id>/run may play; the game is locked for the whole run
+MAX_RUN_TURNS = 1000
+# Game ids a client may choose; they name journal files, so nothing that reaches outside the directory
+GAME_ID = re.compile(r"[0-9A-Za-z_-]{1,64}")
+
+log = logging.getLogger(__name__)
+
+
+def shard_for(game_id: str, num_shards: int) -> int:
+    return zlib.crc32(game_id.encode()) % num_shards
+
+
+def valid_game_id(game_id) -> bool:
+    return isinstance(game_id, str) and GAME_ID.fullmatch(game_id) is not None
+
+
+class GameEntry:
+    """ A hosted game and the lock that serialises requests against it """
+    __slots__ = ('game', 'lock', 'journal')
+
+    def __init__(self, game: MillionaireMonopoly, journal: Optional[Journal] = None):
+        self.game = game
+        self.lock = threading.Lock()
+        self.journal = journal
+
+
+class GameRegistry:
+    """ The games hosted by one process """
+    def __init__(self, shard: int = 0, num_shards: int = 1, journal_dir: Optional[str] = None,
+                 fsync: str = "batch", metrics: bool = False):
+        self.shard = shard
+        self.num_shards = num_shards
+        self.journal_dir = journal_dir
+        self.fsync = fsync
+        self.metrics = metrics
+        self._retired = GameMetrics() # metrics of removed games, still part of the totals
+        self._games: Dict[str, GameEntry] = {}
+        self._lock = threading.Lock()
+
+    def _journal_path(self, game_id: str) -> str:
+        return os.path.join(self.journal_dir, f"{game_id}.journal")
+
+    def recover(self) -> int:
+        """ Replay the journals of this shard's games, skipping any that fail. Returns how many games
+        were restored """
+        restored = 0
+        for filename in sorted(os.listdir(self.journal_dir)):
+            game_id, ext = os.path.splitext(filename)
+            if ext != ".journal" or shard_for(game_id, self.num_shards) != self.shard:
+                continue
+            path = self._journal_path(game_id)
+            try:
+                game = replay(path, default_board())
+            except (ReplayError, ValueError, LookupError, struct.error, OSError) as exc:
+                log.error("shard %d: can't recover game %s, moving its journal aside: %s", self.shard, game_id, exc)
+                for name, aside in ((path, path + ".failed"), (path + ".snap", path + ".failed.snap")):
+                    if os.path.exists(name):
+                        os.replace(name, aside)
+                continue
+            ExpectedIncome(game)
+            if self.metrics:
+                GameMetrics(game)
+            self._games[game_id] = GameEntry(game, Journal(path, game, fsync=self.fsync, append=True))
+            restored += 1
+        return restored
+
+    def create(self, players, seed: Optional[int] = None, game_id: Optional[str] = None) -> str:
+        game_id = game_id or uuid.uuid4().hex
+        if not valid_game_id(game_id):
+            raise ValueError(f"game_id must match {GAME_ID.pattern}")
+        if shard_for(game_id, self.num_shards) != self.shard:
+            raise ValueError(f"game {game_id} belongs to shard {shard_for(game_id, self.num_shards)}")
+        rng = random.Random(seed) if seed is not None else None
+        game = MillionaireMonopoly(default_board(), players, rng=rng)
+        ExpectedIncome(game)
+        if self.metrics:
+            GameMetrics(game)
+        with self._lock:
+            if game_id in self._games:
+                raise ValueError(f"game {game_id} already exists")
+            journal = Journal(self._journal_path(game_id), game, fsync=self.fsync) if self.journal_dir else None
+            self._games[game_id] = GameEntry(game, journal)
+        return game_id
+
+    def get(self, game_id: str) -> Optional[GameEntry]:
+        # dict reads are atomic, no need to take the registry lock
+        return self._games.get(game_id)
+
+    def remove(self, game_id: str) -> bool:
+        with self._lock:
+            entry = self._games.pop(game_id, None)
+        if entry is None:
+            return False
+        if entry.game.metrics is not None:
+            with entry.lock, self._lock:
+                self._retired.merge(entry.game.metrics)
+        if entry.journal is not None:
+            with entry.lock:
+                entry.journal.close()
+            os.remove(entry.journal.path)
+            os.remove(entry.journal.path + ".snap")
+        return True
+
+    def total_metrics(self) -> Optional[GameMetrics]:
+        """ Metrics of every game this registry has hosted, None when metrics are off """
+        if not self.metrics:
+            return None
+        total = GameMetrics()
+        with self._lock:
+            total.merge(self._retired)
+        for entry in list(self._games.values()):
+            with entry.lock:
+                total.merge(entry.game.metrics)
+        return total
+
+    def close(self):
+        """ Flush every journal """
+        for entry in list(self._games.values()):
+            if entry.journal is not None:
+                with entry.lock:
+                    entry.journal.close()
+
+    def __len__(self):
+        return len(self._games)
+
+
+_RESYNC = object()
+
+
+class Subscription:
+    """ Bounded message queue for one stream client. A slow client never blocks the game: when its
+    queue is full the backlog is dropped and the client is sent the full state instead """
+    __slots__ = ('queue',)
+
+    def __init__(self, maxsize: int = STREAM_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize)
+
+    def push(self, message):
+        # called under the game lock, so this is the only producer
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            try:
+                while True:
+                    self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(_RESYNC)
+
+
+def _sse(event: str, payload) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _error(message: str, status: int):
+    return jsonify({"error": message}), status
+
+
+def _turns_error(body: dict) -> Optional[str]:
+    """ Why the "turns" of a /run request is rejected, or None when it is fine """
+    turns = body.get("turns", 1)
+    if isinstance(turns, bool) or not isinstance(turns, int) or not 0 <= turns <= MAX_RUN_TURNS:
+        return f"turns must be an integer from 0 to {MAX_RUN_TURNS}"
+    return None
+
+
+def _json_body() -> Optional[dict]:
+    """ The request's JSON object ({} without a body), or None when the body is something else """
+    body = request.get_json(silent=True) or {}
+    return body if isinstance(body, dict) else None
+
+
+def create_app(registry: Optional[GameRegistry] = None) -> Flask:
+    """ Flask app serving the games in `registry` """
+    registry = registry if registry is not None else GameRegistry()
+    app = Flask(__name__)
+    CORS(app)
+    app.config["registry"] = registry
+
+    def with_game(game_id, fn):
+        entry = registry.get(game_id)
+        if entry is None:
+            return _error(f"no game {game_id}", 404)
+        with entry.lock:
+            return fn(entry.game)
+
+    @app.get("/health")
+    def health():
+        return jsonify({"shard": registry.shard, "games": len(registry)})
+
+    @app.get("/metrics")
+    def metrics():
+        total = registry.total_metrics()
+        if total is None:
+            return _error("metrics are off, start the server with --metrics", 404)
+        return jsonify(dict(total.snapshot(), shard=registry.shard, games=len(registry)))
+
+    @app.post("/games")
+    def create_game():
+        body = _json_body()
+        if body is None:
+            return _error("body must be a JSON object", 400)
+        players = body.get("players")
+        if not players or not isinstance(players, list) or len(players) < 2:
+            return _error("players must be a list of at least two names", 400)
+        if not all(isinstance(name, str) and name for name in players):
+            return _error("player names must be non-empty strings", 400)
+        if len(set(players)) != len(players):
+            return _error("player names must be unique", 400)
+        if any(len(name.encode()) > MAX_NAME_BYTES for name in players):
+            return _error(f"player names must be at most {MAX_NAME_BYTES} bytes in UTF-8", 400)
+        game_id, seed = body.get("game_id"), body.get("seed")
+        if game_id is not None and not valid_game_id(game_id):
+            return _error(f"game_id must match {GAME_ID.pattern}", 400)
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, (int, str))):
+            return _error("seed must be an integer or a string", 400)
+        try:
+            game_id = registry.create(players, seed=seed, game_id=game_id)
+        except ValueError as exc:
+            return _error(str(exc), 409)
+        return with_game(game_id, lambda game: (jsonify({"game_id": game_id, "state": game.get_game_state()}), 201))
+
+    @app.delete("/games/<game_id>")
+    def delete_game(game_id):
+        if not registry.remove(game_id):
+            return _error(f"no game {game_id}", 404)
+        return jsonify({"deleted": game_id})
+
+    @app.get("/games/<game_id>/metrics")
+    def game_metrics(game_id):
+        def run(game):
+            metrics = game.get_metrics()
+            if metrics is None:
+                return _error("metrics are off, start the server with --metrics", 404)
+            return jsonify(metrics)
+        return with_game(game_id, run)
+
+    @app.get("/games/<game_id>/state")
+    def game_state(game_id):
+        since = request.args.get("since", type=int)
+        return with_game(game_id, lambda game: jsonify(
+            game.get_game_state() if since is None else game.get_state_delta(since)))
+
+    @app.post("/games/<game_id>/roll")
+    def roll(game_id):
+        def run(game):
+            if not game.roll_dice():
+                return _error("cannot roll now", 409)
+            return jsonify({"dice": [game.d1, game.d2], "version": game.version})
+        return with_game(game_id, run)
+
+    @app.post("/games/<game_id>/move")
+    def move(game_id):
+        # the player moves by the dice the server rolled; clients never choose the distance
+        body = _json_body()
+        if body is None:
+            return _error("body must be a JSON object", 400)
+        if "steps" in body:
+            return _error("steps are not accepted, the move uses the rolled dice", 400)
+        def run(game):
+            if not game.can_make_move():
+                return _error("cannot move now", 409)
+            events = game.move_player(upgrade_mover=bool(body.get("upgrade_mover")))
+            return jsonify({"result": describe(events), "events": [event_dict(e) for e in events],
+                            "version": game.version, "pending_action": game.get_game_state().get("pending_action")})
+        return with_game(game_id, run)
+
+    @app.post("/games/<game_id>/choice")
+    def choice(game_id):
+        body = _json_body()
+        if body is None:
+            return _error("body must be a JSON object", 400)
+        def run(game):
+            if game.pending_action is None:
+                return _error("no pending action", 409)
+            if body.get("choice") not in game.pending_action.choices:
+                return _error(f"choice must be one of {game.pending_action.choices}", 400)
+            events = game.handle_pending_choice(body["choice"])
+            return jsonify({"result": describe(events), "events": [event_dict(e) for e in events],
+                            "version": game.version, "pending_action": game.get_game_state().get("pending_action")})
+        return with_game(game_id, run)
+
+    @app.post("/games/<game_id>/run")
+    def run(game_id):
+        # bot seats play until a human seat has to act: {"policies": ["greedy", null, ...], "turns": n}
+        body = _json_body()
+        if body is None:
+            return _error("body must be a JSON object", 400)
+        names = body.get("policies")
+        turns = body.get("turns", 1)
+        if not isinstance(names, list) or any(name is not None and name not in POLICIES for name in names):
+            return _error(f"policies must list one of {sorted(POLICIES)} or null per seat", 400)
+        problem = _turns_error(body)
+        if problem is not None:
+            return _error(problem, 400)
+
+        def run_game(game):
+            if len(names) != len(game.players):
+                return _error(f"policies must have one entry per player ({len(game.players)})", 400)
+            # bots get their own RNG: the journal replays the engine's draws and the recorded
+            # choices, so a bot drawing from game.rng would make replay diverge
+            rng = random.Random(f"{game_id}:{game.version}")
+            policies = [POLICIES[name]() if name else None for name in names]
+            for policy in policies:
+                if policy is not None:
+                    policy.rng = rng
+            summary = game.run_turns(turns, policies)
+            return jsonify(dict(summary.to_dict(), version=game.version))
+        return with_game(game_id, run_game)
+
+    @app.get("/games/<game_id>/events")
+    def events(game_id):
+        entry = registry.get(game_id)
+        if entry is None:
+            return _error(f"no game {game_id}", 404)
+        subscription = Subscription(app.config.get("STREAM_QUEUE_SIZE", STREAM_QUEUE_SIZE))
+        with entry.lock:
+            first = entry.game.get_game_state()
+            unsubscribe = entry.game.subscribe(subscription.push)
+
+        def stream():
+            sent = first["version"]
+            try:
+                yield _sse("state", first)
+                while True:
+                    try:
+                        message = subscription.queue.get(timeout=STREAM_KEEPALIVE)
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+                        continue
+                    if message is _RESYNC:
+                        with entry.lock:
+                            state = entry.game.get_game_state()
+                        sent = state["version"]
+                        yield _sse("state", state)
+                    elif message["version"] > sent:
+                        sent = message["version"]
+                        yield _sse("update", message)
+            finally:
+                with entry.lock:
+                    unsubscribe()
+
+        return Response(stream(), content_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    return app
+
+
+def create_router(shard_urls) -> Flask:
+    """ Front app that forwards each request to the shard owning its game id """
+    app = Flask(__name__)
+    CORS(app)
+    local = threading.local()
+    hosts = [url.split("://", 1)[-1].rstrip("/") for url in shard_urls]
+
+    def connection(shard) -> http.client.HTTPConnection:
+        # one keep-alive connection per router thread and shard
+        conns = getattr(local, "conns", None)
+        if conns is None:
+            conns = local.conns = {}
+        conn = conns.get(shard)
+        if conn is None:
+            conn = conns[shard] = http.client.HTTPConnection(hosts[shard], timeout=60)
+        return conn
+
+    def send(conn, path, body, headers):
+        conn.request(request.method, path, body=body, headers=headers)
+        return conn.getresponse()
+
+    def forward(shard, path, body=None):
+        headers = {"Content-Type": request.headers.get("Content-Type", "application/json")}
+        conn = connection(shard)
+        reused = conn.sock is not None
+        try:
+            try:
+                upstream = send(conn, path, body, headers)
+            except (http.client.HTTPException, OSError) as exc:
+                conn.close()
+                # resend only what the shard can't have acted on: a GET, or any request that found
+                # its kept-alive connection already closed by the shard
+                stale = reused and isinstance(exc, (http.client.RemoteDisconnected, BrokenPipeError))
+                if request.method != "GET" and not stale:
+                    raise
+                upstream = send(conn, path, body, headers)
+        except (http.client.HTTPException, OSError) as exc:
+            conn.close()
+            return Response(json.dumps({"error": f"shard {shard} unavailable: {exc}"}), status=502,
+                            content_type="application/json")
+        content_type = upstream.getheader("Content-Type", "application/json")
+        if content_type.startswith("text/event-stream"):
+            # a stream holds its connection open, so take it out of the pool
+            local.conns.pop(shard)
+
+            def relay():
+                try:
+                    while True:
+                        chunk = upstream.read1(65536)
+                        if not chunk:
+                            break
+                        yield chunk
+                finally:
+                    conn.close()
+            return Response(relay(), status=upstream.status, content_type=content_type,
+                            headers={"Cache-Control": "no-cache"})
+        return Response(upstream.read(), status=upstream.status, content_type=content_type)
+
+    @app.get("/health")
+    def health():
+        return jsonify({"shards": len(hosts)})
+
+    @app.get("/metrics")
+    def metrics():
+        return jsonify({"shards": [json.loads(forward(shard, "/metrics").get_data()) for shard in range(len(hosts))]})
+
+    @app.post("/games")
+    def create_game():
+        body = request.get_json(silent=True) or {}
+        if not isinstance(body, dict):
+            return _error("body must be a JSON object", 400)
+        game_id = body.setdefault("game_id", uuid.uuid4().hex)
+        if not valid_game_id(game_id):
+            return _error(f"game_id must match {GAME_ID.pattern}", 400)
+        return forward(shard_for(game_id, len(hosts)), "/games", json.dumps(body).encode())
+
+    @app.route("/games/<game_id>", methods=["DELETE"])
+    @app.route("/games/<game_id>/<path:action>", methods=["GET", "POST"])
+    def game_request(game_id, action=None):
+        if action == "run" and request.method == "POST":
+            # refuse oversized runs here rather than tie up a shard thread with them
+            body = _json_body()
+            problem = "body must be a JSON object" if body is None else _turns_error(body)
+            if problem is not None:
+                return _error(problem, 400)
+        path = request.full_path.rstrip("?")
+        return forward(shard_for(game_id, len(hosts)), path, request.get_data() or None)
+
+    return app
+
+
+def serve(registry: GameRegistry, host: str, port: int):
+    """ Recover journaled games, serve until interrupted, then flush the journals """
+    if registry.journal_dir:
+        os.makedirs(registry.journal_dir, exist_ok=True)
+        registry.recover()
+    try:
+        create_app(registry).run(host=host, port=port, threaded=True)
+    finally:
+        registry.close()
+
+
+def _serve_shard(shard: int, num_shards: int, host: str, port: int, journal_dir: Optional[str], fsync: str,
+                 metrics: bool):
+    serve(GameRegistry(shard, num_shards, journal_dir, fsync, metrics), host, port)
+
+
+def run_sharded(num_shards: int, host: str = "127.0.0.1", port: int = 5000, journal_dir: Optional[str] = None,
+                fsync: str = "batch", metrics: bool = False):
+    """ Start `num_shards` worker processes on port+1.. and serve the router on `port` """
+    shard_ports = [port + 1 + i for i in range(num_shards)]
+    workers = [multiprocessing.Process(target=_serve_shard,
+                                       args=(i, num_shards, host, p, journal_dir, fsync, metrics), daemon=True)
+               for i, p in enumerate(shard_ports)]
+    for worker in workers:
+        worker.start()
+    try:
+        create_router([f"http://{host}:{p}" for p in shard_ports]).run(host=host, port=port, threaded=True)
+    finally:
+        # SIGINT so each shard flushes its journals on the way out
+        for worker in workers:
+            os.kill(worker.pid, signal.SIGINT)
+        for worker in workers:
+            worker.join(5)
+            if worker.is_alive():
+                worker.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Millionaire Monopoly games over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--shards", type=int, default=1,
+                        help="worker processes; with more than one, a router on --port forwards to them")
+    parser.add_argument("--journal-dir", default=None, help="journal every game here and recover them on startup")
+    parser.add_argument("--fsync", default="batch", choices=["always", "batch", "never"])
+    parser.add_argument("--metrics", action="store_true", help="instrument every game, see GET /metrics")
+    args = parser.parse_args()
+
+    if args.shards > 1:
+        run_sharded(args.shards, args.host, args.port, args.journal_dir, args.fsync, args.metrics)
+    else:
+        serve(GameRegistry(journal_dir=args.journal_dir, fsync=args.fsync, metrics=args.metrics), args.host, args.port)
@@ -0,0 +1,270 @@
+import argparse
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+from dice import BlockDice
+from monopoly_engine import MillionaireMonopoly, PendingAction, default_board
+
+# Headless driver for running many complete games without a human in the loop.
+# Every seat is played by a bot policy, every game gets its own seeded RNG, and
+# batches of games are fanned out across processes and merged into one summary.
+
+
+class BotPolicy:
+    """ Answers every PendingAction for a bot seat. Subclasses override the decision hooks """
+    upgrade_mover = True
+    # where chance decisions draw from; None uses the game's RNG, which a journaled game must not
+    # share with its bots since replay only repeats the engine's own draws
+    rng: Optional[random.Random] = None
+
+    def choose(self, game: MillionaireMonopoly, action: PendingAction) -> str:
+        if action.action_type == "property_purchase":
+            return "buy" if self.should_buy(game, action.player, action.data["property"]) else "pass"
+        if action.action_type == "choose_player_to_pay":
+            return self.player_to_pay(game, action.player, action.choices)
+        if action.action_type == "must_pay_rent":
+            return "sell_assets" if self.can_cover(game, action.player, action.data["rent"]) else "declare_bankruptcy"
+        return action.choices[0]
+
+    def should_buy(self, game, player, position) -> bool:
+        return player.money >= position.cost
+
+    def player_to_pay(self, game, player, choices: List[str]) -> str:
+        # pay the poorest opponent, they are the least likely to win with it
+        by_name = {p.name: p for p in game.players}
+        return min(choices, key=lambda name: by_name[name].money)
+
+    def can_cover(self, game, player, amount) -> bool:
+        return net_worth(game, player) >= amount
+
+    def build(self, game, player):
+        """ Called at the start of the bot's turn, before rolling """
+
+
+class GreedyPolicy(BotPolicy):
+    """ Buys everything it can afford and builds on every full set """
+
+    def build(self, game, player):
+        _build_houses(game, player, reserve=0)
+
+
+class CautiousPolicy(BotPolicy):
+    """ Keeps a cash reserve for rent and builds only with money above it """
+    reserve = 100_000
+
+    def should_buy(self, game, player, position) -> bool:
+        return player.money - position.cost >= self.reserve
+
+    def build(self, game, player):
+        _build_houses(game, player, reserve=self.reserve)
+
+
+class RandomPolicy(BotPolicy):
+    """ Picks uniformly among the offered choices, using `rng` or else the game's RNG """
+    upgrade_mover = False
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng
+
+    def choose(self, game, action) -> str:
+        return (self.rng or game.rng).choice(action.choices)
+
+
+class FixedPolicy(BotPolicy):
+    """ The fixed rules built into vector_engine: buy above a reserve, build above a reserve,
+    and declare bankruptcy instead of selling when rent can't be paid """
+    buy_reserve = 0
+    build_reserve = 50_000
+
+    def should_buy(self, game, player, position) -> bool:
+        return player.money - position.cost >= self.buy_reserve
+
+    def can_cover(self, game, player, amount) -> bool:
+        return False
+
+    def build(self, game, player):
+        _build_houses(game, player, reserve=self.build_reserve)
+
+
+POLICIES = {
+    "greedy": GreedyPolicy,
+    "cautious": CautiousPolicy,
+    "random": RandomPolicy,
+    "fixed": FixedPolicy,
+}
+
+
+# dice source per game, built from the game's seed; "rng" rolls the game's own Random
+DICE_SOURCES = {
+    "rng": lambda seed: None,
+    "block": BlockDice,
+}
+
+
+def net_worth(game, player) -> int:
+    """ Cash plus what the bank would pay for the player's houses and properties """
+    return player.money + player.sale_value
+
+
+def _build_houses(game, player, reserve):
+    """ Add one house at a time to the least developed property of each full set """
+    for color, props in game.board.color_groups.items():
+        if not game.owns_set(player, color):
+            continue
+        cost = game.HOUSE_COST.get(color, 0)
+        while True:
+            target = min(props, key=lambda p: game.houses[p.index])
+            if game.houses[target.index] >= 5 or player.money - cost < reserve:
+                break
+            game.buy_house(player, target, cost)
+
+
+def game_seed(seed: int, game_index: int) -> int:
+    """ Seed for one game, derived from the run seed so that results never depend on how games are split """
+    return (seed * 0x9E3779B1 + game_index) & 0xFFFFFFFFFFFF
+
+
+def new_game(seed: int, num_players: int, dice: str = "rng") -> MillionaireMonopoly:
+    """ The game play_game plays for `seed`, so single games can be rebuilt outside a batch """
+    return MillionaireMonopoly(default_board(), [f"P{i}" for i in range(num_players)],
+                               rng=random.Random(seed), dice=DICE_SOURCES[dice](seed))
+
+
+def play_game(seed: int, policy_names: Sequence[str], max_turns: int = 2000, dice: str = "rng",
+              policies: Dict[str, Callable[[], BotPolicy]] = POLICIES):
+    """ Play one game to completion (or max_turns). Returns (winner_seat, turns, bankrupt_turns, timed_out).
+    `policies` maps names to policy factories, one fresh policy per seat """
+    game = new_game(seed, len(policy_names), dice)
+    game.run_turns(max_turns, [policies[name]() for name in policy_names])
+    return game_result(game)
+
+
+def game_result(game: MillionaireMonopoly):
+    """ (winner_seat, turns, bankrupt_turns, timed_out) of a game played by play_game or alike """
+    seat_of = {p: i for i, p in enumerate(game.players)}
+
+    timed_out = not game.game_over
+    if timed_out:
+        # richest surviving player wins a game that hit the turn limit
+        winner = max((p for p in game.players if not p.is_bankrupt), key=lambda p: net_worth(game, p))
+    else:
+        winner = game.winner
+    return seat_of[winner], game.turns, [p.bankrupt_turn for p in game.players], timed_out
+
+
+class SimulationResult:
+    """ Aggregate statistics over many games. Mergeable, so workers can summarise their own chunk """
+    def __init__(self, seats: int):
+        self.seats = seats
+        self.games = 0
+        self.timeouts = 0
+        self.wins = [0] * seats
+        self.length_hist: Counter = Counter()  # game length in turns -> games
+        self.bankruptcies = [0] * seats
+        self.bankrupt_turn_total = [0] * seats
+
+    def add(self, winner: int, turns: int, bankrupt_turns: List[Optional[int]], timed_out: bool):
+        self.games += 1
+        self.timeouts += timed_out
+        self.wins[winner] += 1
+        self.length_hist[turns] += 1
+        for seat, turn in enumerate(bankrupt_turns):
+            if turn is not None:
+                self.bankruptcies[seat] += 1
+                self.bankrupt_turn_total[seat] += turn
+
+    def merge(self, other: 'SimulationResult'):
+        self.games += other.games
+        self.timeouts += other.timeouts
+        self.length_hist.update(other.length_hist)
+        for seat in range(self.seats):
+            self.wins[seat] += other.wins[seat]
+            self.bankruptcies[seat] += other.bankruptcies[seat]
+            self.bankrupt_turn_total[seat] += other.bankrupt_turn_total[seat]
+
+    def win_rates(self) -> List[float]:
+        return [w / self.games if self.games else 0.0 for w in self.wins]
+
+    def mean_length(self) -> float:
+        return sum(t * c for t, c in self.length_hist.items()) / self.games if self.games else 0.0
+
+    def length_percentile(self, q: float) -> int:
+        target = q * self.games
+        seen = 0
+        for turns in sorted(self.length_hist):
+            seen += self.length_hist[turns]
+            if seen >= target:
+                return turns
+        return 0
+
+    def mean_bankrupt_turn(self) -> List[Optional[float]]:
+        return [total / count if count else None
+                for total, count in zip(self.bankrupt_turn_total, self.bankruptcies)]
+
+    def to_dict(self) -> Dict:
+        return {
+            "games": self.games,
+            "timeouts": self.timeouts,
+            "win_rates": self.win_rates(),
+            "mean_length": self.mean_length(),
+            "median_length": self.length_percentile(0.5),
+            "p90_length": self.length_percentile(0.9),
+            "bankruptcies": self.bankruptcies,
+            "mean_bankrupt_turn": self.mean_bankrupt_turn(),
+        }
+
+
+def run_chunk(seed: int, start: int, stop: int, policy_names: Sequence[str], max_turns: int,
+              dice: str = "rng") -> SimulationResult:
+    """ Play games [start, stop) of a run. Top level so it can be shipped to a worker process """
+    result = SimulationResult(len(policy_names))
+    for i in range(start, stop):
+        result.add(*play_game(game_seed(seed, i), policy_names, max_turns, dice))
+    return result
+
+
+def simulate(num_games: int, policy_names: Sequence[str] = ("greedy",) * 4, seed: int = 0,
+             workers: Optional[int] = None, max_turns: int = 2000, chunk_size: int = 250,
+             dice: str = "rng") -> SimulationResult:
+    """ Play `num_games` headless games across `workers` processes (default: all cores).
+    Game i always uses game_seed(seed, i), so the result is the same for any worker count """
+    workers = workers or os.cpu_count() or 1
+    chunks = [(start, min(start + chunk_size, num_games)) for start in range(0, num_games, chunk_size)]
+    total = SimulationResult(len(policy_names))
+
+    if workers == 1:
+        for start, stop in chunks:
+            total.merge(run_chunk(seed, start, stop, policy_names, max_turns, dice))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_chunk, seed, start, stop, policy_names, max_turns, dice) for start, stop in chunks]
+        # merge in submission order so the aggregate is identical run to run
+        for future in futures:
+            total.merge(future.result())
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run headless Millionaire Monopoly games")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--policies", default="greedy,greedy,cautious,cautious",
+                        help=f"comma separated, one per seat: {', '.join(POLICIES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-turns", type=int, default=2000)
+    parser.add_argument("--dice", default="rng", choices=list(DICE_SOURCES))
+    args = parser.parse_args()
+
+    names = args.policies.split(",")
+    summary = simulate(args.games, names, seed=args.seed, workers=args.workers, max_turns=args.max_turns,
+                       dice=args.dice).to_dict()
+    print(f"{summary['games']} games, {summary['timeouts']} hit the turn limit")
+    for seat, (name, rate) in enumerate(zip(names, summary["win_rates"])):
+        bankrupt_turn = summary["mean_bankrupt_turn"][seat]
+        print(f"  seat {seat} ({name}): win rate {rate:.3f}, bankrupt {summary['bankruptcies'][seat]}x"
+              + (f", on average at turn {bankrupt_turn:.0f}" if bankrupt_turn is not None else ""))
+    print(f"  game length: mean {summary['mean_length']:.1f}, median {summary['median_length']}, p90 {summary['p90_length']}")
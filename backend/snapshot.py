@@ -0,0 +1,258 @@
+import json
+import random
+import struct
+from typing import List, Optional
+
+from dice import BlockDice, ScriptedDice
+from monopoly_engine import (DECK_NAMES, DECKS, PENDING_ACTION_CODES, GameState, MillionaireMonopoly, MonopolyBoard,
+                             Player, decks_from_data, default_board)
+
+# Compact binary snapshots of a MillionaireMonopoly game.
+#
+# Layout (little endian):
+#   header      magic, version, square/player counts, turn state, flags, winner
+#   players     fixed-width record, then name, mover type and owned squares in purchase order
+#   squares     one owner byte (player index, 255 = bank) and one house byte per square
+#   decks       card definitions as JSON, only for games with their own decks; then per deck the
+#               card count, the shuffle order (card indices) and the cursor
+#   pending     action-type code (0 = none), player index, then type-specific fields
+#   rent rules  only when the game overrides RENT_MAPPING, as JSON
+#   rng         Mersenne Twister state, optional
+#   dice        dice source position, when the game has one (BlockDice or ScriptedDice)
+#
+# Cards are shared by every game and pending actions used to hold closures; both are stored
+# as small integers here, so a snapshot is a few hundred bytes without the RNG state.
+
+MAGIC = b"MMS1"
+VERSION = 2
+NO_OWNER = 255
+
+HEADER = struct.Struct("<4sBHBBIBBBBBb")
+PLAYER = struct.Struct("<qHBBiH")
+PURCHASE = struct.Struct("<Hq")
+PAY_CHOICE = struct.Struct("<qB")
+RENT = struct.Struct("<qBH")
+RNG_STATE = struct.Struct("<625I")
+GAUSS = struct.Struct("<?d")
+BLOCK_DICE = struct.Struct("<QIII")
+SCRIPTED_DICE = struct.Struct("<II")
+
+FLAG_GAME_OVER = 1
+FLAG_RNG = 2
+FLAG_RENT_MAPPING = 4
+FLAG_BLOCK_DICE = 8
+FLAG_SCRIPTED_DICE = 16
+FLAG_DECKS = 32
+
+PLAYER_IN_JAIL = 1
+PLAYER_JAIL_FREE_CARD = 2
+PLAYER_MUST_SELL = 4
+PLAYER_MUST_PAY_SOMEONE = 8
+PLAYER_BANKRUPT = 16
+
+_STATES = list(GameState)
+
+
+def _pack_str(value: Optional[str]) -> bytes:
+    raw = (value or "").encode()
+    return bytes((len(raw),)) + raw
+
+
+def _unpack_str(blob: bytes, offset: int):
+    size = blob[offset]
+    return blob[offset + 1:offset + 1 + size].decode(), offset + 1 + size
+
+
+def dump_game(game: MillionaireMonopoly, include_rng: bool = True) -> bytes:
+    """ Serialise `game` to bytes. Without the RNG state a restored game gets a fresh generator """
+    seat = {p: i for i, p in enumerate(game.players)}
+    flags = (FLAG_GAME_OVER if game.game_over else 0) | (FLAG_RNG if include_rng else 0)
+    if game.rent_mapping is not MillionaireMonopoly.RENT_MAPPING:
+        flags |= FLAG_RENT_MAPPING
+    if game.decks is not DECKS:
+        flags |= FLAG_DECKS
+    dice = game.dice
+    if isinstance(dice, BlockDice):
+        flags |= FLAG_BLOCK_DICE
+    elif isinstance(dice, ScriptedDice):
+        flags |= FLAG_SCRIPTED_DICE
+    elif dice is not None:
+        raise ValueError(f"can't snapshot a game rolling {type(dice).__name__}")
+    out = [HEADER.pack(MAGIC, VERSION, len(game.board), len(game.players), game.current_player_index,
+                       game.turns, _STATES.index(game.state), game.d1, game.d2, game.double_rolls, flags,
+                       seat[game.winner] if game.winner is not None else -1)]
+
+    for p in game.players:
+        pflags = ((PLAYER_IN_JAIL if p.in_jail else 0) | (PLAYER_JAIL_FREE_CARD if p.jail_free_card else 0)
+                  | (PLAYER_MUST_SELL if p.must_sell else 0) | (PLAYER_MUST_PAY_SOMEONE if p.must_pay_someone else 0)
+                  | (PLAYER_BANKRUPT if p.is_bankrupt else 0))
+        out.append(PLAYER.pack(p.money, p.position.index, p.mover_level, pflags,
+                               -1 if p.bankrupt_turn is None else p.bankrupt_turn, len(p.properties)))
+        out.append(_pack_str(p.name))
+        out.append(_pack_str(p.mover_type))
+        out.append(struct.pack(f"<{len(p.properties)}H", *(prop.index for prop in p.properties)))
+
+    out.append(bytes(NO_OWNER if owner is None else seat[owner] for owner in game.owners))
+    out.append(bytes(game.houses))
+
+    if flags & FLAG_DECKS:
+        raw = json.dumps({deck.name: deck.definitions for deck in game.decks}, sort_keys=True).encode()
+        out.append(struct.pack("<I", len(raw)) + raw)
+    for order, cursor in zip(game.card_orders, game.card_cursors):
+        out.append(bytes((len(order),)) + order + bytes((cursor,)))
+
+    action = game.pending_action
+    if action is None:
+        out.append(b"\x00")
+    else:
+        code = PENDING_ACTION_CODES[action.action_type]
+        out.append(bytes((code, seat[action.player])))
+        data = action.data
+        if action.action_type == "property_purchase":
+            out.append(PURCHASE.pack(data["property"].index, data["cost"]))
+        elif action.action_type == "choose_player_to_pay":
+            out.append(PAY_CHOICE.pack(data["amount"], len(action.choices)))
+            out.append(bytes(seat[game.find_player(name)] for name in action.choices))
+        else:
+            out.append(RENT.pack(data["rent"], seat[game.find_player(data["owner"])], data["square"]))
+
+    if flags & FLAG_RENT_MAPPING:
+        raw = json.dumps(game.rent_mapping, sort_keys=True).encode()
+        out.append(struct.pack("<H", len(raw)) + raw)
+
+    if include_rng:
+        version, state, gauss = game.rng.getstate()
+        out.append(RNG_STATE.pack(*state))
+        out.append(GAUSS.pack(gauss is not None, gauss or 0.0))
+
+    if flags & FLAG_BLOCK_DICE:
+        out.append(BLOCK_DICE.pack(dice.seed, dice.block_size, dice.block, dice.offset))
+    elif flags & FLAG_SCRIPTED_DICE:
+        out.append(SCRIPTED_DICE.pack(len(dice.rolls), dice.offset))
+        out.append(bytes(d for roll in dice.rolls for d in roll))
+
+    return b"".join(out)
+
+
+def load_game(blob: bytes, board: Optional[MonopolyBoard] = None) -> MillionaireMonopoly:
+    """ Rebuild a game from dump_game output. `board` must be the board the game was played on """
+    board = board or default_board()
+    (magic, version, num_squares, num_players, current, turns, state_code, d1, d2, double_rolls, flags,
+     winner) = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a game snapshot (or an unsupported version)")
+    if num_squares != len(board):
+        raise ValueError(f"snapshot has {num_squares} squares, board has {len(board)}")
+    offset = HEADER.size
+
+    game = MillionaireMonopoly.__new__(MillionaireMonopoly)
+    game.board = board
+    game.undo = None
+    game.income = None
+    players: List[Player] = []
+    owned_orders = []
+    for _ in range(num_players):
+        money, position, mover_level, pflags, bankrupt_turn, num_props = PLAYER.unpack_from(blob, offset)
+        offset += PLAYER.size
+        name, offset = _unpack_str(blob, offset)
+        mover_type, offset = _unpack_str(blob, offset)
+        owned_orders.append(struct.unpack_from(f"<{num_props}H", blob, offset))
+        offset += 2 * num_props
+
+        p = Player(name)
+        p.mover_type = mover_type or None
+        p.mover_level = mover_level
+        p.position = board.positions[position]
+        p.money = money
+        p.in_jail = bool(pflags & PLAYER_IN_JAIL)
+        p.jail_free_card = bool(pflags & PLAYER_JAIL_FREE_CARD)
+        p.must_sell = bool(pflags & PLAYER_MUST_SELL)
+        p.must_pay_someone = bool(pflags & PLAYER_MUST_PAY_SOMEONE)
+        p.is_bankrupt = bool(pflags & PLAYER_BANKRUPT)
+        p.bankrupt_turn = None if bankrupt_turn < 0 else bankrupt_turn
+        players.append(p)
+    game.players = players
+
+    owners = blob[offset:offset + num_squares]
+    offset += num_squares
+    game.owners = [None] * num_squares
+    game.houses = bytearray(blob[offset:offset + num_squares])
+    offset += num_squares
+    # re-add properties in purchase order so the per-color counters are rebuilt
+    for seat, (p, order) in enumerate(zip(players, owned_orders)):
+        for index in order:
+            if owners[index] != seat:
+                raise ValueError(f"square {index} is listed for {p.name} but owned by another player")
+            game._add_property(p, board.positions[index])
+
+    game.decks = DECKS
+    if flags & FLAG_DECKS:
+        (size,) = struct.unpack_from("<I", blob, offset)
+        game.decks = decks_from_data(json.loads(blob[offset + 4:offset + 4 + size]))
+        offset += 4 + size
+    game.card_orders, game.card_cursors = [], []
+    for name, deck in zip(DECK_NAMES, game.decks):
+        count = blob[offset]
+        if count != len(deck):
+            raise ValueError(f"snapshot has {count} {name} cards, the deck has {len(deck)}")
+        game.card_orders.append(bytes(blob[offset + 1:offset + 1 + count]))
+        game.card_cursors.append(blob[offset + 1 + count])
+        offset += 2 + count
+
+    game.pending_action = None
+    code = blob[offset]
+    offset += 1
+    if code:
+        player = players[blob[offset]]
+        offset += 1
+        if code == PENDING_ACTION_CODES["property_purchase"]:
+            square, _ = PURCHASE.unpack_from(blob, offset)
+            offset += PURCHASE.size
+            game.pending_action = game.purchase_action(player, board.positions[square])
+        elif code == PENDING_ACTION_CODES["choose_player_to_pay"]:
+            amount, count = PAY_CHOICE.unpack_from(blob, offset)
+            offset += PAY_CHOICE.size
+            others = [players[i] for i in blob[offset:offset + count]]
+            offset += count
+            game.pending_action = game.pay_choice_action(player, amount, others)
+        else:
+            rent, owner, square = RENT.unpack_from(blob, offset)
+            offset += RENT.size
+            game.pending_action = game.rent_action(player, players[owner], rent, board.positions[square])
+
+    rent_mapping = MillionaireMonopoly.RENT_MAPPING
+    if flags & FLAG_RENT_MAPPING:
+        (size,) = struct.unpack_from("<H", blob, offset)
+        rent_mapping = json.loads(blob[offset + 2:offset + 2 + size])
+        offset += 2 + size
+    game.set_rent_mapping(rent_mapping)
+
+    game.rng = random.Random()
+    if flags & FLAG_RNG:
+        state = RNG_STATE.unpack_from(blob, offset)
+        offset += RNG_STATE.size
+        has_gauss, gauss = GAUSS.unpack_from(blob, offset)
+        offset += GAUSS.size
+        game.rng.setstate((3, state, gauss if has_gauss else None))
+
+    game.dice = None
+    if flags & FLAG_BLOCK_DICE:
+        game.dice = BlockDice(*BLOCK_DICE.unpack_from(blob, offset))
+    elif flags & FLAG_SCRIPTED_DICE:
+        count, position = SCRIPTED_DICE.unpack_from(blob, offset)
+        offset += SCRIPTED_DICE.size
+        rolls = blob[offset:offset + 2 * count]
+        game.dice = ScriptedDice(zip(rolls[::2], rolls[1::2]), position)
+
+    game.current_player_index = current
+    game.turns = turns
+    game.state = _STATES[state_code]
+    game.action_queue = []
+    game.d1, game.d2, game.double_rolls = d1, d2, double_rolls
+    game.game_over = bool(flags & FLAG_GAME_OVER)
+    game.winner = players[winner] if winner >= 0 else None
+    game._subscribers = []
+    game.journal = None
+    game.metrics = None
+    game._reset_tracking()
+    return game
@@ -0,0 +1,287 @@
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from monopoly_engine import DEFAULT_BOARD, RENT_LEVELS, MillionaireMonopoly, MonopolyBoard, default_board
+from simulator import DICE_SOURCES, POLICIES, SimulationResult, game_result, game_seed
+
+# Game-balance sweeps: play a batch of headless games for every point of a parameter design
+# and keep per-point aggregates on disk.
+#
+# A point sets the house rules in PARAMETERS. Every point plays the same seeds (game i uses
+# game_seed(seed, i)), so points differ by their rules and not by their luck. Boards with
+# scaled prices are built once per process and shared by the points using them; rent tables
+# are compiled once per distinct mapping (see compile_rent_table), whatever the board's prices.
+#
+# A sweep lives in a directory: sweep.json holds the design (the points and how they are
+# played) and every flush of finished points adds one part-NNNNNN.npz of columns, written to a
+# temporary file and renamed, so a part is either complete or absent. Nothing is rewritten:
+# running the same sweep again skips the points found in the parts, so an interrupted sweep
+# loses at most the points it had not flushed yet. load_results() joins the parts.
+
+# knob -> default; scales multiply the standard rule, money rounds to whole dollars
+PARAMETERS: Dict[str, float] = {
+    "go_bonus": 1.0, # GO_BONUS, every mover level
+    **{f"rent_{houses}": 1.0 for houses in range(RENT_LEVELS)}, # RENT_MAPPING tier (5 = hotel), every color
+    "price": 1.0, # every property's Price
+    "start_money": 372_000.0, # Player.money at the start
+}
+RENT_SCALES = [f"rent_{houses}" for houses in range(RENT_LEVELS)]
+
+MANIFEST = "sweep.json"
+
+_BOARDS: Dict[float, MonopolyBoard] = {} # price scale -> board, per process
+_RENT_MAPPINGS: Dict[tuple, Dict[str, List[int]]] = {} # rent scales -> mapping, per process
+
+
+def board_for(price: float) -> MonopolyBoard:
+    """ DEFAULT_BOARD with every Price scaled by `price`, built once per process """
+    if price == 1.0:
+        return default_board()
+    board = _BOARDS.get(price)
+    if board is None:
+        board = MonopolyBoard()
+        for item in DEFAULT_BOARD:
+            board.append(dict(item, Price=round(item['Price'] * price)) if 'Price' in item else item)
+        board = _BOARDS[price] = board.freeze()
+    return board
+
+
+def rent_mapping_for(scales: Tuple[float, ...]) -> Dict[str, List[int]]:
+    """ RENT_MAPPING with tier h of every color scaled by scales[h] """
+    if all(scale == 1.0 for scale in scales):
+        return MillionaireMonopoly.RENT_MAPPING
+    mapping = _RENT_MAPPINGS.get(scales)
+    if mapping is None:
+        mapping = _RENT_MAPPINGS[scales] = {
+            color: [round(rent * scale) for rent, scale in zip(rents, scales)]
+            for color, rents in MillionaireMonopoly.RENT_MAPPING.items()}
+    return mapping
+
+
+def point_game(values: Dict[str, float], seed: int, num_players: int, dice: str = "rng") -> MillionaireMonopoly:
+    """ The game a sweep plays for `seed` at the point `values` """
+    game = MillionaireMonopoly(board_for(values["price"]), [f"P{i}" for i in range(num_players)],
+                               rng=random.Random(seed), dice=DICE_SOURCES[dice](seed),
+                               rent_mapping=rent_mapping_for(tuple(values[name] for name in RENT_SCALES)))
+    if values["go_bonus"] != 1.0:
+        game.GO_BONUS = [round(bonus * values["go_bonus"]) for bonus in MillionaireMonopoly.GO_BONUS]
+    for player in game.players:
+        player.money = round(values["start_money"])
+    return game
+
+
+def run_point_chunk(values: Dict[str, float], seed: int, start: int, stop: int, policy_names: Sequence[str],
+                    max_turns: int, dice: str) -> Tuple[SimulationResult, float]:
+    """ Games [start, stop) of one point and the seconds they took. Top level so it can be
+    shipped to a worker process """
+    began = time.perf_counter()
+    result = SimulationResult(len(policy_names))
+    for i in range(start, stop):
+        game = point_game(values, game_seed(seed, i), len(policy_names), dice)
+        game.run_turns(max_turns, [POLICIES[name]() for name in policy_names])
+        result.add(*game_result(game))
+    return result, time.perf_counter() - began
+
+
+def grid(axes: Dict[str, Sequence[float]]) -> List[Dict[str, float]]:
+    """ Every combination of the values in `axes`; other parameters keep their defaults """
+    _check_names(axes)
+    names = list(axes)
+    return [dict(PARAMETERS, **dict(zip(names, combo))) for combo in product(*(axes[name] for name in names))]
+
+
+def random_design(ranges: Dict[str, Tuple[float, float]], points: int, seed: int = 0) -> List[Dict[str, float]]:
+    """ `points` points drawn uniformly from `ranges` (low, high) per parameter """
+    _check_names(ranges)
+    rng = random.Random(seed)
+    return [dict(PARAMETERS, **{name: rng.uniform(low, high) for name, (low, high) in ranges.items()})
+            for _ in range(points)]
+
+
+def _check_names(names):
+    unknown = [name for name in names if name not in PARAMETERS]
+    if unknown:
+        raise ValueError(f"unknown parameters {unknown}, pick from {', '.join(PARAMETERS)}")
+
+
+class SweepStore:
+    """ The directory of one sweep; see the module comment for the layout """
+    def __init__(self, path: str, design: Optional[Dict] = None):
+        self.path = path
+        manifest = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                stored = json.load(f)
+            if design is not None and design != stored:
+                raise ValueError(f"{path} holds a different sweep; pick another directory to start a new one")
+            design = stored
+        elif design is None:
+            raise ValueError(f"{path} holds no sweep")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._write(MANIFEST, lambda f: f.write(json.dumps(design, indent=1).encode()))
+        self.design = design
+
+    def _write(self, name: str, write):
+        """ Write a file under its final name only once it is complete """
+        final = os.path.join(self.path, name)
+        temporary = final + ".tmp"
+        with open(temporary, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, final)
+
+    def parts(self) -> List[str]:
+        return sorted(os.path.join(self.path, name) for name in os.listdir(self.path)
+                      if name.startswith("part-") and name.endswith(".npz"))
+
+    def finished(self) -> set:
+        done = set()
+        for part in self.parts():
+            with np.load(part) as columns:
+                done.update(columns["point"].tolist())
+        return done
+
+    def append(self, rows: List[Dict]):
+        """ Store the rows of finished points as a new part """
+        if not rows:
+            return
+        columns = {key: np.array([row[key] for row in rows]) for key in rows[0]}
+        name = f"part-{len(self.parts()):06d}.npz"
+        self._write(name, lambda f: np.savez(f, **columns))
+
+
+def load_results(path: str) -> Dict[str, np.ndarray]:
+    """ Columns of every finished point of the sweep in `path`, by point index. Besides one column
+    per parameter: games, timeouts, wins and bankruptcies (points x seats), mean_bankrupt_turn
+    (points x seats, nan without bankruptcies), mean/median/p90 game length and seconds of play """
+    parts = SweepStore(path).parts()
+    if not parts:
+        return {}
+    loaded = []
+    for part in parts:
+        with np.load(part) as columns:
+            loaded.append({key: columns[key] for key in columns.files})
+    merged = {key: np.concatenate([columns[key] for columns in loaded]) for key in loaded[0]}
+    order = np.argsort(merged["point"], kind="stable")
+    return {key: column[order] for key, column in merged.items()}
+
+
+def _row(point: int, values: Dict[str, float], result: SimulationResult, seconds: float) -> Dict:
+    row = {"point": point, **{name: float(values[name]) for name in PARAMETERS}}
+    row.update(games=result.games, timeouts=result.timeouts, wins=result.wins, bankruptcies=result.bankruptcies,
+               mean_bankrupt_turn=[np.nan if turn is None else turn for turn in result.mean_bankrupt_turn()],
+               mean_length=result.mean_length(), median_length=result.length_percentile(0.5),
+               p90_length=result.length_percentile(0.9), seconds=seconds)
+    return row
+
+
+def sweep(path: str, points: Optional[List[Dict[str, float]]] = None, games: int = 200,
+          policy_names: Sequence[str] = ("greedy",) * 4, seed: int = 0, max_turns: int = 1000, dice: str = "rng",
+          workers: Optional[int] = None, chunk_size: int = 50, flush_every: int = 8) -> int:
+    """ Play every point not yet stored in `path`, `games` games each, across `workers` processes
+    (default: all cores). Without `points` the sweep already in `path` is resumed. Returns the
+    number of points played """
+    design = None
+    if points is not None:
+        design = {"parameters": list(PARAMETERS), "points": [[p[name] for name in PARAMETERS] for p in points],
+                  "games": games, "policies": list(policy_names), "seed": seed, "max_turns": max_turns, "dice": dice}
+    store = SweepStore(path, design)
+    design = store.design
+    points = [dict(zip(design["parameters"], values)) for values in design["points"]]
+    done = store.finished()
+    todo = [i for i in range(len(points)) if i not in done]
+    games, seed = design["games"], design["seed"]
+    args = (design["policies"], design["max_turns"], design["dice"])
+    chunks = [(start, min(start + chunk_size, games)) for start in range(0, games, chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    buffer, played = [], 0
+
+    def finish(point, outcomes):
+        nonlocal played
+        total, seconds = SimulationResult(len(args[0])), 0.0
+        for outcome in outcomes: # in chunk order, so a point's aggregate never depends on the split
+            result, took = outcome.result() if pool is not None else outcome
+            total.merge(result)
+            seconds += took
+        buffer.append(_row(point, points[point], total, seconds))
+        played += 1
+        if len(buffer) >= flush_every:
+            store.append(buffer)
+            buffer.clear()
+
+    try:
+        in_flight = []
+        for point in todo:
+            if pool is None:
+                finish(point, [run_point_chunk(points[point], seed, start, stop, *args) for start, stop in chunks])
+                continue
+            in_flight.append((point, [pool.submit(run_point_chunk, points[point], seed, start, stop, *args)
+                                      for start, stop in chunks]))
+            # a few points ahead keep the pool busy without queueing the whole sweep
+            while len(in_flight) * len(chunks) > 4 * workers:
+                finish(*in_flight.pop(0))
+        for point, outcomes in in_flight:
+            finish(point, outcomes)
+    finally:
+        store.append(buffer) # whatever finished, also when interrupted
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return played
+
+
+def _axis(text: str) -> Tuple[str, str]:
+    name, _, values = text.partition("=")
+    return name.strip(), values
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumable game-balance parameter sweep")
+    parser.add_argument("path", help="sweep directory; run again to resume")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help=f"grid axis, repeatable: {', '.join(PARAMETERS)}")
+    parser.add_argument("--random", action="append", default=[], metavar="NAME=LOW:HIGH",
+                        help="range of a random design, repeatable")
+    parser.add_argument("--points", type=int, default=20, help="points of a random design")
+    parser.add_argument("--games", type=int, default=200, help="games per point")
+    parser.add_argument("--policies", default="greedy,greedy,cautious,cautious",
+                        help=f"comma separated, one per seat: {', '.join(POLICIES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--dice", default="rng", choices=list(DICE_SOURCES))
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.grid and args.random:
+        parser.error("use either --grid or --random")
+    design_points = None
+    if args.grid:
+        design_points = grid({name: [float(v) for v in values.split(",")] for name, values in map(_axis, args.grid)})
+    elif args.random:
+        design_points = random_design({name: tuple(float(v) for v in values.split(":"))
+                                       for name, values in map(_axis, args.random)}, args.points, args.seed)
+    started = time.perf_counter()
+    played = sweep(args.path, design_points, args.games, args.policies.split(","), args.seed, args.max_turns,
+                   args.dice, args.workers)
+    elapsed = time.perf_counter() - started
+
+    results = load_results(args.path)
+    varied = [name for name in PARAMETERS if name in results and len(np.unique(results[name])) > 1]
+    print(f"played {played} points in {elapsed:.1f}s, {len(results.get('point', []))} stored in {args.path}")
+    for i in range(len(results.get("point", []))):
+        setting = ", ".join(f"{name}={results[name][i]:g}" for name in varied)
+        rates = results["wins"][i] / results["games"][i]
+        print(f"  point {results['point'][i]}: {setting or 'defaults'}: win rates "
+              f"{' '.join(f'{r:.3f}' for r in rates)}, mean length {results['mean_length'][i]:.0f}, "
+              f"{results['timeouts'][i]} at the turn limit")
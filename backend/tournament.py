@@ -0,0 +1,298 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import combinations
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from mcts import MCTSPolicy
+from simulator import DICE_SOURCES, POLICIES, game_seed, play_game
+
+# Strategy tournaments that stop each pairing once its result is settled.
+#
+# A pairing pits two strategies against each other. It is played in units: for every player
+# count, one game with the strategies alternating seats starting with the first and one starting
+# with the second, both on the same seed, so seat order and dice luck cancel within the unit.
+# Every pairing uses the same seeds for its units, so all strategies face the same deals.
+# A unit scores the first strategy's share of the wins (a game hitting the turn limit goes to
+# the richest player, as in simulator.play_game).
+#
+# After every batch of units two sequential probability ratio tests run on the unit scores
+# (normal approximation, as the scores are not 0/1): "the first strategy wins a share of
+# 0.5 + delta/2" and "of 0.5 - delta/2", each against "0.5". Either alternative accepted ends
+# the pairing with a winner; both rejected, with no difference of `delta` in win rate either
+# way. Otherwise it goes on until max_games, undecided. Checking only after whole batches keeps
+# results independent of the worker count.
+#
+# Round robin plays every pairing at once. Swiss plays rounds, each pairing strategies with
+# equal points that have not met yet. A decided pairing is worth 1 point to the winner, any
+# other result (and a bye) half a point each.
+
+# the look-ahead bot at a fixed number of lines per decision, so games replay exactly
+STRATEGIES = dict(POLICIES, mcts=partial(MCTSPolicy, budget=60.0, max_iterations=48, seed=0))
+
+MIN_UNITS = 8 # before the first test, for a usable variance
+FORMATS = ("round-robin", "swiss")
+
+
+def play_unit(seed: int, unit: int, first: str, second: str, player_counts: Sequence[int], max_turns: int,
+              dice: str) -> int:
+    """ Games won by `first` in one unit. Top level so it can be shipped to a worker process """
+    wins = 0
+    for i, players in enumerate(player_counts):
+        s = game_seed(seed, unit * len(player_counts) + i)
+        for order in ((first, second), (second, first)):
+            names = [order[seat % 2] for seat in range(players)]
+            winner = play_game(s, names, max_turns, dice, STRATEGIES)[0]
+            wins += names[winner] == first
+    return wins
+
+
+class Pairing:
+    """ Sequential test of `first` against `second`; `unit_wins` are the first's wins per unit """
+    def __init__(self, first: str, second: str, unit_games: int):
+        self.first = first
+        self.second = second
+        self.unit_games = unit_games
+        self.unit_wins: List[int] = []
+        self.verdict: Optional[str] = None # winner's name, "even" or "undecided" once finished
+
+    @property
+    def games(self) -> int:
+        return len(self.unit_wins) * self.unit_games
+
+    @property
+    def wins(self) -> int:
+        return sum(self.unit_wins)
+
+    def score(self) -> Tuple[float, float]:
+        """ Mean unit score of `first` and its variance per unit """
+        n = len(self.unit_wins)
+        scores = [w / self.unit_games for w in self.unit_wins]
+        mean = sum(scores) / n
+        variance = sum((s - mean) ** 2 for s in scores) / (n - 1) if n > 1 else 0.25
+        return mean, variance
+
+    def llr(self, target: float) -> float:
+        """ Log likelihood ratio of a mean score of `target` against 0.5 """
+        mean, variance = self.score()
+        # a run of identical units says little about the spread: allow for one game per unit going either way
+        variance = max(variance, 1 / (2 * self.unit_games) ** 2)
+        return len(self.unit_wins) * (target - 0.5) * (2 * mean - 0.5 - target) / (2 * variance)
+
+    def test(self, delta: float, lower: float, upper: float, max_games: int):
+        """ Set the verdict if the evidence settles the pairing """
+        if len(self.unit_wins) < MIN_UNITS:
+            return
+        ahead, behind = self.llr(0.5 + delta / 2), self.llr(0.5 - delta / 2)
+        if ahead >= upper:
+            self.verdict = self.first
+        elif behind >= upper:
+            self.verdict = self.second
+        elif ahead <= lower and behind <= lower:
+            self.verdict = "even"
+        elif self.games >= max_games:
+            self.verdict = "undecided"
+
+    def difference(self, z: float) -> Tuple[float, float]:
+        """ Win-rate difference first minus second, and the half width of its interval """
+        mean, variance = self.score()
+        return 2 * mean - 1, 2 * z * math.sqrt(variance / len(self.unit_wins))
+
+
+def wilson(wins: int, games: int, z: float) -> Tuple[float, float]:
+    """ Wilson score interval of a win rate """
+    if not games:
+        return 0.0, 1.0
+    rate = wins / games
+    centre = (rate + z * z / (2 * games)) / (1 + z * z / games)
+    half = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / (1 + z * z / games)
+    return centre - half, centre + half
+
+
+class TournamentResult:
+    """ Finished pairings, byes and timing; standings() ranks the strategies """
+    def __init__(self, strategies: Sequence[str], confidence: float):
+        self.strategies = list(strategies)
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.pairings: List[Pairing] = []
+        self.byes: Dict[str, int] = dict.fromkeys(strategies, 0)
+        self.seconds = 0.0
+
+    @property
+    def games(self) -> int:
+        return sum(p.games for p in self.pairings)
+
+    def points(self) -> Dict[str, float]:
+        points = {name: bye / 2 for name, bye in self.byes.items()}
+        for p in self.pairings:
+            if p.verdict in (p.first, p.second):
+                points[p.verdict] += 1
+            else:
+                points[p.first] += 0.5
+                points[p.second] += 0.5
+        return points
+
+    def standings(self) -> List[dict]:
+        """ One row per strategy, best first: by points, then by win rate """
+        points = self.points()
+        rows = {name: {"strategy": name, "points": points[name], "won": 0, "even": 0, "lost": 0, "games": 0,
+                       "wins": 0} for name in self.strategies}
+        for p in self.pairings:
+            for name, wins in ((p.first, p.wins), (p.second, p.games - p.wins)):
+                row = rows[name]
+                row["games"] += p.games
+                row["wins"] += wins
+                row["won" if p.verdict == name else "even" if p.verdict not in (p.first, p.second) else "lost"] += 1
+        for row in rows.values():
+            row["win_rate"] = row["wins"] / row["games"] if row["games"] else 0.0
+            row["interval"] = wilson(row["wins"], row["games"], self.z)
+        return sorted(rows.values(), key=lambda r: (-r["points"], -r["win_rate"]))
+
+    def to_dict(self) -> Dict:
+        return {
+            "standings": self.standings(),
+            "pairings": [{"first": p.first, "second": p.second, "games": p.games, "first_wins": p.wins,
+                          "difference": p.difference(self.z), "verdict": p.verdict} for p in self.pairings],
+            "games": self.games,
+            "seconds": self.seconds,
+            "games_per_second": self.games / self.seconds if self.seconds else 0.0,
+        }
+
+
+class Tournament:
+    """ Plays pairings of `strategies` (names in STRATEGIES) with sequential stopping. `delta` is
+    the smallest win-rate difference worth telling apart; a pairing ends with a wrong winner at
+    most 1 - `confidence` of the time, and misses a difference of `delta` at most 1 - `power` """
+    def __init__(self, strategies: Sequence[str], player_counts: Sequence[int] = (2, 4), delta: float = 0.1,
+                 confidence: float = 0.95, power: float = 0.95, batch: int = 8, max_games: int = 4000,
+                 max_turns: int = 1000, seed: int = 0, dice: str = "rng", workers: Optional[int] = None):
+        unknown = [name for name in strategies if name not in STRATEGIES]
+        if unknown:
+            raise ValueError(f"unknown strategies {unknown}, pick from {', '.join(STRATEGIES)}")
+        if len(set(strategies)) != len(strategies) or len(strategies) < 2:
+            raise ValueError("a tournament needs at least two different strategies")
+        if not player_counts or any(not 2 <= n <= 8 for n in player_counts):
+            raise ValueError("player counts must be between 2 and 8")
+        self.strategies = list(strategies)
+        self.player_counts = list(player_counts)
+        self.delta = delta
+        # two one-sided tests share the error budget
+        alpha, beta = (1 - confidence) / 2, 1 - power
+        self.lower, self.upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+        self.batch = batch
+        self.max_games = max_games
+        self.max_turns = max_turns
+        self.seed = seed
+        self.dice = dice
+        self.workers = workers or os.cpu_count() or 1
+        self.result = TournamentResult(strategies, confidence)
+        self._pool = None
+
+    def play(self, pairings: List[Pairing]):
+        """ Play `pairings` side by side, a batch of units each, until every one has a verdict """
+        active = list(pairings)
+        while active:
+            jobs = [(p, len(p.unit_wins) + i) for p in active for i in range(self.batch)]
+            args = [(self.seed, unit, p.first, p.second, self.player_counts, self.max_turns, self.dice)
+                    for p, unit in jobs]
+            if self._pool is None:
+                results = [play_unit(*a) for a in args]
+            else:
+                futures = [self._pool.submit(play_unit, *a) for a in args]
+                results = [future.result() for future in futures]
+            for (p, _), wins in zip(jobs, results):
+                p.unit_wins.append(wins)
+            for p in active:
+                p.test(self.delta, self.lower, self.upper, self.max_games)
+            active = [p for p in active if p.verdict is None]
+        self.result.pairings.extend(pairings)
+
+    def pairing(self, first: str, second: str) -> Pairing:
+        return Pairing(first, second, 2 * len(self.player_counts))
+
+    def round_robin(self):
+        self.play([self.pairing(a, b) for a, b in combinations(self.strategies, 2)])
+
+    def swiss(self, rounds: Optional[int] = None):
+        rounds = rounds or math.ceil(math.log2(len(self.strategies)))
+        met = set()
+        for _ in range(rounds):
+            points = self.result.points()
+            waiting = sorted(self.strategies, key=lambda name: -points[name]) # stable: ties in entry order
+            pairings = []
+            while waiting:
+                first = waiting.pop(0)
+                second = next((name for name in waiting if frozenset((first, name)) not in met), None)
+                if second is None:
+                    self.result.byes[first] += 1
+                    continue
+                waiting.remove(second)
+                met.add(frozenset((first, second)))
+                pairings.append(self.pairing(first, second))
+            if not pairings:
+                break
+            self.play(pairings)
+
+    def run(self, format: str = "round-robin", rounds: Optional[int] = None) -> TournamentResult:
+        if format not in FORMATS:
+            raise ValueError(f"unknown format {format!r}, pick from {', '.join(FORMATS)}")
+        start = time.perf_counter()
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            if format == "swiss":
+                self.swiss(rounds)
+            else:
+                self.round_robin()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+        self.result.seconds += time.perf_counter() - start
+        return self.result
+
+
+def format_result(result: TournamentResult, confidence: float) -> str:
+    lines = [f"{'rank':>4}  {'strategy':<10} {'points':>6}  {'W-E-L':>7} {'games':>7}  "
+             f"{'win rate':>8}  {f'{confidence:.0%} interval':>15}"]
+    for rank, row in enumerate(result.standings(), 1):
+        low, high = row["interval"]
+        record = f"{row['won']}-{row['even']}-{row['lost']}"
+        lines.append(f"{rank:>4}  {row['strategy']:<10} {row['points']:>6.1f}  {record:>7} {row['games']:>7}  "
+                     f"{row['win_rate']:>8.3f}  {low:>7.3f}-{high:.3f}")
+    lines.append("")
+    for p in result.pairings:
+        difference, half = p.difference(result.z)
+        verdict = p.verdict if p.verdict in ("even", "undecided") else f"{p.verdict} better"
+        lines.append(f"  {p.first} vs {p.second}: {p.games} games, win-rate difference "
+                     f"{difference:+.3f} +- {half:.3f}, {verdict}")
+    lines.append(f"{result.games} games in {result.seconds:.1f}s, {result.games / result.seconds:.1f} games/s")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bot strategy tournament with sequential early stopping")
+    parser.add_argument("--strategies", default="greedy,cautious,fixed,random",
+                        help=f"comma separated: {', '.join(STRATEGIES)}")
+    parser.add_argument("--format", default="round-robin", choices=FORMATS)
+    parser.add_argument("--rounds", type=int, default=None, help="Swiss rounds (default: log2 of the field)")
+    parser.add_argument("--players", default="2,4", help="comma separated player counts, 2 to 8")
+    parser.add_argument("--delta", type=float, default=0.1, help="win-rate difference worth detecting")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--power", type=float, default=0.95)
+    parser.add_argument("--batch", type=int, default=8, help="units per pairing between tests")
+    parser.add_argument("--max-games", type=int, default=4000, help="per pairing")
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dice", default="rng", choices=list(DICE_SOURCES))
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    tournament = Tournament(args.strategies.split(","), [int(n) for n in args.players.split(",")], args.delta,
+                            args.confidence, args.power, args.batch, args.max_games, args.max_turns, args.seed,
+                            args.dice, args.workers)
+    print(format_result(tournament.run(args.format, args.rounds), args.confidence))
@@ -0,0 +1,276 @@
+import math
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from analytics import landing_distribution
+from monopoly_engine import DECKS, MillionaireMonopoly, Player, Position
+
+# Trade evaluation and suggestions.
+#
+# A player's holding in a color group is valued in dollars: what the bank would pay for it,
+# plus the rent it is expected to earn over the next `rounds` rounds (landing probability of
+# each square times its rent, once per opponent turn), plus, for a full set, the best gain
+# from building every square up to one level (extra income over the same turns, less the
+# houses' cost net of their resale). A trade is worth, to each side, the change in value of
+# the groups it touches plus the cash, less its share of the other side's change in earnings:
+# that rent is paid by the other side's opponents, one of which it is.
+#
+# Group values only depend on which squares of the group the player holds, their houses and
+# the number of opponents, so a Valuator memoises them on that key; one is shared by every
+# game with the same rent table and landing distribution, across turns and games.
+#
+# Suggestions are swaps of at most one property each way plus cash, between squares of groups
+# without houses (the usual trading rule). Only swaps where a property completes its
+# receiver's set, or blocks its giver's set (taken from a player holding all but one square,
+# or all of them), are considered. The cash makes the partner no worse off by its own
+# valuation; the proposer keeps the rest of the surplus. Candidates are evaluated most
+# promising first until the time budget runs out.
+
+CASH_STEP = 1000 # cash offers are whole thousands, like every amount in the game
+_VALUATORS: Dict[tuple, 'Valuator'] = {}
+
+
+class Valuator:
+    """ Memoised value of holding squares of one color group, see the module comment """
+    def __init__(self, board, rent_table, weights, house_cost: Dict[str, int], rounds: int):
+        self.table = rent_table
+        self.weights = [float(w) for w in weights]
+        self.rounds = rounds
+        # color id -> (squares, house cost, prices)
+        self.groups: Dict[int, Tuple[Tuple[int, ...], int, Tuple[int, ...]]] = {}
+        self.slots: Dict[int, int] = {} # square -> bit of its group mask
+        self.bare: Dict[int, Tuple[int, ...]] = {} # color id -> no houses on any square
+        for color, squares in board.color_groups.items():
+            if rent_table.set_sizes[squares[0].index] < 0:
+                continue # no rent, nothing to value
+            self.groups[squares[0].color_id] = (tuple(p.index for p in squares), house_cost.get(color, 0),
+                                                tuple(p.cost for p in squares))
+            self.bare[squares[0].color_id] = (0,) * len(squares)
+            for slot, p in enumerate(squares):
+                self.slots[p.index] = slot
+        self.memo: Dict[tuple, Tuple[int, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def group_value(self, color_id: int, mask: int, houses: Tuple[int, ...], opponents: int) -> Tuple[int, float]:
+        """ (sale value, earnings) of holding the squares in `mask` (bit = slot in the group) with
+        `houses` per slot; earnings are the expected rent and the building option """
+        key = (color_id, mask, houses, opponents)
+        value = self.memo.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = self.memo[key] = self._group_value(color_id, mask, houses, opponents)
+        return value
+
+    def _group_value(self, color_id, mask, houses, opponents) -> Tuple[int, float]:
+        squares, house_cost, prices = self.groups[color_id]
+        rent, weights = self.table.rent, self.weights
+        turns = self.rounds * opponents
+        full = mask == (1 << len(squares)) - 1
+        doubled = full and not any(houses)
+        held = [slot for slot in range(len(squares)) if mask >> slot & 1]
+        sale = sum(prices[slot] // 2 + houses[slot] * (house_cost // 2) for slot in held)
+        income = sum(weights[squares[slot]] * rent(squares[slot], houses[slot], doubled) for slot in held)
+        earnings = income * turns
+        if full and house_cost:
+            best = 0.0
+            for level in range(1, 6):
+                built = sum(max(level - houses[slot], 0) for slot in held)
+                if not built:
+                    continue
+                raised = sum(weights[squares[slot]] * rent(squares[slot], max(level, houses[slot])) for slot in held)
+                # houses resell for half their cost
+                best = max(best, (raised - income) * turns - built * house_cost / 2)
+            earnings += best
+        return sale, earnings
+
+    def holding(self, game: MillionaireMonopoly, player: Player, color_id: int,
+                mask: Optional[int] = None) -> Tuple[int, float]:
+        """ group_value of `player`'s squares in a group, or of the squares in `mask` """
+        squares = self.groups[color_id][0]
+        if mask is None:
+            mask = self.mask(player, color_id)
+        houses = tuple(game.houses[index] if mask >> slot & 1 else 0 for slot, index in enumerate(squares))
+        return self.group_value(color_id, mask, houses, opponents(game))
+
+    def mask(self, player: Player, color_id: int) -> int:
+        slots = self.slots
+        return sum(1 << slots[p.index] for p in player.holdings.get(color_id, ()))
+
+
+def valuator_for(game: MillionaireMonopoly, rounds: int = 20) -> Valuator:
+    """ The shared Valuator for `game`'s rent table and board """
+    distribution = landing_distribution(game.board, None if game.decks is DECKS else game.decks)
+    key = (game.rent_table, distribution, rounds)
+    valuator = _VALUATORS.get(key)
+    if valuator is None:
+        valuator = _VALUATORS[key] = Valuator(game.board, game.rent_table, distribution.squares, game.HOUSE_COST,
+                                              rounds)
+    return valuator
+
+
+def opponents(game) -> int:
+    return max(sum(not p.is_bankrupt for p in game.players) - 1, 1)
+
+
+def holding_values(game: MillionaireMonopoly, player: Player, rounds: int = 20) -> Dict[str, float]:
+    """ Value of `player`'s holding per color group it has squares in """
+    valuator = valuator_for(game, rounds)
+    colors = {squares[0].color_id: color for color, squares in game.board.color_groups.items()}
+    return {colors[color_id]: sum(valuator.holding(game, player, color_id))
+            for color_id, held in player.holdings.items() if held and color_id in valuator.groups}
+
+
+def property_value(game: MillionaireMonopoly, position: Position, player: Optional[Player] = None,
+                   rounds: int = 20) -> float:
+    """ What `position` adds to `player`'s holding (default: its owner), whether or not it holds it """
+    player = player or game.owners[position.index]
+    valuator = valuator_for(game, rounds)
+    color_id = position.color_id
+    if player is None or color_id not in valuator.groups:
+        return 0.0
+    mask = valuator.mask(player, color_id)
+    bit = 1 << valuator.slots[position.index]
+    with_it = sum(valuator.holding(game, player, color_id, mask | bit))
+    return with_it - sum(valuator.holding(game, player, color_id, mask & ~bit))
+
+
+class Trade:
+    """ `proposer` gives `give` and `cash` (negative: receives cash) to `partner` for `take`;
+    either property may be None. `gain` and `partner_gain` are the valuations after the cash """
+    __slots__ = ('proposer', 'partner', 'give', 'take', 'cash', 'gain', 'partner_gain')
+
+    def __init__(self, proposer: Player, partner: Player, give: Optional[Position], take: Optional[Position],
+                 cash: int = 0, gain: float = 0.0, partner_gain: float = 0.0):
+        self.proposer = proposer
+        self.partner = partner
+        self.give = give
+        self.take = take
+        self.cash = cash
+        self.gain = gain
+        self.partner_gain = partner_gain
+
+    def to_dict(self) -> Dict:
+        return {"proposer": self.proposer.name, "partner": self.partner.name,
+                "give": self.give.name if self.give else None, "take": self.take.name if self.take else None,
+                "cash": self.cash, "gain": round(self.gain), "partner_gain": round(self.partner_gain)}
+
+
+def _swap_gains(valuator: Valuator, game, proposer, partner, give, take) -> Tuple[float, float]:
+    """ Gains of proposer and partner from the property moves, before cash. The groups of the
+    moved squares have no houses """
+    rivals = opponents(game)
+    group_value, bare = valuator.group_value, valuator.bare
+    changes = [] # (value, earnings) change per side
+    for player, lost, got in ((proposer, give, take), (partner, take, give)):
+        value = earnings = 0.0
+        for color_id in {p.color_id for p in (lost, got) if p is not None}:
+            before = valuator.mask(player, color_id)
+            after = before
+            if lost is not None and lost.color_id == color_id:
+                after &= ~(1 << valuator.slots[lost.index])
+            if got is not None and got.color_id == color_id:
+                after |= 1 << valuator.slots[got.index]
+            sale_after, earned_after = group_value(color_id, after, bare[color_id], rivals)
+            sale_before, earned_before = group_value(color_id, before, bare[color_id], rivals)
+            value += sale_after + earned_after - sale_before - earned_before
+            earnings += earned_after - earned_before
+        changes.append((value, earnings))
+    (proposer_value, proposer_earnings), (partner_value, partner_earnings) = changes
+    return proposer_value - partner_earnings / rivals, partner_value - proposer_earnings / rivals
+
+
+def evaluate_trade(game: MillionaireMonopoly, trade: Trade, rounds: int = 20) -> Trade:
+    """ Fill in the gains of `trade` at its cash; its squares must be in groups without houses """
+    proposer_gain, partner_gain = _swap_gains(valuator_for(game, rounds), game, trade.proposer, trade.partner,
+                                              trade.give, trade.take)
+    trade.gain = proposer_gain - trade.cash
+    trade.partner_gain = partner_gain + trade.cash
+    return trade
+
+
+def tradable(game, player: Player) -> List[Position]:
+    """ `player`'s squares in color groups without houses; squares without a color are left out """
+    houses, groups = game.houses, game.board.color_groups
+    return [p for color_id, held in player.holdings.items()
+            if held and color_id >= 0 and not any(houses[q.index] for q in groups[held[0].color])
+            for p in held]
+
+
+def _relevant(game, position: Position, giver: Player, receiver: Player) -> int:
+    """ 2 if the move completes the receiver's set, 1 if it blocks the giver's, else 0 """
+    size = game.rent_table.set_sizes[position.index]
+    if size < 0:
+        return 0 # no rent, nothing to value
+    color_id = position.color_id
+    if receiver.set_counts.get(color_id, 0) + 1 == size:
+        return 2
+    return 1 if giver.set_counts.get(color_id, 0) >= size - 1 else 0
+
+
+def candidate_swaps(game, proposer: Player,
+                    partner: Player) -> Iterator[Tuple[int, Optional[Position], Optional[Position]]]:
+    """ (priority, give, take) for swaps with a property that completes or blocks a set """
+    mine, theirs = tradable(game, proposer), tradable(game, partner)
+    keys = [(_relevant(game, p, partner, proposer), None, p) for p in theirs] \
+        + [(_relevant(game, p, proposer, partner), p, None) for p in mine]
+    seen = set()
+    for priority, give, take in sorted((k for k in keys if k[0]), key=lambda k: -k[0]):
+        for other in [None] + (mine if give is None else theirs):
+            swap = (give or other, take) if give is None else (give, other)
+            if other is not None and other.color_id == (take or give).color_id or swap in seen:
+                continue
+            seen.add(swap)
+            yield (priority,) + swap
+
+
+def suggest_trades(game: MillionaireMonopoly, proposer: Player, partner: Optional[Player] = None,
+                   budget: float = 0.005, limit: int = 5, rounds: int = 20, min_gain: float = 0.0) -> List[Trade]:
+    """ Up to `limit` trades for `proposer` (with `partner`, or with anyone), best gain first,
+    from the candidates evaluated within `budget` seconds """
+    deadline = time.perf_counter() + budget
+    valuator = valuator_for(game, rounds)
+    partners = [partner] if partner is not None else \
+        [p for p in game.players if p is not proposer and not p.is_bankrupt]
+    candidates = sorted(((priority, i, give, take) for i, other in enumerate(partners)
+                         for priority, give, take in candidate_swaps(game, proposer, other)),
+                        key=lambda c: -c[0])
+    found: List[Trade] = []
+    for _, i, give, take in candidates:
+        if time.perf_counter() > deadline:
+            break
+        other = partners[i]
+        proposer_gain, partner_gain = _swap_gains(valuator, game, proposer, other, give, take)
+        # the least cash that leaves the partner no worse off, within what either side holds
+        cash = math.ceil(-partner_gain / CASH_STEP) * CASH_STEP
+        cash = max(cash, -other.money)
+        if cash > proposer.money or proposer_gain - cash <= min_gain:
+            continue
+        found.append(Trade(proposer, other, give, take, cash, proposer_gain - cash, partner_gain + cash))
+    found.sort(key=lambda t: -t.gain)
+    return found[:limit]
+
+
+def execute_trade(game: MillionaireMonopoly, trade: Trade) -> Optional[List[tuple]]:
+    """ Carry out `trade` with transfer_property and send_money; None, changing nothing, when it
+    is no longer possible (a property changed hands or got houses, or the cash is not there) """
+    proposer, partner = trade.proposer, trade.partner
+    groups = game.board.color_groups
+    for position, owner in ((trade.give, proposer), (trade.take, partner)):
+        if position is not None and (game.owners[position.index] is not owner
+                                     or any(game.houses[p.index] for p in groups.get(position.color, ()))):
+            return None
+    if (proposer.money if trade.cash > 0 else partner.money) < abs(trade.cash):
+        return None
+    events = []
+    if trade.give is not None:
+        events += game.transfer_property(proposer, partner, trade.give)
+    if trade.take is not None:
+        events += game.transfer_property(partner, proposer, trade.take)
+    if trade.cash > 0:
+        events += game.send_money(proposer, partner, trade.cash)
+    elif trade.cash < 0:
+        events += game.send_money(partner, proposer, -trade.cash)
+    return events
@@ -0,0 +1,93 @@
+from operator import attrgetter
+from typing import List
+
+from monopoly_engine import MillionaireMonopoly
+
+# In-place make/unmake for search: attach an UndoLog to a game (much like a Journal), take a
+# mark, play engine calls on the game itself, then undo back to the mark instead of forking a
+# fresh copy for every line of play.
+#
+# A mark saves the few scalars a turn can change: each player's money, position, mover, jail
+# and bankruptcy state, whose turn it is, the pending action, the dice and the deck cursors.
+# Ownership and houses change through _add_property, _remove_property and _set_houses, which
+# report to the attached log; undo reverses those entries newest first, putting each property
+# back where it was in its owner's purchase order, so every line of play starts from exactly
+# the same state. Derived state (set and built counters, the asset book) follows from those calls.
+#
+# The RNG and dice source are not rewound: lines of play from the same mark roll differently,
+# which is what a search wants. Attach the log to a fork, not to a game with a journal or
+# subscribers, which would see every line of play.
+
+PLAYER_FIELDS = ('money', 'position', 'mover_level', 'in_jail', 'jail_free_card', 'must_sell',
+                 'must_pay_someone', 'is_bankrupt', 'bankrupt_turn')
+GAME_FIELDS = ('current_player_index', 'turns', 'state', 'game_over', 'winner', 'pending_action',
+               'd1', 'd2', 'double_rolls')
+
+_player_state = attrgetter(*PLAYER_FIELDS)
+_game_state = attrgetter(*GAME_FIELDS)
+
+# undo entries
+ADDED, REMOVED, HOUSES = 0, 1, 2
+
+
+class UndoLog:
+    """ Make/unmake for `game`: mark() returns a token, undo(token) puts the game back """
+    def __init__(self, game: MillionaireMonopoly):
+        self.game = game
+        self.entries: List[tuple] = []
+        game.undo = self
+
+    # called by the engine
+    def added(self, player, property):
+        self.entries.append((ADDED, player, property))
+
+    def removing(self, player, property):
+        order = list(player.properties).index(property)
+        slot = player.holdings[property.color_id].index(property)
+        self.entries.append((REMOVED, player, property, order, slot))
+
+    def houses_changed(self, property, old: int):
+        self.entries.append((HOUSES, property, old))
+
+    def mark(self) -> tuple:
+        game = self.game
+        return len(self.entries), list(map(_player_state, game.players)), _game_state(game), list(game.card_cursors)
+
+    def undo(self, mark: tuple):
+        """ Put the game back as it was at `mark`; later marks become invalid """
+        game = self.game
+        length, players, scalars, cursors = mark
+        entries = self.entries
+        game.undo = None # reversing must not log
+        try:
+            while len(entries) > length:
+                entry = entries.pop()
+                kind = entry[0]
+                if kind == HOUSES:
+                    game._set_houses(entry[1], entry[2])
+                elif kind == ADDED:
+                    game._remove_property(entry[1], entry[2])
+                else:
+                    _, player, property, order, slot = entry
+                    game._add_property(player, property)
+                    if order < len(player.properties) - 1:
+                        keys = list(player.properties)
+                        keys.insert(order, keys.pop())
+                        player.properties = dict.fromkeys(keys)
+                    held = player.holdings[property.color_id]
+                    held.insert(slot, held.pop())
+        finally:
+            game.undo = self
+        for player, values in zip(game.players, players):
+            (player.money, player.position, player.mover_level, player.in_jail, player.jail_free_card,
+             player.must_sell, player.must_pay_someone, player.is_bankrupt, player.bankrupt_turn) = values
+        (game.current_player_index, game.turns, game.state, game.game_over, game.winner, game.pending_action,
+         game.d1, game.d2, game.double_rolls) = scalars
+        game.card_cursors[:] = cursors
+        game._touch(*game.players, meta=True, pending=True)
+
+    def close(self):
+        """ Detach from the game; the game keeps its current state """
+        if self.game.undo is self:
+            self.game.undo = None
+        self.entries.clear()
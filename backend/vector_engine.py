@@ -0,0 +1,400 @@
+import argparse
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from monopoly_engine import (DECKS, RENT_LEVELS, CardEffect, Deck, MillionaireMonopoly, MonopolyBoard, Player,
+                             SquareKind, compile_rent_table, default_board)
+from simulator import FixedPolicy, SimulationResult, simulate
+
+# Lockstep engine: K games of the same board are stored as NumPy arrays and advanced
+# one turn at a time together. Decisions follow simulator.FixedPolicy so the object
+# engine can replay the same rules (see cross_check).
+
+
+def deck_array(deck: Deck) -> np.ndarray:
+    """ A compiled Deck as an (n, 2) array of (CardEffect code, amount or steps) """
+    return np.array([(card.code, card.arg) for card in deck.cards], dtype=np.int64).reshape(-1, 2)
+
+
+class CompiledBoard:
+    """ Flat array view of a MonopolyBoard and the game's rent/price tables """
+    def __init__(self, board: MonopolyBoard, rent_mapping: Dict[str, List[int]] = None,
+                 house_cost: Dict[str, int] = None):
+        rent_mapping = rent_mapping or MillionaireMonopoly.RENT_MAPPING
+        house_cost = house_cost or MillionaireMonopoly.HOUSE_COST
+        self.size = len(board)
+        self.go_index = board.go_index
+        self.jail_index = board.jail.index if board.jail else 0
+        self.kind = np.array(board.kinds, dtype=np.int8)
+        self.price = np.array([p.cost for p in board.positions], dtype=np.int64)
+
+        self.colors = list(board.color_groups)
+        self.color_id = np.full(self.size, -1, dtype=np.int16)
+        self.group_squares = []
+        for cid, color in enumerate(self.colors):
+            squares = np.array([p.index for p in board.color_groups[color]], dtype=np.int64)
+            self.color_id[squares] = cid
+            self.group_squares.append(squares)
+        self.group_size = np.array([len(g) for g in self.group_squares], dtype=np.int64)
+        self.group_house_cost = np.array([house_cost.get(c, 0) for c in self.colors], dtype=np.int64)
+        self.house_cost = np.array([house_cost.get(p.color, 0) for p in board.positions], dtype=np.int64)
+        # same compiled table the scalar engine uses, viewed as [square, houses, doubled]
+        table = compile_rent_table(board, rent_mapping)
+        self.rent = np.array(table.rents, dtype=np.int64).reshape(self.size, RENT_LEVELS, 2)
+
+
+class VectorGames:
+    """ K games with the same number of players, advanced in lockstep """
+    GO_BONUS = np.array(MillionaireMonopoly.GO_BONUS, dtype=np.int64)
+    START_MONEY = Player("").money
+
+    def __init__(self, board: MonopolyBoard, num_games: int, num_players: int, seed: int = 0,
+                 buy_reserve: int = FixedPolicy.buy_reserve, build_reserve: int = FixedPolicy.build_reserve):
+        self.board = CompiledBoard(board)
+        self.k = num_games
+        self.p = num_players
+        self.rng = np.random.default_rng(seed)
+        self.buy_reserve = buy_reserve
+        self.build_reserve = build_reserve
+
+        k, p, n = num_games, num_players, self.board.size
+        self.position = np.full((k, p), board.head.index, dtype=np.int64)
+        self.money = np.full((k, p), self.START_MONEY, dtype=np.int64)
+        self.mover_level = np.zeros((k, p), dtype=np.int64)
+        self.in_jail = np.zeros((k, p), dtype=bool)
+        self.bankrupt = np.zeros((k, p), dtype=bool)
+        self.bankrupt_turn = np.full((k, p), -1, dtype=np.int64)
+        self.owner = np.full((k, n), -1, dtype=np.int64)
+        self.houses = np.zeros((k, n), dtype=np.int64)
+        self.current = np.zeros(k, dtype=np.int64)
+        self.turns = np.zeros(k, dtype=np.int64)
+        self.done = np.zeros(k, dtype=bool)
+
+        chance, millionaire = DECKS
+        self.decks = {SquareKind.CHANCE: deck_array(chance), SquareKind.MILLIONAIRE: deck_array(millionaire)}
+        # each game shuffles its own copy of each deck and draws through a cursor
+        self.deck_order = {kind: self.rng.permuted(np.tile(np.arange(len(deck)), (k, 1)), axis=1)
+                           for kind, deck in self.decks.items()}
+        self.deck_cursor = {kind: np.zeros(k, dtype=np.int64) for kind in self.decks}
+
+    def _full_set(self, games, player, color):
+        """ Bool per game in `games`: does `player` own every square of `color` """
+        squares = self.board.group_squares[color]
+        return (self.owner[np.ix_(games, squares)] == player[:, None]).all(axis=1)
+
+    def _build(self, games):
+        """ FixedPolicy build: one house at a time on the least developed square of each full set """
+        cur = self.current[games]
+        for color, squares in enumerate(self.board.group_squares):
+            cost = self.board.group_house_cost[color]
+            g = games[self._full_set(games, cur, color)]
+            if g.size == 0:
+                continue
+            pl = self.current[g]
+            for _ in range(5 * len(squares)):
+                h = self.houses[np.ix_(g, squares)]
+                target = h.argmin(axis=1)
+                can = (h[np.arange(g.size), target] < 5) & (self.money[g, pl] - cost >= self.build_reserve)
+                if not can.any():
+                    break
+                self.houses[g[can], squares[target[can]]] += 1
+                self.money[g[can], pl[can]] -= cost
+
+    def _go_bonus(self, games, passes):
+        """ Pay the Go bonus for each pass, upgrading the mover first (as move_player(upgrade_mover=True)) """
+        pl = self.current[games]
+        while True:
+            paying = passes > 0
+            if not paying.any():
+                break
+            g, who = games[paying], pl[paying]
+            level = self.mover_level[g, who]
+            bonus = self.GO_BONUS[level]
+            upgrade = level < 2
+            bonus = bonus - np.where(upgrade, 50_000, 0)
+            self.mover_level[g, who] = level + upgrade
+            self.money[g, who] += bonus
+            passes = passes - 1
+
+    def _sale_value(self, games, player):
+        """ What the bank would pay `player` for every house and property, per game """
+        b = self.board
+        value = b.price // 2 + self.houses[games] * (b.house_cost // 2)[None, :]
+        return np.where(self.owner[games] == player[:, None], value, 0).sum(axis=1)
+
+    def _liquidate(self, games, player, amount):
+        """ Sell to the bank until `player` holds `amount`: houses one at a time from the most
+        developed square, then the cheapest properties. A simpler order than the object engine's
+        liquidation solver, which keeps the most rent income; it only changes which assets survive """
+        b = self.board
+        while True:
+            short = self.money[games, player] < amount
+            games, player, amount = games[short], player[short], amount[short]
+            if games.size == 0:
+                return
+            mine = self.owner[games] == player[:, None]
+            houses = np.where(mine, self.houses[games], 0)
+            sq = houses.argmax(axis=1)
+            house = houses[np.arange(games.size), sq] > 0
+            self.houses[games[house], sq[house]] -= 1
+            self.money[games[house], player[house]] += b.house_cost[sq[house]] // 2
+            bare = ~house
+            sq = np.where(mine, b.price[None, :], np.iinfo(np.int64).max).argmin(axis=1)
+            self.owner[games[bare], sq[bare]] = -1
+            self.money[games[bare], player[bare]] += b.price[sq[bare]] // 2
+
+    def _settle(self, games, debtor, creditor, amount):
+        """ `debtor` pays `amount` to `creditor` (-1 for the bank), selling assets when short and
+        going bankrupt to the creditor when even that would not cover it, as settle_debt """
+        short = self.money[games, debtor] < amount
+        if short.any():
+            covered = short & (self.money[games, debtor] + self._sale_value(games, debtor) >= amount)
+            self._liquidate(games[covered], debtor[covered], amount[covered])
+            broke = short & ~covered
+            self._declare_bankruptcy(games[broke], debtor[broke], creditor[broke])
+            games, debtor, creditor, amount = games[~broke], debtor[~broke], creditor[~broke], amount[~broke]
+        self.money[games, debtor] -= amount
+        to_player = creditor >= 0
+        self.money[games[to_player], creditor[to_player]] += amount[to_player]
+
+    def _declare_bankruptcy(self, games, debtor, creditor):
+        """ Hand every asset of `debtor` to `creditor` (-1: the bank, which clears the houses) and
+        knock them out """
+        owned = self.owner[games] == debtor[:, None]
+        self.owner[games] = np.where(owned, creditor[:, None], self.owner[games])
+        self.houses[games] = np.where(owned & (creditor < 0)[:, None], 0, self.houses[games])
+        to_player = creditor >= 0
+        self.money[games[to_player], creditor[to_player]] += self.money[games[to_player], debtor[to_player]]
+        self.money[games, debtor] = 0
+        self.bankrupt[games, debtor] = True
+        self.bankrupt_turn[games, debtor] = self.turns[games]
+        over = (~self.bankrupt[games]).sum(axis=1) <= 1
+        self.done[games[over]] = True
+
+    def _draw_cards(self, games, kind):
+        deck = self.decks[kind]
+        if len(deck) == 0 or games.size == 0:
+            return
+        cursor = self.deck_cursor[kind]
+        card = deck[self.deck_order[kind][games, cursor[games]]]
+        cursor[games] = (cursor[games] + 1) % len(deck)
+        pl = self.current[games]
+        code, arg = card[:, 0], card[:, 1]
+
+        jail = games[code == CardEffect.GO_TO_JAIL]
+        self.position[jail, self.current[jail]] = self.board.jail_index
+        self.in_jail[jail, self.current[jail]] = True
+
+        earn = code == CardEffect.EARN
+        self.money[games[earn], pl[earn]] += arg[earn]
+
+        bank = code == CardEffect.PAY_BANK
+        self._settle(games[bank], pl[bank], np.full(bank.sum(), -1), arg[bank])
+
+        # pay each / collect from each go round the other players in seat order, like the object engine
+        each = code == CardEffect.PAY_EACH
+        g, who, amount = games[each], pl[each], arg[each]
+        for other in range(self.p):
+            pays = (who != other) & ~self.bankrupt[g, other] & ~self.bankrupt[g, who]
+            self._settle(g[pays], who[pays], np.full(pays.sum(), other), amount[pays])
+
+        collect = code == CardEffect.COLLECT_FROM_EACH
+        g, who, amount = games[collect], pl[collect], arg[collect]
+        for other in range(self.p):
+            pays = (who != other) & ~self.bankrupt[g, other]
+            self._settle(g[pays], np.full(pays.sum(), other), who[pays], amount[pays])
+
+        chosen = code == CardEffect.PAY_CHOSEN
+        if chosen.any():
+            # FixedPolicy pays the poorest other player still in the game (the first one on ties)
+            g, who, amount = games[chosen], pl[chosen], arg[chosen]
+            money = self.money[g].copy()
+            money[self.bankrupt[g] | (np.arange(self.p)[None, :] == who[:, None])] = np.iinfo(np.int64).max
+            target = money.argmin(axis=1)
+            pays = (target != who) & ~self.bankrupt[g, target]
+            self._settle(g[pays], who[pays], target[pays], amount[pays])
+
+        up = code == CardEffect.MOVER_UP
+        g, who = games[up], pl[up]
+        at_max = self.mover_level[g, who] >= 2
+        self.mover_level[g[~at_max], who[~at_max]] += 1
+        self.money[g[at_max], who[at_max]] += 50_000
+
+        down = code == CardEffect.MOVER_DOWN
+        g, who = games[down], pl[down]
+        above_min = self.mover_level[g, who] > 0
+        self.mover_level[g[above_min], who[above_min]] -= 1
+
+        roll = code == CardEffect.ROLL_FOR_EARNINGS
+        if roll.any():
+            g, who = games[roll], pl[roll]
+            d = self.rng.integers(1, 7, size=(g.size, 2))
+            level = self.mover_level[g, who]
+            total = d.sum(axis=1)
+            hit = np.where(level == 0, d[:, 0] == d[:, 1], total >= np.where(level == 1, 8, 5))
+            self.money[g[hit], who[hit]] += arg[roll][hit]
+
+        # negative steps move counter-clockwise; like the object engine, card moves pay no Go bonus
+        adv = code == CardEffect.MOVE
+        self.position[games[adv], pl[adv]] = (self.position[games[adv], pl[adv]] + arg[adv]) % self.board.size
+
+    def _land_on_property(self, games):
+        b = self.board
+        pl = self.current[games]
+        sq = self.position[games, pl]
+        owner = self.owner[games, sq]
+
+        # unowned: FixedPolicy buys while keeping buy_reserve
+        buy = (owner == -1) & (self.money[games, pl] - b.price[sq] >= self.buy_reserve)
+        self.owner[games[buy], sq[buy]] = pl[buy]
+        self.money[games[buy], pl[buy]] -= b.price[sq[buy]]
+
+        # owned by someone else: rent, doubled on a full set without houses
+        pays = (owner >= 0) & (owner != pl)
+        g, who, sq, owner = games[pays], pl[pays], sq[pays], owner[pays]
+        if g.size == 0:
+            return
+        color = b.color_id[sq]
+        same_color = b.color_id[None, :] == color[:, None]
+        mine = (self.owner[g] == owner[:, None]) & same_color
+        full = mine.sum(axis=1) == b.group_size[color]
+        built = (mine & (self.houses[g] > 0)).any(axis=1)
+        rent = b.rent[sq, self.houses[g, sq], (full & ~built).astype(np.int64)]
+
+        short = self.money[g, who] < rent
+        ok = ~short
+        self.money[g[ok], who[ok]] -= rent[ok]
+        self.money[g[ok], owner[ok]] += rent[ok]
+        if short.any():
+            self._declare_bankruptcy(g[short], who[short], owner[short])
+
+    def _end_turn(self, games):
+        self.turns[games] += 1
+        nxt = self.current[games]
+        searching = np.ones(games.size, dtype=bool)
+        for _ in range(self.p):
+            # move on until every game points at a player still in the game
+            nxt = np.where(searching, (nxt + 1) % self.p, nxt)
+            searching &= self.bankrupt[games, nxt]
+            if not searching.any():
+                break
+        self.current[games] = nxt
+
+    def step(self):
+        """ Play one turn in every unfinished game """
+        games = np.flatnonzero(~self.done)
+        if games.size == 0:
+            return
+        b = self.board
+        self._build(games)
+
+        pl = self.current[games]
+        steps = self.rng.integers(1, 7, size=(games.size, 2)).sum(axis=1)
+        old = self.position[games, pl]
+        new = (old + steps) % b.size
+        self.position[games, pl] = new
+        if b.go_index is not None:
+            passes = (old + steps - b.go_index) // b.size - (old - b.go_index) // b.size
+            self._go_bonus(games, passes)
+
+        kind = b.kind[new]
+        to_jail = games[kind == SquareKind.GO_TO_JAIL]
+        self.position[to_jail, self.current[to_jail]] = b.jail_index
+        self.in_jail[to_jail, self.current[to_jail]] = True
+        self._draw_cards(games[kind == SquareKind.CHANCE], SquareKind.CHANCE)
+        self._draw_cards(games[kind == SquareKind.MILLIONAIRE], SquareKind.MILLIONAIRE)
+        self._land_on_property(games[kind == SquareKind.PROPERTY])
+
+        live = games[~self.done[games]]
+        self._end_turn(live)
+
+    def net_worth(self) -> np.ndarray:
+        """ (K, P) cash plus half the price of every property and house, as simulator.net_worth """
+        b = self.board
+        value = b.price // 2 + self.houses * (b.house_cost // 2)[None, :]
+        worth = self.money.copy()
+        for player in range(self.p):
+            worth[:, player] += np.where(self.owner == player, value, 0).sum(axis=1)
+        return worth
+
+    def run(self, max_turns: int = 2000) -> SimulationResult:
+        """ Play every game to completion or max_turns and summarise like simulator.simulate """
+        while not self.done.all() and self.turns.min() < max_turns:
+            self.step()
+            self.done |= self.turns >= max_turns
+
+        result = SimulationResult(self.p)
+        worth = np.where(self.bankrupt, -1, self.net_worth())
+        richest = worth.argmax(axis=1)
+        survivor = (~self.bankrupt).argmax(axis=1)
+        for k in range(self.k):
+            timed_out = (~self.bankrupt[k]).sum() > 1
+            winner = richest[k] if timed_out else survivor[k]
+            turns = [int(t) if t >= 0 else None for t in self.bankrupt_turn[k]]
+            result.add(int(winner), int(self.turns[k]), turns, bool(timed_out))
+        return result
+
+
+def simulate_vectorized(num_games: int, num_players: int = 4, seed: int = 0, max_turns: int = 2000,
+                        batch_size: int = 4096, board: Optional[MonopolyBoard] = None) -> SimulationResult:
+    """ Play `num_games` FixedPolicy games in lockstep batches of `batch_size` """
+    board = board or default_board()
+    total = SimulationResult(num_players)
+    for batch, start in enumerate(range(0, num_games, batch_size)):
+        games = VectorGames(board, min(batch_size, num_games - start), num_players, seed=[seed, batch])
+        total.merge(games.run(max_turns))
+    return total
+
+
+def cross_check(num_games: int = 2000, num_players: int = 4, seed: int = 0, max_turns: int = 2000,
+                sigmas: float = 4.0, workers: Optional[int] = None) -> Dict:
+    """ Run the same FixedPolicy setup through the vector engine and the object engine (simulator)
+    and check that win rates, timeouts, bankruptcies and mean game length agree within `sigmas`
+    standard errors. Individual games differ since the engines draw from different RNGs. """
+    vec = simulate_vectorized(num_games, num_players, seed=seed, max_turns=max_turns)
+    obj = simulate(num_games, ["fixed"] * num_players, seed=seed, workers=workers, max_turns=max_turns)
+
+    def proportion(a, b):
+        pooled = (a + b) / (2 * num_games)
+        se = math.sqrt(max(pooled * (1 - pooled), 1e-12) * 2 / num_games)
+        return a / num_games, b / num_games, se
+
+    def mean_length(result):
+        mean = result.mean_length()
+        var = sum(c * (t - mean) ** 2 for t, c in result.length_hist.items()) / max(result.games - 1, 1)
+        return mean, var
+
+    checks = {}
+    for seat in range(num_players):
+        checks[f"win_rate[{seat}]"] = proportion(vec.wins[seat], obj.wins[seat])
+        checks[f"bankrupt_rate[{seat}]"] = proportion(vec.bankruptcies[seat], obj.bankruptcies[seat])
+    checks["timeout_rate"] = proportion(vec.timeouts, obj.timeouts)
+    (m1, v1), (m2, v2) = mean_length(vec), mean_length(obj)
+    checks["mean_length"] = (m1, m2, math.sqrt((v1 + v2) / num_games) or 1e-12)
+
+    report = {name: {"vector": a, "object": b, "z": (a - b) / se, "ok": abs(a - b) <= sigmas * se}
+              for name, (a, b, se) in checks.items()}
+    return {"ok": all(r["ok"] for r in report.values()), "checks": report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Millionaire Monopoly games as NumPy arrays")
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=2000)
+    parser.add_argument("--cross-check", action="store_true",
+                        help="also run the object engine on the same setup and compare the statistics")
+    args = parser.parse_args()
+
+    if args.cross_check:
+        outcome = cross_check(args.games, args.players, seed=args.seed, max_turns=args.max_turns)
+        for name, row in outcome["checks"].items():
+            print(f"{name:>18}: vector {row['vector']:.4f}  object {row['object']:.4f}  z {row['z']:+.2f}"
+                  f"  {'ok' if row['ok'] else 'MISMATCH'}")
+        print("statistics match" if outcome["ok"] else "statistics differ")
+    else:
+        summary = simulate_vectorized(args.games, args.players, seed=args.seed, max_turns=args.max_turns).to_dict()
+        print(summary)